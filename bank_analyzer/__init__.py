@@ -0,0 +1 @@
+"""Bank statement parsing and analysis core, shared by the Streamlit app and the batch CLI."""
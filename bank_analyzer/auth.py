@@ -0,0 +1,254 @@
+"""
+Password hashing and the login path.
+
+Passwords are stored as bcrypt hashes. Rows written before bcrypt hold an
+unsalted SHA-256 hexdigest; they still verify, and are rewritten as bcrypt the
+first time their owner logs in successfully (as are bcrypt hashes of a lower
+cost than BCRYPT_ROUNDS).
+
+begin_login() is what the login form calls:
+
+    future = auth.begin_login(account, password, st.context.ip_address)
+    ok, msg = future.result()          # once future.done()
+
+Cheap checks answer at once with an already resolved Future: a client or an
+account that has used up its token bucket is refused without touching the
+database, and an (account, password) pair that verified recently is accepted
+from memory. Anything else is verified by db.login_user_db on a small thread
+pool, so bcrypt's deliberate cost never runs on a Streamlit script thread and
+a burst of attempts queues behind MAX_WORKERS instead of taking every core.
+
+begin_register() does the same for the registration form: the client's bucket
+is charged first, then db.register_user_db hashes the new password on the pool.
+"""
+import hashlib
+import hmac
+import math
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import bcrypt
+
+from . import instrument
+
+BCRYPT_ROUNDS = int(os.environ.get("BANK_ANALYZER_BCRYPT_ROUNDS") or 12)
+MAX_WORKERS = 2
+
+# attempts an account may make in a burst, then one more every ACCOUNT_REFILL_S
+ACCOUNT_BURST = int(os.environ.get("BANK_ANALYZER_LOGIN_ACCOUNT_BURST") or 5)
+ACCOUNT_REFILL_S = 60.0
+# the same per client address; raise the burst when many users share one address (NAT, proxy)
+CLIENT_BURST = int(os.environ.get("BANK_ANALYZER_LOGIN_CLIENT_BURST") or 20)
+CLIENT_REFILL_S = 3.0
+# buckets tracked per limiter; the least recently used are dropped beyond this
+MAX_TRACKED_KEYS = 50_000
+
+# how long a verified (account, password) pair is accepted without bcrypt
+VERIFIED_TTL_S = float(os.environ.get("BANK_ANALYZER_LOGIN_CACHE_S") or 900)
+MAX_VERIFIED = 4096
+
+LEGACY_HASH_RE = re.compile(r"[0-9a-f]{64}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Hashing
+# ──────────────────────────────────────────────────────────────────────────────
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+
+def legacy_hash(password: str) -> str:
+    """The unsalted SHA-256 hexdigest users rows held before bcrypt."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def is_legacy_hash(stored: str) -> bool:
+    return LEGACY_HASH_RE.fullmatch(stored) is not None
+
+
+def check_password(password: str, stored: str) -> bool:
+    """True when password matches stored, a bcrypt hash or a legacy SHA-256 one."""
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(legacy_hash(password), stored)
+    try:
+        return bcrypt.checkpw(password.encode(), stored.encode())
+    except ValueError:
+        return False
+
+
+def needs_rehash(stored: str) -> bool:
+    """Legacy rows and bcrypt hashes cheaper than BCRYPT_ROUNDS are rewritten on login."""
+    if is_legacy_hash(stored):
+        return True
+    try:
+        return int(stored.split("$")[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Rate limiting
+# ──────────────────────────────────────────────────────────────────────────────
+class TokenBuckets:
+    """One token bucket per key: `burst` tokens, refilled one every `refill_s` seconds."""
+
+    def __init__(self, burst: int, refill_s: float, max_keys: int = MAX_TRACKED_KEYS):
+        self.burst = burst
+        self.refill_s = refill_s
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, monotonic time of last update); least recently updated first
+        self._buckets = OrderedDict()
+
+    def take(self, key, now: float = None) -> float:
+        """Spends a token of key's bucket. Returns 0 when one was available, else the seconds until one is."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) / self.refill_s)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) * self.refill_s
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+account_limiter = TokenBuckets(ACCOUNT_BURST, ACCOUNT_REFILL_S)
+client_limiter = TokenBuckets(CLIENT_BURST, CLIENT_REFILL_S)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Recently verified logins
+# ──────────────────────────────────────────────────────────────────────────────
+# keyed by an HMAC under a per-process secret, so neither passwords nor their hashes are kept
+_verified_key = secrets.token_bytes(32)
+_verified_lock = threading.Lock()
+# key -> expiry (monotonic); oldest first
+_verified = OrderedDict()
+
+
+def _verified_digest(account: str, password: str) -> bytes:
+    return hmac.new(_verified_key, f"{account}\0{password}".encode(), hashlib.sha256).digest()
+
+
+def _recently_verified(digest: bytes) -> bool:
+    now = time.monotonic()
+    with _verified_lock:
+        expiry = _verified.get(digest)
+        if expiry is None:
+            return False
+        if expiry <= now:
+            del _verified[digest]
+            return False
+        return True
+
+
+def _remember_verified(digest: bytes):
+    with _verified_lock:
+        _verified.pop(digest, None)
+        _verified[digest] = time.monotonic() + VERIFIED_TTL_S
+        while len(_verified) > MAX_VERIFIED:
+            _verified.popitem(last=False)
+
+
+def reset():
+    """Forgets every bucket and verified login (tests, or after a password change)."""
+    account_limiter.clear()
+    client_limiter.clear()
+    with _verified_lock:
+        _verified.clear()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Login
+# ──────────────────────────────────────────────────────────────────────────────
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="auth")
+        return _executor
+
+
+def _resolved(ok: bool, msg: str) -> Future:
+    done = Future()
+    done.set_result((ok, msg))
+    return done
+
+
+def _too_many(wait: float, what: str = "login") -> Future:
+    return _resolved(False, f"Too many {what} attempts. Try again in {math.ceil(wait)} s.")
+
+
+def _verify(account: str, password: str, digest: bytes):
+    from .db import login_user_db
+
+    ok, msg = login_user_db(account, password)
+    if ok:
+        _remember_verified(digest)
+        account_limiter.reset(account)
+    return ok, msg
+
+
+def begin_login(account: str, password: str, client: str = None) -> Future:
+    """
+    Future of (ok, message) for a login attempt. client is the caller's network
+    address; None (local development, where Streamlit reports none) is not limited.
+    """
+    if client is not None:
+        wait = client_limiter.take(client)
+        if wait:
+            instrument.count("login_limited", True)
+            return _too_many(wait)
+    digest = _verified_digest(account, password)
+    if _recently_verified(digest):
+        instrument.count("login_cached", True)
+        return _resolved(True, "Login successful!")
+    wait = account_limiter.take(account)
+    if wait:
+        instrument.count("login_limited", True)
+        return _too_many(wait)
+    return _get_executor().submit(_verify, account, password, digest)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Registration
+# ──────────────────────────────────────────────────────────────────────────────
+def _register(account: str, password: str):
+    from .db import register_user_db
+
+    return register_user_db(account, password)
+
+
+def begin_register(account: str, password: str, client: str = None) -> Future:
+    """
+    Future of (ok, message) for a registration. Charged to client's bucket like a
+    login attempt (client None is not limited); the bcrypt hash runs on the pool.
+    """
+    if client is not None:
+        wait = client_limiter.take(client)
+        if wait:
+            instrument.count("register_limited", True)
+            return _too_many(wait, "registration")
+    return _get_executor().submit(_register, account, password)
@@ -0,0 +1,51 @@
+"""Keyword-based transaction categorization."""
+from difflib import get_close_matches
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Category detection
+# ──────────────────────────────────────────────────────────────────────────────
+DEFAULT_CATEGORIES = [
+    "Restaurant", "Hospital", "Taxi", "Misc", "Grocery",
+    "Credit card payment", "Subscription", "Sutherland",
+    "Rent", "Electricity", "Cashback", "Travel"
+]
+
+DEFAULT_CATEGORY_KEYWORDS = {
+    "Restaurant": ["restaurant","resto","restuarant","dine","dining","cafe","coffee","bar","zomato","swiggy","dominos","pizza","mcdonald","burger","kfc","food","eatery"],
+    "Hospital": ["hospital","hostpital","clinic","medical","care","apollo","fortis","manipal","health"],
+    "Taxi": ["uber","ola","cab","taxi","ride","auto","ola cabs","uber auto","olaauto","transport"],
+    "Grocery": ["grocery","grosery","supermarket","bigbasket","dmart","reliance fresh","spencer","store","mart","super","vegetables","provision"],
+    "Credit card payment": ["credit card","card payment","visa","mastercard","amex","creditcard","cardpayment","credit","billdesk"],
+    "Subscription": ["subscription","subscrption","netflix","spotify","prime","hotstar","disney","youtube premium","zee5","sony liv"],
+    "Sutherland": ["sutherland"],
+    "Rent": ["rent","rental","house rent","flat rent","pg","lease"],
+    "Electricity": ["electricity","power","electric bill","tneb","mahavitaran","bill payment","bills","current"],
+    "Cashback": ["cashback","reward","rewards","referral","cash back"],
+    "Travel": ["flight","air","indigo","spicejet","goair","air india","train","irctc","hotel","booking","travel","trip","journey"],
+}
+
+def detect_category(remarks: str, categories):
+    if remarks is None:
+        return "Misc"
+    text = str(remarks).lower()
+    if not text.strip():
+        return "Misc"
+
+    for cat in categories:
+        kws = DEFAULT_CATEGORY_KEYWORDS.get(cat, [])
+        for kw in kws:
+            if kw in text:
+                return cat
+
+    words = text.split()
+    for word in words:
+        for cat, kws in DEFAULT_CATEGORY_KEYWORDS.items():
+            match = get_close_matches(word, kws, n=1, cutoff=0.8)
+            if match:
+                return cat
+
+    for cat in categories:
+        if cat.lower() in text:
+            return cat
+
+    return "Misc"
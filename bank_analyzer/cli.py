@@ -0,0 +1,188 @@
+"""
+Headless batch ingestion.
+
+    python -m bank_analyzer.cli STATEMENTS_DIR -o transactions.parquet -j 8 --ask-password
+
+Walks STATEMENTS_DIR for PDFs, parses them with parse_many_pdfs over N worker
+processes, categorizes every row and writes the transactions (Parquet, Arrow
+IPC or CSV, see export) plus a per-file status report next to them. The
+password of encrypted statements comes from -p, a prompt (--ask-password) or
+BANK_ANALYZER_PDF_PASSWORD.
+"""
+import argparse
+import getpass
+import logging
+import os
+import sys
+
+from . import export, fx, instrument, page_cache
+from .categories import DEFAULT_CATEGORIES, detect_category
+from .merchants import merchant_ids, merchant_names
+from .parsing import configure_page_workers, parse_many_pdfs
+
+# password for encrypted statements, when neither -p nor --ask-password is given
+PASSWORD_ENV = "BANK_ANALYZER_PDF_PASSWORD"
+
+
+def find_pdfs(root: str) -> list:
+    """All *.pdf files under root (or root itself if it is a file), in a stable order."""
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            if fname.lower().endswith(".pdf"):
+                found.append(os.path.join(dirpath, fname))
+    return found
+
+
+def build_transactions(rows: list, categories=None):
+    """Transactions DataFrame with the Category and Merchant columns the dashboard adds."""
+    import pandas as pd
+
+    categories = categories or DEFAULT_CATEGORIES
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df["Category"] = df["Remarks"].apply(lambda r: detect_category(r, categories))
+    df["Merchant"] = merchant_names(merchant_ids(df["Remarks"]))
+    return fx.with_currency(df)
+
+
+def build_status_report(file_status: list, df):
+    """
+    One row per input file: parse status, row counts, printed totals and the
+    computed totals the dashboard would fall back to when nothing is printed.
+    """
+    import pandas as pd
+
+    report = pd.DataFrame(file_status)
+    if report.empty:
+        return report
+    if not df.empty and "Source Path" in df.columns:
+        signed = df.assign(
+            credit=df["Amount"].where(df["Type"] == "CR", 0.0),
+            debit=df["Amount"].where(df["Type"] == "DR", 0.0),
+        ).groupby("Source Path")[["credit", "debit"]].sum()
+        report["computed_credits"] = report["path"].map(signed["credit"]).fillna(0.0)
+        report["computed_debits"] = report["path"].map(signed["debit"]).fillna(0.0)
+    else:
+        report["computed_credits"] = 0.0
+        report["computed_debits"] = 0.0
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m bank_analyzer.cli",
+        description="Parse a directory tree of bank statement PDFs without the web UI."
+    )
+    parser.add_argument("input", help="PDF file or directory to scan recursively")
+    parser.add_argument("-o", "--output", required=True, help="transactions output file (.parquet, .arrow or .csv)")
+    parser.add_argument("--format", choices=list(export.FORMATS), help="output format (default: from --output extension)")
+    parser.add_argument("--excel", help="also write the formatted Excel report (summaries + transactions) here")
+    parser.add_argument("--currency", help="reporting currency for --excel, e.g. INR or AED "
+                                           "(default: the currency most transactions are in)")
+    parser.add_argument("--report", help="per-file status report (default: <output stem>_status.csv)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="parallel worker processes")
+    parser.add_argument("--page-workers", type=int, default=None,
+                        help="processes per large PDF when -j is 1 (default: CPU count; 1 disables)")
+    parser.add_argument("-p", "--password", default=None,
+                        help="password for encrypted statements (usually the account number); visible to other "
+                             f"users in the process list and kept in shell history, so prefer {PASSWORD_ENV} "
+                             "or --ask-password")
+    parser.add_argument("--ask-password", action="store_true", help="prompt for the password without echoing it")
+    parser.add_argument("--no-progress", action="store_true", help="disable the progress bar")
+    parser.add_argument("--page-cache", help="page text cache directory (default: user_data/page_cache)")
+    parser.add_argument("--no-page-cache", action="store_true", help="always re-extract page text")
+    parser.add_argument("--metrics", help="append per-file stage timings (JSON lines) to this file")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="write a profile per file")
+    parser.add_argument("--profile-dir", default="profiles", help="where --profile writes (default: ./profiles)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    from tqdm import tqdm
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    password = args.password
+    if password is None:
+        password = getpass.getpass("Statement password: ") if args.ask_password else os.environ.get(PASSWORD_ENV)
+
+    fmt = args.format or export.format_for_path(args.output)
+    report_path = args.report or f"{os.path.splitext(args.output)[0]}_status.csv"
+
+    if args.page_workers is not None:
+        configure_page_workers(args.page_workers)
+    if args.no_page_cache:
+        page_cache.configure(enabled=False)
+    elif args.page_cache:
+        page_cache.configure(os.path.abspath(args.page_cache))
+    if args.metrics:
+        instrument.register_sink("cli", instrument.jsonl_sink(args.metrics))
+    if args.profile:
+        instrument.configure_profiling(args.profile, os.path.abspath(args.profile_dir))
+
+    paths = find_pdfs(args.input)
+    if not paths:
+        print(f"No PDF files found under {args.input}", file=sys.stderr)
+        return 1
+
+    with tqdm(total=len(paths), unit="file", disable=args.no_progress) as bar:
+        rows, printed_totals = parse_many_pdfs(
+            paths, password, workers=args.workers, progress=lambda _p: bar.update(1)
+        )
+
+    # Source File is only the basename; keep the relative path so same-named statements stay distinct.
+    # Rows come back grouped per file in input order, so file_status row counts slice them.
+    root = os.path.abspath(args.input if os.path.isdir(args.input) else os.path.dirname(args.input) or ".")
+    offset = 0
+    for fs in printed_totals["file_status"]:
+        fs["path"] = os.path.relpath(os.path.abspath(fs["path"]), root)
+        for r in rows[offset:offset + fs["rows"]]:
+            r["Source Path"] = fs["path"]
+        offset += fs["rows"]
+
+    df = build_transactions(rows)
+    report = build_status_report(printed_totals["file_status"], df)
+
+    # Parquet/Arrow outputs can be loaded straight into the dashboard ("Load a saved analysis")
+    export.write_table(df, args.output, fmt, meta={
+        "printed_totals": {k: printed_totals.get(k) for k in ("printed_credits", "printed_debits", "printed_by_currency")},
+        "reconciliation": printed_totals.get("reconciliation", []),
+        "file_status": printed_totals["file_status"],
+    })
+    report.to_csv(report_path, index=False)
+    if args.excel:
+        from .currency import default_reporting_currency, statement_currencies, symbol_for
+        from .excel_report import write_workbook
+
+        reporting = (args.currency or default_reporting_currency(printed_totals["file_status"])).upper()
+        by_currency = printed_totals.get("printed_by_currency") or {}
+        # printed totals are in statement currency; they only apply when nothing needs converting
+        single = set(statement_currencies(printed_totals["file_status"])) | set(by_currency) <= {reporting}
+        write_workbook(fx.to_reporting(df, reporting, fx.load_rates()), args.excel, currency_symbol=symbol_for(reporting),
+                       printed_totals=by_currency.get(reporting) if single else None)
+
+    # Same rule as the dashboard: printed totals win when any statement has them; one line per currency
+    by_currency = printed_totals.get("printed_by_currency") or {}
+    failed = sum(1 for fs in printed_totals["file_status"] if fs["status"] != "ok")
+    print(f"{len(paths)} file(s), {failed} failed, {len(df)} transaction(s)")
+    for code, group in (df.groupby("Currency", observed=True) if not df.empty else []):
+        computed_credit = float(group.loc[group["Type"] == "CR", "Amount"].sum())
+        computed_debit = float(group.loc[group["Type"] == "DR", "Amount"].sum())
+        printed = by_currency.get(code, {})
+        pc, pd_ = printed.get("printed_credits"), printed.get("printed_debits")
+        total_credit = float(pc) if pc is not None else computed_credit
+        total_debit = float(pd_) if pd_ is not None else computed_debit
+        print(f"Total credit {code} {total_credit:,.2f}  Total debit {code} {total_debit:,.2f}")
+    print(f"Transactions: {args.output}")
+    print(f"Status report: {report_path}")
+    if args.excel:
+        print(f"Excel report: {args.excel}")
+    return 1 if failed == len(paths) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Statement currencies and money formatting."""
+
+# display prefix per ISO code; codes not listed are shown as the code itself
+CURRENCY_SYMBOLS = {"INR": "₹"}
+
+
+def symbol_for(code: str) -> str:
+    return CURRENCY_SYMBOLS.get(code or "INR", code)
+
+
+def statement_currencies(file_status) -> dict:
+    """
+    {currency code: transaction count} over the parsed statements, from the
+    per-file status the parsers report (O(files); rows are never scanned).
+    """
+    counts = {}
+    for fs in file_status or []:
+        if fs.get("currency") and fs.get("rows"):
+            counts[fs["currency"]] = counts.get(fs["currency"], 0) + fs["rows"]
+    return counts
+
+
+def default_reporting_currency(file_status) -> str:
+    """Currency holding most of the transactions; INR when nothing was parsed."""
+    counts = statement_currencies(file_status)
+    return max(counts, key=counts.get) if counts else "INR"
+
+
+def format_money(amount, currency_symbol="₹", decimals=2):
+    """Format numbers with the chosen currency prefix."""
+    prefix = currency_symbol or "₹"
+    if prefix.isalpha() and not prefix.endswith(" "):
+        prefix = f"{prefix} "
+    fmt = f"{{:,.{decimals}f}}"
+    try:
+        return f"{prefix}{fmt.format(float(amount))}"
+    except Exception:
+        return f"{prefix}{fmt.format(0)}"
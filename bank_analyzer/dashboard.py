@@ -0,0 +1,104 @@
+"""
+Dashboard aggregations over the analyzed transactions DataFrame.
+
+Each function takes the DataFrame the app keeps in session state (Date,
+Amount, Type, Category, Source File, ...) and returns the numeric table a
+dashboard tab renders; formatting stays in the UI. Text columns may be
+categorical (reloaded exports), so groupbys only keep observed groups.
+
+Amounts are summed as they are, so pass the frame already converted to one
+reporting currency (fx.to_reporting) — except to currency_summary(), which
+totals each statement currency in its own units.
+"""
+from . import instrument
+
+
+def split_amounts(df):
+    """(credit, debit) Series aligned with df: Amount where the row has that Type, else 0."""
+    credit = df["Amount"].where(df["Type"] == "CR", 0.0)
+    debit = df["Amount"].where(df["Type"] == "DR", 0.0)
+    return credit, debit
+
+
+@instrument.timed("dashboard.computed_totals")
+def computed_totals(df):
+    """(total_credit, total_debit) computed from the rows."""
+    if df.empty:
+        return 0.0, 0.0
+    credit, debit = split_amounts(df)
+    return float(credit.sum()), float(debit.sum())
+
+
+@instrument.timed("dashboard.file_summary")
+def file_summary(df):
+    """Total_Credit, Total_Debit, Transactions and Net_Flow per Source File."""
+    credit, debit = split_amounts(df)
+    summary = df.assign(Total_Credit=credit, Total_Debit=debit).groupby("Source File", observed=True).agg(
+        Total_Credit=("Total_Credit", "sum"),
+        Total_Debit=("Total_Debit", "sum"),
+        Transactions=("Amount", "count")
+    )
+    summary["Net_Flow"] = summary["Total_Credit"] - summary["Total_Debit"]
+    return summary
+
+
+@instrument.timed("dashboard.currency_summary")
+def currency_summary(df):
+    """Total_Credit, Total_Debit, Net_Flow and Transactions per statement Currency, in that currency."""
+    amount = df["Original Amount"] if "Original Amount" in df.columns else df["Amount"]
+    native = df.assign(Amount=amount)
+    if "Currency" not in native.columns:
+        native["Currency"] = "INR"
+    credit, debit = split_amounts(native)
+    summary = native.assign(Total_Credit=credit, Total_Debit=debit).groupby("Currency", observed=True).agg(
+        Total_Credit=("Total_Credit", "sum"),
+        Total_Debit=("Total_Debit", "sum"),
+        Transactions=("Amount", "count")
+    )
+    summary["Net_Flow"] = summary["Total_Credit"] - summary["Total_Debit"]
+    return summary
+
+
+@instrument.timed("dashboard.monthly_summary")
+def monthly_summary(df):
+    """CR/DR sums per calendar month plus Net, indexed by Period."""
+    import pandas as pd
+
+    month = pd.to_datetime(df["Date"], errors="coerce").dt.to_period("M").rename("Month")
+    summary = df.groupby([month, "Type"], observed=True)["Amount"].sum().unstack(fill_value=0)
+    summary["Net"] = summary.get("CR", 0) - summary.get("DR", 0)
+    return summary
+
+
+@instrument.timed("dashboard.category_summary")
+def category_summary(df):
+    """Total and Count per Category, largest total first."""
+    return df.groupby("Category", observed=True).agg(
+        Total=("Amount", "sum"),
+        Count=("Amount", "count")
+    ).sort_values("Total", ascending=False)
+
+
+@instrument.timed("dashboard.merchant_summary")
+def merchant_summary(df, n: int = 10):
+    """
+    Total, Count and Average of debits for the n merchants with the largest total,
+    indexed by merchant id with the Merchant name alongside (see merchants).
+    Debits whose remark names no merchant are left out.
+    """
+    from .merchants import known, merchant_ids, merchant_names
+
+    ids = df["Merchant ID"] if "Merchant ID" in df.columns else merchant_ids(df["Remarks"])
+    is_debit = (df["Type"] == "DR") & known(ids)
+    summary = df.loc[is_debit, "Amount"].groupby(ids[is_debit].rename("Merchant ID")).agg(
+        Total="sum",
+        Count="count"
+    ).nlargest(n, "Total")
+    summary["Average"] = summary["Total"] / summary["Count"]
+    summary.insert(0, "Merchant", merchant_names(summary.index))
+    return summary
+
+
+@instrument.timed("dashboard.top_transactions")
+def top_transactions(df, n: int = 5):
+    return df.nlargest(n, "Amount")
@@ -0,0 +1,147 @@
+"""SQLite storage for user accounts, uploaded statement files and the merchant dictionary."""
+import os
+import sqlite3
+from datetime import datetime
+
+from .auth import check_password, hash_password, needs_rehash
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Setup
+# ──────────────────────────────────────────────────────────────────────────────
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.environ.get("BANK_ANALYZER_DATA_DIR") or os.path.join(BASE_DIR, "user_data")
+UPLOAD_ROOT = os.path.join(DATA_DIR, "uploads")
+DB_PATH = os.path.join(DATA_DIR, "bank_app.db")
+
+def ensure_data_dirs():
+    """Creates the data and upload directories on first use rather than at import."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(UPLOAD_ROOT, exist_ok=True)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Database helpers
+# ──────────────────────────────────────────────────────────────────────────────
+def get_db():
+    ensure_data_dirs()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            account_number TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pdf_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_number TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            filepath TEXT NOT NULL,
+            uploaded_at TEXT NOT NULL
+        )
+    """)
+    # merchant dictionary shared by the whole library (see merchants.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS merchants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS merchant_remarks (
+            remark TEXT PRIMARY KEY,
+            merchant_id INTEGER NOT NULL,
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.commit()
+    return conn
+
+def register_user_db(account_number: str, password: str):
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM users WHERE account_number=?", (account_number,))
+    if cur.fetchone():
+        conn.close()
+        return False, "Account already exists!"
+    cur.execute("INSERT INTO users (account_number, password) VALUES (?, ?)", (account_number, hash_password(password)))
+    conn.commit()
+    conn.close()
+    return True, "Registration successful!"
+
+def login_user_db(account_number: str, password: str):
+    """
+    Checks a password against the stored hash (slow: bcrypt; the login form goes
+    through auth.begin_login). A legacy SHA-256 row is rewritten as bcrypt on success.
+    """
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT password FROM users WHERE account_number=?", (account_number,))
+    row = cur.fetchone()
+    if not row:
+        conn.close()
+        return False, "User not found!"
+    if not check_password(password, row[0]):
+        conn.close()
+        return False, "Incorrect password!"
+    if needs_rehash(row[0]):
+        # only if no concurrent login rewrote it first
+        conn.execute(
+            "UPDATE users SET password=? WHERE account_number=? AND password=?",
+            (hash_password(password), account_number, row[0])
+        )
+        conn.commit()
+    conn.close()
+    return True, "Login successful!"
+
+def save_uploaded_files(account_number: str, files):
+    user_dir = os.path.join(UPLOAD_ROOT, account_number)
+    os.makedirs(user_dir, exist_ok=True)
+    saved_paths = []
+    conn = get_db()
+    for f in files:
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        fname = f"{ts}__{f.name}"
+        fpath = os.path.join(user_dir, fname)
+        with open(fpath, "wb") as out:
+            out.write(f.getbuffer())
+        conn.execute(
+            "INSERT INTO pdf_files (account_number, filename, filepath, uploaded_at) VALUES (?, ?, ?, ?)",
+            (account_number, f.name, fpath, datetime.now().isoformat(timespec="seconds"))
+        )
+        saved_paths.append(fpath)
+    conn.commit()
+    conn.close()
+    return saved_paths
+
+def get_saved_pdfs(account_number: str):
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT id, filename, filepath, uploaded_at FROM pdf_files WHERE account_number=? ORDER BY uploaded_at DESC",
+        (account_number,)
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return [{"id": r[0], "filename": r[1], "filepath": r[2], "uploaded_at": r[3]} for r in rows]
+
+def delete_pdf(pdf_id: int):
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("SELECT filepath FROM pdf_files WHERE id=?", (pdf_id,))
+    row = cur.fetchone()
+    if row:
+        try:
+            os.remove(row[0])
+        except FileNotFoundError:
+            pass
+        cur.execute("DELETE FROM pdf_files WHERE id=?", (pdf_id,))
+    conn.commit()
+    conn.close()
+
+
+def rename_pdf(pdf_id: int, new_name: str):
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute("UPDATE pdf_files SET filename=? WHERE id=?", (new_name, pdf_id))
+    conn.commit()
+    conn.close()
@@ -0,0 +1,177 @@
+"""
+Excel report of an analysis.
+
+write_workbook() produces a formatted workbook with a Summary sheet, the full
+Transactions sheet and the By File / Monthly / Categories summaries the
+dashboard shows (plus By Currency, in statement currencies, when the
+statements are in more than one). It uses openpyxl's write-only mode: rows are streamed to disk
+as they are appended and the transactions are converted CHUNK_ROWS at a time,
+so memory stays flat however long the transaction sheet is.
+"""
+import os
+import tempfile
+
+from . import dashboard
+
+CHUNK_ROWS = 5000
+MONEY_FORMAT = "#,##0.00"
+DATE_FORMAT = "dd-mmm-yyyy"
+
+TRANSACTION_COLUMNS = ["Date", "Amount", "Type", "Category", "Remarks", "Source File", "Currency", "Original Amount",
+                       "Balance", "Page"]
+_MONEY_COLUMNS = {"Amount", "Original Amount", "Balance"}
+_WIDTHS = {"Date": 13, "Amount": 15, "Type": 6, "Category": 20, "Remarks": 60, "Source File": 28, "Currency": 9,
+           "Original Amount": 16, "Balance": 16, "Page": 6}
+
+
+def _styles():
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    return {
+        "header_font": Font(bold=True, color="FFFFFF"),
+        "header_fill": PatternFill("solid", fgColor="4CAF50"),
+        "title_font": Font(bold=True, size=14),
+        "center": Alignment(horizontal="center"),
+    }
+
+
+def _cell(ws, value, number_format=None, font=None, fill=None, alignment=None):
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value=value)
+    if number_format:
+        cell.number_format = number_format
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    if alignment:
+        cell.alignment = alignment
+    return cell
+
+
+def _header(ws, names, styles):
+    ws.append([_cell(ws, n, font=styles["header_font"], fill=styles["header_fill"], alignment=styles["center"]) for n in names])
+
+
+def _plain(value):
+    """Python value openpyxl can store (no NaN/NaT, no numpy scalars)."""
+    import pandas as pd
+
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _write_summary(wb, df, currency_symbol, printed_totals, styles):
+    ws = wb.create_sheet("Summary")
+    ws.column_dimensions["A"].width = 28
+    ws.column_dimensions["B"].width = 20
+    ws.column_dimensions["C"].width = 20
+    ws.append([_cell(ws, "Bank Statement Analysis", font=styles["title_font"])])
+    ws.append([])
+    credit, debit = dashboard.computed_totals(df)
+    printed_totals = printed_totals or {}
+    _header(ws, ["", f"Computed ({currency_symbol})", f"Printed ({currency_symbol})"], styles)
+    for label, computed, printed in (
+        ("Total Credit", credit, printed_totals.get("printed_credits")),
+        ("Total Debit", debit, printed_totals.get("printed_debits")),
+    ):
+        ws.append([label, _cell(ws, computed, MONEY_FORMAT), _cell(ws, _plain(printed), MONEY_FORMAT)])
+    ws.append(["Net Flow", _cell(ws, credit - debit, MONEY_FORMAT)])
+    ws.append(["Transactions", len(df)])
+    ws.append(["Statements", int(df["Source File"].nunique()) if not df.empty else 0])
+
+
+def _write_transactions(wb, df, currency_symbol, styles, chunk_rows):
+    import pandas as pd
+
+    ws = wb.create_sheet("Transactions")
+    cols = [c for c in TRANSACTION_COLUMNS if c in df.columns]
+    for idx, col in enumerate(cols):
+        ws.column_dimensions[_column_letter(idx)].width = _WIDTHS.get(col, 14)
+    ws.freeze_panes = "A2"
+    # Amount is in the reporting currency; Original Amount and Balance are in the row's Currency
+    _header(ws, [f"{c} ({currency_symbol})" if c == "Amount" or (c == "Balance" and "Currency" not in cols) else c
+                 for c in cols], styles)
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows][cols].copy()
+        if "Date" in chunk.columns:
+            chunk["Date"] = pd.to_datetime(chunk["Date"], errors="coerce").dt.date
+        # object dtype so itertuples hands out plain Python values and missing ones as None
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        for values in chunk.itertuples(index=False, name=None):
+            row = []
+            for col, value in zip(cols, values):
+                if col in _MONEY_COLUMNS:
+                    row.append(_cell(ws, value, MONEY_FORMAT))
+                elif col == "Date":
+                    row.append(_cell(ws, value, DATE_FORMAT))
+                else:
+                    row.append(value)
+            ws.append(row)
+
+
+def _write_frame(wb, title, frame, index_label, money_columns, styles):
+    """A small summary table (index plus columns) as its own sheet."""
+    ws = wb.create_sheet(title)
+    ws.column_dimensions["A"].width = 28
+    for idx in range(1, len(frame.columns) + 1):
+        ws.column_dimensions[_column_letter(idx)].width = 16
+    _header(ws, [index_label] + [str(c) for c in frame.columns], styles)
+    for label, values in zip(frame.index, frame.itertuples(index=False, name=None)):
+        row = [str(label)]
+        for col, value in zip(frame.columns, values):
+            value = _plain(value)
+            row.append(_cell(ws, value, MONEY_FORMAT) if col in money_columns else value)
+        ws.append(row)
+
+
+def _column_letter(idx: int) -> str:
+    from openpyxl.utils import get_column_letter
+
+    return get_column_letter(idx + 1)
+
+
+def write_workbook(df, path: str, currency_symbol: str = "₹", printed_totals: dict = None,
+                   chunk_rows: int = CHUNK_ROWS) -> str:
+    """
+    Writes the Excel report for df to path (atomically) and returns path.
+    printed_totals: {"printed_credits", "printed_debits"} as kept by the app, shown next to the computed totals.
+    """
+    from openpyxl import Workbook
+
+    styles = _styles()
+    wb = Workbook(write_only=True)
+    _write_summary(wb, df, currency_symbol, printed_totals, styles)
+    _write_transactions(wb, df, currency_symbol, styles, chunk_rows)
+    if not df.empty:
+        file_summary = dashboard.file_summary(df)
+        _write_frame(wb, "By File", file_summary, "Source File", set(file_summary.columns) - {"Transactions"}, styles)
+        by_currency = dashboard.currency_summary(df)
+        if len(by_currency) > 1:
+            _write_frame(wb, "By Currency", by_currency, "Currency", set(by_currency.columns) - {"Transactions"}, styles)
+        monthly = dashboard.monthly_summary(df)
+        monthly.index = monthly.index.astype(str)
+        _write_frame(wb, "Monthly", monthly, "Month", set(monthly.columns), styles)
+        categories = dashboard.category_summary(df)
+        categories["Avg_Per_Transaction"] = categories["Total"] / categories["Count"]
+        _write_frame(wb, "Categories", categories, "Category", {"Total", "Avg_Per_Transaction"}, styles)
+
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".xlsx.tmp")
+    os.close(fd)
+    try:
+        wb.save(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return path
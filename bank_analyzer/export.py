@@ -0,0 +1,140 @@
+"""
+Saving and reloading analyzed transactions.
+
+Parquet and Arrow IPC keep the dtypes the dashboard relies on (datetime Date,
+float Amount/Balance, categorical Type/Category/Source File and similar) and
+carry the analysis-level results (printed totals, reconciliation, per-file
+status) in the schema metadata, so a saved analysis reloads without reading
+any PDF:
+
+    data = export.to_bytes(df, "parquet", meta)
+    df, meta = export.read_table(data)
+
+CSV stays available for spreadsheets; it loses both the dtypes and the metadata.
+"""
+import io
+import json
+
+FORMATS = {
+    "parquet": {"label": "Parquet", "ext": ".parquet", "mime": "application/vnd.apache.parquet"},
+    "arrow": {"label": "Arrow IPC", "ext": ".arrow", "mime": "application/vnd.apache.arrow.file"},
+    "csv": {"label": "CSV", "ext": ".csv", "mime": "text/csv"},
+}
+CATEGORICAL_COLUMNS = ("Type", "Category", "Source File", "Currency", "Merchant")
+METADATA_KEY = b"bank_analyzer.analysis"
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_MAGIC = b"ARROW1"
+
+
+def format_for_path(path: str) -> str:
+    """Export format implied by a file name: .csv, .arrow/.feather/.ipc, anything else Parquet."""
+    lower = path.lower()
+    if lower.endswith(".csv"):
+        return "csv"
+    if lower.endswith((".arrow", ".feather", ".ipc")):
+        return "arrow"
+    return "parquet"
+
+
+def normalize_dtypes(df):
+    """
+    Shallow copy of df with the dtypes exports preserve: datetime Date, float64
+    amounts and categorical low-cardinality text columns.
+    """
+    import pandas as pd
+
+    out = df.copy(deep=False)
+    if "Date" in out.columns:
+        out["Date"] = pd.to_datetime(out["Date"], errors="coerce")
+    for col in ("Amount", "Balance"):
+        if col in out.columns:
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+    for col in CATEGORICAL_COLUMNS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype("category")
+    return out
+
+
+def _to_arrow(df, meta=None):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(normalize_dtypes(df), preserve_index=False)
+    if meta:
+        schema_meta = dict(table.schema.metadata or {})
+        schema_meta[METADATA_KEY] = json.dumps(meta, default=str).encode("utf-8")
+        table = table.replace_schema_metadata(schema_meta)
+    return table
+
+
+def write_table(df, dest, fmt: str, meta: dict = None):
+    """Writes df to dest (a path or binary file object); meta is kept by Parquet and Arrow only."""
+    if fmt == "csv":
+        df.to_csv(dest, index=False)
+        return
+    table = _to_arrow(df, meta)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, dest, compression="zstd")
+    elif fmt == "arrow":
+        import pyarrow as pa
+
+        with pa.ipc.new_file(dest, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def to_bytes(df, fmt: str, meta: dict = None) -> bytes:
+    buf = io.BytesIO()
+    write_table(df, buf, fmt, meta)
+    return buf.getvalue()
+
+
+def _sniff(source) -> str:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        head = bytes(source[:6])
+    elif isinstance(source, str):
+        with open(source, "rb") as fh:
+            head = fh.read(6)
+    else:
+        pos = source.tell()
+        head = source.read(6)
+        source.seek(pos)
+    if head.startswith(_PARQUET_MAGIC):
+        return "parquet"
+    if head.startswith(_ARROW_MAGIC):
+        return "arrow"
+    return "csv"
+
+
+def read_table(source, fmt: str = None):
+    """
+    (df, meta) from a path, bytes or binary file object written by write_table.
+    The format is sniffed from the magic bytes unless given; meta is {} for CSV.
+    """
+    import pandas as pd
+
+    fmt = fmt or _sniff(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    if fmt == "csv":
+        df = pd.read_csv(source)
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        return df, {}
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(source)
+    elif fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.ipc.open_file(source).read_all()
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    raw = (table.schema.metadata or {}).get(METADATA_KEY)
+    meta = json.loads(raw) if raw else {}
+    return table.to_pandas(), meta
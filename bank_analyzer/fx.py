@@ -0,0 +1,160 @@
+"""
+Converting analyzed transactions into one reporting currency.
+
+Every parsed row carries the ISO code of its statement's currency in the
+"Currency" column. to_reporting() converts Amount into a chosen reporting
+currency with the rate table from load_rates(), vectorized over the frame:
+
+    rates = fx.load_rates()
+    view = fx.to_reporting(df, "INR", rates)
+
+The table (see fx_rates.csv) gives each currency's value in a common pivot
+currency, optionally per effective date; each row uses the latest rate on or
+before its Date. Override it with BANK_ANALYZER_FX_RATES or by placing an
+fx_rates.csv in DATA_DIR.
+"""
+import os
+import threading
+
+RATES_ENV = "BANK_ANALYZER_FX_RATES"
+DEFAULT_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.csv")
+DEFAULT_CURRENCY = "INR"
+
+_rates_cache = {}
+_rates_lock = threading.Lock()
+
+
+def rates_path() -> str:
+    """Rate table in use: $BANK_ANALYZER_FX_RATES, else DATA_DIR/fx_rates.csv, else the bundled table."""
+    env = os.environ.get(RATES_ENV)
+    if env:
+        return env
+    from .db import DATA_DIR
+
+    user_table = os.path.join(DATA_DIR, "fx_rates.csv")
+    return user_table if os.path.exists(user_table) else DEFAULT_RATES_PATH
+
+
+def load_rates(path: str = None):
+    """
+    DataFrame (date, currency, rate) read from a CSV with columns currency, rate
+    and optionally date; undated rows apply at any date. Cached until the file changes.
+    """
+    import pandas as pd
+
+    path = path or rates_path()
+    mtime = os.path.getmtime(path)
+    with _rates_lock:
+        hit = _rates_cache.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+
+    table = pd.read_csv(path, comment="#", skipinitialspace=True)
+    missing = {"currency", "rate"} - set(table.columns)
+    if missing:
+        raise ValueError(f"{path}: FX rate table has no {', '.join(sorted(missing))} column")
+    if "date" not in table.columns:
+        table["date"] = pd.NaT
+    table["date"] = pd.to_datetime(table["date"], errors="coerce")
+    table["currency"] = table["currency"].astype(str).str.strip().str.upper()
+    table["rate"] = pd.to_numeric(table["rate"], errors="coerce")
+    table = (table.dropna(subset=["rate"])[["date", "currency", "rate"]]
+             .sort_values("date", na_position="first", kind="stable")
+             .reset_index(drop=True))
+
+    with _rates_lock:
+        _rates_cache[path] = (mtime, table)
+    return table
+
+
+def known_currencies(rates) -> list:
+    return sorted(rates["currency"].unique())
+
+
+def currencies_of(df) -> list:
+    """Currencies present in df (by the Currency column; DEFAULT_CURRENCY when there is none)."""
+    import pandas as pd
+
+    if "Currency" not in df.columns:
+        return [DEFAULT_CURRENCY] if not df.empty else []
+    col = df["Currency"]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return sorted(str(c) for c in col.cat.remove_unused_categories().cat.categories)
+    return sorted(str(c) for c in col.dropna().unique())
+
+
+def with_currency(df, currency: str = DEFAULT_CURRENCY):
+    """df with a Currency column, filled with currency for frames saved before rows carried one."""
+    if "Currency" in df.columns:
+        if not df["Currency"].isna().any():
+            return df
+        out = df.copy(deep=False)
+        out["Currency"] = df["Currency"].astype(object).fillna(currency)
+        return out
+    out = df.copy(deep=False)
+    out["Currency"] = currency
+    return out
+
+
+def _rates_for(codes, dates, rates):
+    """
+    Array with the rate of each (currency, date) pair: the latest dated rate on
+    or before the date, else the currency's undated rate, else its earliest
+    rate; NaN for unknown currencies.
+    """
+    import numpy as np
+    import pandas as pd
+
+    dated = rates.dropna(subset=["date"])
+    latest = rates.groupby("currency")["rate"].last()
+    out = codes.map(latest).to_numpy(dtype="float64")
+
+    has_date = dates.notna().to_numpy()
+    if has_date.any() and not dated.empty:
+        left = pd.DataFrame({
+            "date": dates.to_numpy()[has_date],
+            "currency": codes.to_numpy()[has_date],
+            "pos": np.flatnonzero(has_date),
+        }).sort_values("date", kind="stable")
+        merged = pd.merge_asof(left, dated, on="date", by="currency", direction="backward")
+        undated = rates[rates["date"].isna()].groupby("currency")["rate"].last()
+        earliest = dated.groupby("currency")["rate"].first()
+        before_first = merged["currency"].map(undated).fillna(merged["currency"].map(earliest))
+        out[merged["pos"].to_numpy()] = merged["rate"].fillna(before_first).to_numpy(dtype="float64")
+    return out
+
+
+def conversion_factors(currencies, dates, to: str, rates):
+    """Multiplier per row converting from that row's currency into `to`, at the row's date."""
+    import numpy as np
+    import pandas as pd
+
+    codes = pd.Series(np.asarray(currencies, dtype=object)).astype(str)
+    when = pd.Series(pd.to_datetime(np.asarray(dates), errors="coerce"))
+    factors = _rates_for(codes, when, rates) / _rates_for(pd.Series([to] * len(codes), dtype=object), when, rates)
+    factors[(codes == to).to_numpy()] = 1.0
+    return factors
+
+
+def to_reporting(df, to: str, rates):
+    """
+    df with Amount in the reporting currency `to` and the statement amount kept
+    as "Original Amount" (Currency still names the statement currency). Returns
+    df itself when every row is already in `to`. Raises ValueError when the rate
+    table lacks a currency present in df.
+    """
+    present = currencies_of(df)
+    if not present or present == [to]:
+        return df
+    known = set(rates["currency"])
+    missing = sorted(c for c in set(present) | {to} if c not in known)
+    if missing:
+        raise ValueError(f"No FX rate for {', '.join(missing)}")
+
+    df = with_currency(df)
+    factors = conversion_factors(df["Currency"], df["Date"], to, rates)
+    out = df.copy(deep=False)
+    out["Original Amount"] = df["Amount"]
+    out["Amount"] = (df["Amount"].to_numpy(dtype="float64") * factors).round(2)
+    return out
+
@@ -0,0 +1,217 @@
+"""
+Lightweight per-stage timing for the parse pipeline and dashboard.
+
+A record is opened with track() (or begin()/end() where a with-block does not
+fit) and stage() blocks inside it add their wall time under a stage name:
+
+    with instrument.track("file", path) as rec:
+        with instrument.stage("extract_text"):
+            ...
+        instrument.count("pages", len(pages))
+
+stage() and count() are no-ops when no record is active, so instrumented code
+costs nothing outside a tracked run. Finished records are plain dicts; emit()
+hands them to every registered sink (see jsonl_sink).
+
+Profiling is opt-in: set BANK_ANALYZER_PROFILE=cprofile (or pyinstrument) and
+each tracked record also writes a profile to BANK_ANALYZER_PROFILE_DIR.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "BANK_ANALYZER_PROFILE"
+PROFILE_DIR_ENV = "BANK_ANALYZER_PROFILE_DIR"
+
+_current = contextvars.ContextVar("bank_analyzer_metrics", default=None)
+_sinks = {}
+_sinks_lock = threading.Lock()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Records and stages
+# ──────────────────────────────────────────────────────────────────────────────
+def begin(kind: str, name: str) -> dict:
+    """Opens a record and makes it current; pair with end()."""
+    rec = {
+        "kind": kind,
+        "name": name,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "stages": {},
+        "calls": {},
+        "counts": {},
+        "total_s": None,
+    }
+    outermost = _current.get() is None
+    rec["_t0"] = time.perf_counter()
+    rec["_token"] = _current.set(rec)
+    # only the outermost record profiles; nested profilers are not supported by cProfile
+    rec["_profiler"] = _start_profiler() if outermost else None
+    return rec
+
+
+def end(rec: dict, emit_record: bool = False) -> dict:
+    """Closes a record opened by begin(); optionally emits it to the sinks."""
+    rec["total_s"] = round(time.perf_counter() - rec.pop("_t0"), 6)
+    profiler = rec.pop("_profiler", None)
+    if profiler is not None:
+        rec["profile"] = _stop_profiler(profiler, rec)
+    token = rec.pop("_token", None)
+    if token is not None:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # ended from another context (e.g. a later Streamlit rerun); just detach
+            _current.set(None)
+    if emit_record:
+        emit(rec)
+    return rec
+
+
+@contextmanager
+def track(kind: str, name: str, emit_record: bool = False):
+    rec = begin(kind, name)
+    try:
+        yield rec
+    finally:
+        end(rec, emit_record=emit_record)
+
+
+@contextmanager
+def stage(name: str):
+    """Adds the block's wall time to the current record (accumulates over repeated calls)."""
+    rec = _current.get()
+    if rec is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec["stages"][name] = round(rec["stages"].get(name, 0.0) + time.perf_counter() - t0, 6)
+        rec["calls"][name] = rec["calls"].get(name, 0) + 1
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def count(name: str, value):
+    rec = _current.get()
+    if rec is not None:
+        rec["counts"][name] = value
+
+
+def current():
+    return _current.get()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Sinks
+# ──────────────────────────────────────────────────────────────────────────────
+def register_sink(name: str, fn):
+    """Registers fn(record) under name; registering the same name again replaces it."""
+    with _sinks_lock:
+        _sinks[name] = fn
+
+
+def unregister_sink(name: str):
+    with _sinks_lock:
+        _sinks.pop(name, None)
+
+
+def emit(rec: dict):
+    with _sinks_lock:
+        sinks = list(_sinks.values())
+    for fn in sinks:
+        try:
+            fn(rec)
+        except Exception:
+            logger.exception("Metrics sink failed")
+
+
+def jsonl_sink(path: str):
+    """Sink appending one JSON line per record to path."""
+    lock = threading.Lock()
+
+    def write(rec):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        line = json.dumps(rec, default=str)
+        with lock, open(path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+    return write
+
+
+def flatten(rec: dict) -> dict:
+    """One flat row per record (stage times as columns), for tables and DataFrames."""
+    row = {"kind": rec.get("kind"), "name": rec.get("name"), "total_s": rec.get("total_s")}
+    row.update(rec.get("counts", {}))
+    row.update({f"{k}_s": v for k, v in rec.get("stages", {}).items()})
+    return row
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Profiling hook
+# ──────────────────────────────────────────────────────────────────────────────
+def configure_profiling(kind: str = None, out_dir: str = None):
+    """Enables (kind='cprofile' or 'pyinstrument') or disables (kind=None) profiling for tracked records."""
+    if kind:
+        os.environ[PROFILE_ENV] = kind
+    else:
+        os.environ.pop(PROFILE_ENV, None)
+    if out_dir:
+        os.environ[PROFILE_DIR_ENV] = out_dir
+
+
+def _start_profiler():
+    kind = (os.environ.get(PROFILE_ENV) or "").lower()
+    if not kind:
+        return None
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; falling back to cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return ("pyinstrument", profiler)
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return ("cprofile", profiler)
+
+
+def _stop_profiler(profiler, rec: dict):
+    kind, prof = profiler
+    out_dir = os.environ.get(PROFILE_DIR_ENV) or os.path.join(os.getcwd(), "profiles")
+    os.makedirs(out_dir, exist_ok=True)
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{rec['kind']}_{os.path.basename(str(rec['name']))}")
+    stem = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    if kind == "pyinstrument":
+        prof.stop()
+        path = os.path.join(out_dir, stem + ".html")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(prof.output_html())
+    else:
+        prof.disable()
+        path = os.path.join(out_dir, stem + ".prof")
+        prof.dump_stats(path)
+    return path
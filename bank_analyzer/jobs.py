@@ -0,0 +1,193 @@
+"""
+Background analysis jobs.
+
+An AnalysisJob parses its files on a worker thread (fanning out to a process
+pool when workers > 1) and publishes each file's result as soon as that file
+is done, so a UI can poll it on every rerun and show partial totals while the
+rest of the batch is still parsing:
+
+    job = AnalysisJob(paths, account_password=user).start()
+    ...
+    done, total = job.progress()
+    rows, aggregated = job.aggregate()      # files finished so far, input order
+
+cancel() stops after the file(s) in flight; finished results are kept and
+resume() parses only the files that are still pending. Results and metrics
+have the same shape as parse_many_pdfs.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import instrument, parse_cache
+from .parsing import _batch_worker_args, _empty_totals, _mark_batch_worker, _parse_file_safely, aggregate_results
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+CANCELLING = "cancelling"
+CANCELLED = "cancelled"
+DONE = "done"
+FAILED = "failed"
+
+# how often a pool-backed run re-checks the cancel flag while files are in flight
+_POLL_S = 0.2
+
+
+class AnalysisJob:
+    """One batch of statements parsed in the background; safe to poll from any thread."""
+
+    def __init__(self, filepaths, account_password: str, workers: int = 1, name: str = "analysis"):
+        self.filepaths = list(filepaths)
+        self.account_password = account_password
+        self.workers = workers
+        self.name = name
+        self.status = PENDING
+        self.error = None
+        self.current = None
+        self.version = 0
+        self.run_metrics = []
+        self._results = {}
+        self._order = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread = None
+
+    # ── control ──────────────────────────────────────────────────────────────
+    def start(self):
+        """Starts (or resumes) parsing the pending files; no-op while already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            if not self._pending_locked():
+                self.status = DONE
+                return self
+            self._cancel.clear()
+            self.status = RUNNING
+            self.error = None
+            self._thread = threading.Thread(target=self._run, name=f"analysis-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    resume = start
+
+    def cancel(self):
+        """Asks the job to stop after the file(s) currently being parsed."""
+        self._cancel.set()
+        with self._lock:
+            if self.status == RUNNING:
+                self.status = CANCELLING
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the worker thread exits; False on timeout."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    # ── polling ──────────────────────────────────────────────────────────────
+    @property
+    def active(self) -> bool:
+        return self.status in (RUNNING, CANCELLING)
+
+    def progress(self):
+        """(files done, files total)."""
+        with self._lock:
+            return len(self._results), len(self.filepaths)
+
+    def pending(self) -> list:
+        with self._lock:
+            return self._pending_locked()
+
+    def completed(self) -> list:
+        """[(path, rows, printed_totals)] for finished files, in completion order."""
+        with self._lock:
+            return [(self.filepaths[i],) + self._results[i] for i in self._order]
+
+    def aggregate(self):
+        """(all_rows, aggregated) over the files finished so far, in input order (see parse_many_pdfs)."""
+        with self._lock:
+            done = sorted(self._results)
+            results = [self._results[i] for i in done]
+        return aggregate_results([self.filepaths[i] for i in done], results, emit_metrics=False)
+
+    # ── worker ───────────────────────────────────────────────────────────────
+    def _pending_locked(self) -> list:
+        return [i for i in range(len(self.filepaths)) if i not in self._results]
+
+    def _publish(self, idx: int, result):
+        printed = result[1]
+        if printed and printed.get("metrics"):
+            instrument.emit(printed["metrics"])
+        with self._lock:
+            self._results[idx] = result
+            self._order.append(idx)
+            self.version += 1
+
+    def _run(self):
+        rec = instrument.begin("analysis", self.name)
+        final = DONE
+        try:
+            todo = self.pending()
+            if self.workers and self.workers > 1 and len(todo) > 1:
+                self._run_pool(todo)
+            else:
+                self._run_serial(todo)
+            if self._cancel.is_set() and self.pending():
+                final = CANCELLED
+        except Exception as e:
+            logger.exception("Analysis job %s failed", self.name)
+            self.error = str(e)
+            final = FAILED
+        finally:
+            instrument.count("files", len(self._results))
+            instrument.end(rec, emit_record=True)
+            with self._lock:
+                self.run_metrics.append(rec)
+                self.current = None
+                self.status = final
+
+    def _run_serial(self, todo):
+        for idx in todo:
+            if self._cancel.is_set():
+                return
+            self.current = os.path.basename(self.filepaths[idx])
+            self._publish(idx, parse_cache.parse(self.filepaths[idx], self.account_password))
+
+    def _run_pool(self, todo):
+        # files parsed earlier in this process need no worker
+        for idx in list(todo):
+            hit = parse_cache.lookup(self.filepaths[idx], self.account_password)
+            if hit is not None:
+                self._publish(idx, hit)
+                todo.remove(idx)
+        # spawn: forking the multi-threaded Streamlit server is not safe
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_mark_batch_worker,
+                                 initargs=_batch_worker_args(),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_parse_file_safely, self.filepaths[i], self.account_password): i for i in todo}
+            remaining = set(futures)
+            while remaining:
+                if self._cancel.is_set():
+                    # queued files are dropped; files already in a worker still finish and are kept
+                    for fut in remaining:
+                        fut.cancel()
+                    remaining = {f for f in remaining if not f.cancelled()}
+                    if not remaining:
+                        break
+                finished, remaining = wait(remaining, timeout=_POLL_S, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    idx = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        # worker process died (e.g. out of memory) — report it like any other failure
+                        result = ([], _empty_totals("error", f"{os.path.basename(self.filepaths[idx])}: {e}"))
+                    parse_cache.store(self.filepaths[idx], self.account_password, result)
+                    self._publish(idx, result)
+                self.current = f"{len(remaining)} file(s) in progress" if remaining else None
+
@@ -0,0 +1,73 @@
+"""
+Search, sort and pagination over a user's saved statements for the File Manager.
+
+The sidebar renders one page of the library as a table instead of a widget
+group per file, so what it builds per rerun no longer grows with the number of
+statements:
+
+    rows, page, pages, matched = library.view(get_saved_pdfs(user), names, "hdfc", "Name A–Z", page=2)
+
+items are get_saved_pdfs() dicts; names maps a file id to its display name in
+this session (files without one show their saved filename).
+relabel_sources() applies renames to the Source File column of analyzed rows.
+"""
+PAGE_SIZE = 20
+
+# label -> (sort key of (item, display name), descending)
+SORTS = {
+    "Newest first": (lambda item, name: item["uploaded_at"], True),
+    "Oldest first": (lambda item, name: item["uploaded_at"], False),
+    "Name A–Z": (lambda item, name: name.casefold(), False),
+    "Name Z–A": (lambda item, name: name.casefold(), True),
+}
+
+
+def display_name(item: dict, names: dict) -> str:
+    return names.get(item["id"], item["filename"])
+
+
+def search(items: list, names: dict, query: str) -> list:
+    """Items whose display name contains every word of query, ignoring case."""
+    words = query.casefold().split()
+    if not words:
+        return list(items)
+    return [i for i in items if all(w in display_name(i, names).casefold() for w in words)]
+
+
+def view(items: list, names: dict, query: str = "", sort: str = "Newest first", page: int = 1,
+         page_size: int = PAGE_SIZE):
+    """
+    (page items, page, pages, matched): one page of matched, the items matching
+    query in sort order. page is clamped to the pages there are (at least 1, for
+    an empty result).
+    """
+    key, descending = SORTS[sort]
+    matched = search(items, names, query)
+    matched.sort(key=lambda i: key(i, display_name(i, names)), reverse=descending)
+    pages = max(1, -(-len(matched) // page_size))
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return matched[start:start + page_size], page, pages, matched
+
+
+def relabel_sources(df, renames):
+    """
+    df with Source File relabeled by renames ({old name: new name}), in place. Only
+    the categories are renamed (or, when a file takes another's name, the integer
+    codes remapped); no row's text is compared or rewritten.
+    """
+    import numpy as np
+    import pandas as pd
+
+    source = df["Source File"]
+    if not isinstance(source.dtype, pd.CategoricalDtype):
+        source = source.astype("category")
+    relabeled = pd.Index([renames.get(c, c) for c in source.cat.categories])
+    if relabeled.is_unique:
+        df["Source File"] = source.cat.rename_categories(relabeled)
+    else:
+        # renamed to another file's name: both categories become one; code -1 (missing) stays -1
+        merged = relabeled.unique()
+        recode = np.append(merged.get_indexer(relabeled), -1)
+        df["Source File"] = pd.Categorical.from_codes(recode[source.cat.codes.to_numpy()], categories=merged)
+    return df
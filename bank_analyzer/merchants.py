@@ -0,0 +1,142 @@
+"""
+Merchant normalization.
+
+Remarks carry reference numbers, dates, UPI handles and bank prefixes, so one
+merchant shows up under thousands of distinct strings:
+
+    UPI/DR/412345678901/NETFLIX/YESB/netflix@ybl/Payment   ->  NETFLIX
+    POS 4591XXXXXXXX1234 DMART STORE 12/03                 ->  DMART STORE
+
+normalize() reduces a remark to a canonical merchant name. merchant_ids()
+maps a column of remarks to small integer merchant ids through a dictionary
+persisted in the app database and shared by every session of the process:
+each distinct remark is normalized once for the whole library, and
+per-merchant aggregations group on an int32 key instead of the raw strings.
+
+    df["Merchant ID"] = merchants.merchant_ids(df["Remarks"])
+    names = merchants.merchant_names(summary.index)
+
+Remarks with nothing identifying left all share the UNKNOWN merchant's id;
+known() masks them out of per-merchant aggregations, where they would
+otherwise add up to one large fictitious merchant.
+
+Bump NORMALIZER_VERSION whenever normalize() changes; stored mappings of
+older versions are then recomputed on first use.
+"""
+import re
+import sys
+import threading
+
+NORMALIZER_VERSION = 1
+# words of the cleaned remark kept as the merchant name
+MAX_WORDS = 3
+UNKNOWN = "UNKNOWN"
+
+# transfer rails and narration prefixes banks put in front of the counterparty
+_PREFIXES = {
+    "UPI", "IMPS", "NEFT", "RTGS", "POS", "ATW", "ATM", "ACH", "NACH", "ECS", "BIL", "ONL", "MMT", "INF", "INFT",
+    "TPT", "IB", "MB", "VPS", "VIN", "PCD", "CMS", "EBA", "BY", "TO", "FROM", "DR", "CR", "P2M", "P2A", "MOB",
+}
+# IFSC bank codes and filler words that never identify a merchant
+_NOISE = {
+    "YESB", "HDFC", "ICIC", "SBIN", "UTIB", "KKBK", "PUNB", "BARB", "IDIB", "CNRB", "IBKL", "INDB", "FDRL", "PYTM",
+    "AIRP", "UBIN", "PAYMENT", "PAYMENTS", "PVT", "LTD", "LIMITED", "PRIVATE", "COM", "WWW", "IN", "CO", "REF", "TXN",
+    "NO", "ID", "UPIINTENT", "COLLECT", "REQUEST",
+}
+_SEPARATORS = re.compile(r"[\s/|\\,:;()\[\]*#.\-_&'+\"]+")
+
+_lock = threading.Lock()
+_loaded = False
+_remark_ids = {}
+_names = {}
+_name_ids = {}
+
+
+def normalize(remark) -> str:
+    """Canonical merchant name of one remark (UNKNOWN when nothing identifying is left)."""
+    words = []
+    for token in _SEPARATORS.split(str(remark).upper()):
+        if "@" in token:
+            # UPI handle: keep the name part, drop the bank suffix
+            token = token.split("@", 1)[0]
+        if len(token) < 2 or any(ch.isdigit() for ch in token) or token in _NOISE:
+            continue
+        if not words and token in _PREFIXES:
+            continue
+        if token not in words:
+            words.append(token)
+        if len(words) == MAX_WORDS:
+            break
+    return " ".join(words) if words else UNKNOWN
+
+
+def _load(conn):
+    global _loaded
+    for mid, name in conn.execute("SELECT id, name FROM merchants"):
+        name = sys.intern(name)
+        _names[mid] = name
+        _name_ids[name] = mid
+    for remark, mid in conn.execute("SELECT remark, merchant_id FROM merchant_remarks WHERE version=?",
+                                    (NORMALIZER_VERSION,)):
+        _remark_ids[sys.intern(remark)] = mid
+    _loaded = True
+
+
+def _index(conn, remarks):
+    """Normalizes remarks new to the dictionary, stores them and their merchants."""
+    normalized = {sys.intern(r): sys.intern(normalize(r)) for r in remarks}
+    new_names = {n for n in normalized.values() if n not in _name_ids}
+    if new_names:
+        conn.executemany("INSERT OR IGNORE INTO merchants (name) VALUES (?)", [(n,) for n in new_names])
+        # ids come from the database, so other processes sharing it agree on them
+        for mid, name in conn.execute("SELECT id, name FROM merchants"):
+            if mid not in _names:
+                name = sys.intern(name)
+                _names[mid] = name
+                _name_ids[name] = mid
+    conn.executemany(
+        "INSERT OR REPLACE INTO merchant_remarks (remark, merchant_id, version) VALUES (?, ?, ?)",
+        [(r, _name_ids[n], NORMALIZER_VERSION) for r, n in normalized.items()]
+    )
+    conn.commit()
+    for r, n in normalized.items():
+        _remark_ids[r] = _name_ids[n]
+
+
+def merchant_ids(remarks):
+    """int32 merchant id per remark, as a Series aligned with remarks."""
+    import numpy as np
+    import pandas as pd
+
+    from .db import get_db
+
+    codes, uniques = pd.factorize(remarks.astype(str))
+    with _lock:
+        if not _loaded or any(u not in _remark_ids for u in uniques):
+            conn = get_db()
+            try:
+                if not _loaded:
+                    _load(conn)
+                missing = [u for u in uniques if u not in _remark_ids]
+                if missing:
+                    _index(conn, missing)
+            finally:
+                conn.close()
+        ids = np.fromiter((_remark_ids[u] for u in uniques), dtype="int32", count=len(uniques))
+    return pd.Series(ids[codes], index=remarks.index, dtype="int32")
+
+
+def merchant_names(ids):
+    """Merchant name per id (any iterable of ids); a Series aligned with ids when ids is one."""
+    import pandas as pd
+
+    index = ids if isinstance(ids, pd.Index) else ids.index if isinstance(ids, pd.Series) else None
+    with _lock:
+        return pd.Series([_names.get(int(i), UNKNOWN) for i in ids], index=index, dtype=object)
+
+
+def known(ids):
+    """Boolean Series aligned with ids (a Series of merchant ids): False where the merchant is UNKNOWN."""
+    with _lock:
+        unknown = _name_ids.get(UNKNOWN, -1)
+    return ids != unknown
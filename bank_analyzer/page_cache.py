@@ -0,0 +1,287 @@
+"""
+Per-page extracted-text cache.
+
+pdfplumber text extraction dominates parse time and its output only changes
+when the PDF bytes or the extractor change, so page texts are cached on disk
+keyed on (file content hash, page number, extractor version). Parser changes
+then only re-run the regex stages.
+
+Each document is one file under the cache directory:
+
+    magic   b"BSPC"            4 bytes
+    format  uint16             FORMAT_VERSION
+    flags   uint16             bit 0: the PDF is encrypted; bit 1: the body is sealed
+    secret  32 bytes           password_secret() of the password that opened it (zeros if none)
+    count   uint32             number of pages
+    body    offsets (count + 1) uint64 byte offsets into the text blob,
+            then the UTF-8 page texts, concatenated
+
+Readers memory-map the file and decode only the pages asked for. Entries of
+encrypted PDFs are only served to callers presenting the same password, and
+their body is sealed: a 12-byte nonce, then the body encrypted with AES-GCM
+under a key derived from the server secret, the document and that password.
+Without the cryptography package encrypted PDFs are not cached. Secrets are
+HMACs under the server secret (BANK_ANALYZER_SECRET_KEY, else a key file
+generated in the data directory), so a copy of the cache alone gives no
+handle on a password.
+Other per-page extracts of a document (kind="table": the column-sliced table
+regions, see parsing.TABLE_LAYOUTS) are stored the same way next to its texts.
+"""
+import hashlib
+import hmac
+import logging
+import mmap
+import os
+import secrets
+import struct
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BSPC"
+FORMAT_VERSION = 2
+# Bump when extraction settings change in a way that alters page text
+EXTRACTOR_REVISION = "1"
+CACHE_DIR_ENV = "BANK_ANALYZER_PAGE_CACHE"
+SECRET_KEY_ENV = "BANK_ANALYZER_SECRET_KEY"
+SECRET_KEY_FILE = "secret.key"
+
+_HEADER = struct.Struct("<4sHH32sI")
+_FLAG_ENCRYPTED = 1
+_FLAG_SEALED = 2
+_NONCE_BYTES = 12
+_NO_SECRET = b"\0" * 32
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+_extractor_version = None
+_server_key = None
+_key_lock = threading.Lock()
+
+
+def extractor_version() -> str:
+    """pdfplumber/pdfminer versions plus our extraction revision, without importing pdfplumber."""
+    global _extractor_version
+    if _extractor_version is None:
+        from importlib.metadata import PackageNotFoundError, version
+
+        parts = []
+        for dist in ("pdfplumber", "pdfminer.six"):
+            try:
+                parts.append(f"{dist}-{version(dist)}")
+            except PackageNotFoundError:
+                parts.append(f"{dist}-unknown")
+        parts.append(f"rev{EXTRACTOR_REVISION}")
+        _extractor_version = "_".join(parts)
+    return _extractor_version
+
+
+def file_hash(path: str) -> str:
+    """sha256 of the file contents, memoized per (path, size, mtime) for this process."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+def server_key() -> bytes:
+    """
+    The server secret: from BANK_ANALYZER_SECRET_KEY when set (keep it outside the data
+    directory in production), else read from DATA_DIR/secret.key, created on first use.
+    """
+    global _server_key
+    with _key_lock:
+        if _server_key is None:
+            configured = os.environ.get(SECRET_KEY_ENV)
+            _server_key = hashlib.sha256(configured.encode()).digest() if configured else _key_file()
+        return _server_key
+
+
+def _key_file() -> bytes:
+    from .db import DATA_DIR
+
+    path = os.path.join(DATA_DIR, SECRET_KEY_FILE)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, "wb") as out:
+            out.write(secrets.token_bytes(32))
+    # a process racing the creator may find it still empty
+    for _ in range(50):
+        with open(path, "rb") as fh:
+            key = fh.read()
+        if len(key) == 32:
+            return key
+        time.sleep(0.01)
+    raise OSError(f"{path} does not hold a 32-byte key")
+
+
+def _keyed(purpose: bytes, digest: str, password) -> bytes:
+    message = b"\0".join((purpose, digest.encode(), (password or "").encode()))
+    return hmac.new(server_key(), message, hashlib.sha256).digest()
+
+
+def password_secret(password, digest: str) -> bytes:
+    """Secret recorded in a document's header for the password that opened it (zeros for none)."""
+    return _keyed(b"secret", digest, password) if password else _NO_SECRET
+
+
+def _aesgcm():
+    """cryptography's AESGCM, or None when the package is not installed."""
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        return None
+    return AESGCM
+
+
+def default_cache_dir() -> str:
+    from .db import DATA_DIR
+
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(DATA_DIR, "page_cache")
+
+
+class PageTextCache:
+    """Memory-mapped page text store; safe to share between threads and processes."""
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+
+    def _path(self, digest: str, kind: str = "pages") -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}_{extractor_version()}.{kind}")
+
+    def get(self, digest: str, password: str = None, pages=None, kind: str = "pages"):
+        """
+        Cached page texts for a document, or None on a miss.
+        pages: optional iterable of 1-based page numbers; default is every page.
+        """
+        path = self._path(digest, kind)
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            with fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, fmt, flags, secret, count = _HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or fmt != FORMAT_VERSION:
+                    return None
+                if flags & _FLAG_ENCRYPTED and not hmac.compare_digest(secret, password_secret(password, digest)):
+                    return None
+                if flags & _FLAG_SEALED:
+                    body = self._unseal(mm, digest, password)
+                    if body is None:
+                        return None
+                    return self._pages(body, 0, count, pages)
+                return self._pages(mm, _HEADER.size, count, pages)
+        except (ValueError, struct.error, OSError):
+            logger.warning("Ignoring unreadable page cache entry %s", path)
+            return None
+
+    @staticmethod
+    def _pages(buf, start: int, count: int, pages):
+        offsets = struct.unpack_from(f"<{count + 1}Q", buf, start)
+        base = start + 8 * (count + 1)
+        wanted = range(1, count + 1) if pages is None else pages
+        out = []
+        for n in wanted:
+            if not 1 <= n <= count:
+                return None
+            out.append(bytes(buf[base + offsets[n - 1]:base + offsets[n]]).decode("utf-8"))
+        return out
+
+    @staticmethod
+    def _unseal(mm, digest: str, password):
+        aesgcm = _aesgcm()
+        if aesgcm is None:
+            return None
+        from cryptography.exceptions import InvalidTag
+
+        nonce = mm[_HEADER.size:_HEADER.size + _NONCE_BYTES]
+        try:
+            return aesgcm(_keyed(b"seal", digest, password)).decrypt(
+                nonce, mm[_HEADER.size + _NONCE_BYTES:], mm[:_HEADER.size]
+            )
+        except InvalidTag:
+            return None
+
+    def encryption(self, digest: str):
+        """(encrypted, password secret) recorded for a document, or None when it is not cached."""
+        try:
+            with open(self._path(digest), "rb") as fh:
+                magic, fmt, flags, secret, _ = _HEADER.unpack(fh.read(_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            return None
+        return bool(flags & _FLAG_ENCRYPTED), secret
+
+    def put(self, digest: str, page_texts: list, encrypted: bool = False, password: str = None, kind: str = "pages"):
+        """
+        Stores all page texts of a document (atomically replaces any previous entry).
+        Texts of an encrypted PDF are sealed, or not stored without the cryptography package.
+        """
+        aesgcm = _aesgcm() if encrypted else None
+        if encrypted and aesgcm is None:
+            return
+        blobs = [(t or "").encode("utf-8") for t in page_texts]
+        offsets = [0]
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        body = struct.pack(f"<{len(offsets)}Q", *offsets) + b"".join(blobs)
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, _FLAG_ENCRYPTED | _FLAG_SEALED if encrypted else 0,
+            password_secret(password, digest) if encrypted else _NO_SECRET, len(blobs)
+        )
+        if encrypted:
+            nonce = secrets.token_bytes(_NONCE_BYTES)
+            body = nonce + aesgcm(_keyed(b"seal", digest, password)).encrypt(nonce, body, header)
+        path = self._path(digest, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(header)
+                out.write(body)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+
+_default_cache = None
+_enabled = os.environ.get(CACHE_DIR_ENV, "").lower() not in ("0", "off", "false")
+
+
+def get_cache():
+    """Process-wide cache, or None when caching is disabled."""
+    global _default_cache
+    if not _enabled:
+        return None
+    if _default_cache is None:
+        _default_cache = PageTextCache()
+    return _default_cache
+
+
+def configure(cache_dir: str = None, enabled: bool = True):
+    """Points the process-wide cache at cache_dir, or disables it."""
+    global _default_cache, _enabled
+    _enabled = enabled
+    _default_cache = PageTextCache(cache_dir) if enabled else None
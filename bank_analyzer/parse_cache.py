@@ -0,0 +1,225 @@
+"""
+Process-wide cache of parse results, shared by every session.
+
+Team accounts and users with several tabs open keep analyzing the same
+statements. A parse result depends only on the PDF's bytes, so results are
+kept in memory keyed by content hash and served to any session of the
+process instead of parsing the file again:
+
+    rows, printed = parse_cache.parse(path, password)
+
+Rows are handed out as fresh dicts stamped with the caller's own file name;
+display names and categories are applied per session on top of them, so
+nothing user-specific is shared. A result of an encrypted PDF is only served
+to callers presenting the password that opened it.
+
+Sessions acquire() the results they keep and release() them when done.
+Once the cache grows past MAX_BYTES the unreferenced results are evicted,
+least recently used first, and then, if that is not enough, referenced ones
+as well: a session keeps its own copy of its rows (see session_data), so
+holding a result only keeps it shareable and cannot pin the cache above
+its budget.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from . import instrument, page_cache
+
+MAX_BYTES_ENV = "BANK_ANALYZER_PARSE_CACHE_MB"
+MAX_BYTES = int(float(os.environ.get(MAX_BYTES_ENV) or 256) * 1024 * 1024)
+# a holder that has not acquired anything for this long is a session that ended without releasing
+HOLDER_TTL_S = 24 * 3600
+# rows sampled to estimate an entry's size
+_SIZE_SAMPLE = 50
+
+_lock = threading.Lock()
+# digest -> {"rows", "printed", "secret", "nbytes", "holders": {holder: last acquire}}; least recently used first
+_entries = OrderedDict()
+_inflight = {}
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _estimate(rows) -> int:
+    if not rows:
+        return 0
+    sample = rows[:_SIZE_SAMPLE]
+    per_row = sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r.values()) for r in sample) / len(sample)
+    return int(per_row * len(rows))
+
+
+def _required_secret(digest, password, opened=None):
+    """
+    Password secret a result must be served under, or None when anyone presenting
+    the bytes may have it: the PDF is not encrypted, or it opens without a password
+    (owner password only). How the PDF was opened comes from the parse itself
+    (opened, see parsing._parse_file_safely), else from this process's open
+    strategies or the page cache; None when none of them recorded it.
+    """
+    from .parsing import open_strategy
+
+    recorded = opened or open_strategy(digest)
+    if recorded is None and page_cache.get_cache() is not None:
+        recorded = page_cache.get_cache().encryption(digest)
+    if recorded is None:
+        return None
+    encrypted, secret = recorded
+    if not encrypted or secret == page_cache.password_secret(None, digest):
+        return None
+    return secret
+
+
+def _hit(filepath, entry):
+    name = os.path.basename(filepath)
+    with instrument.track("file", name) as rec:
+        rows = [{**r, "Source File": name} for r in entry["rows"]]
+        instrument.count("rows", len(rows))
+        instrument.count("parse_cache_hit", True)
+    printed = dict(entry["printed"], metrics=rec)
+    return rows, printed
+
+
+def lookup(filepath: str, account_password: str = None):
+    """(rows, printed_totals) of an identical file parsed earlier in this process, else None."""
+    try:
+        digest = page_cache.file_hash(filepath)
+    except OSError:
+        return None
+    with _lock:
+        entry = _entries.get(digest)
+        if entry is None or entry["secret"] not in (None, page_cache.password_secret(account_password, digest)):
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(digest)
+        _stats["hits"] += 1
+    return _hit(filepath, entry)
+
+
+def store(filepath: str, account_password: str, result):
+    """Keeps a parse result of filepath for other callers; failed parses are not kept."""
+    global _size
+    rows, printed = result
+    # how the parse opened the file; not part of the result handed out
+    opened = printed.pop("encryption", None) if printed else None
+    if not printed or printed.get("status"):
+        return
+    try:
+        digest = page_cache.file_hash(filepath)
+    except OSError:
+        return
+    printed = {k: v for k, v in printed.items() if k != "metrics"}
+    printed["content_hash"] = digest
+    result[1]["content_hash"] = digest
+    entry = {
+        # a private copy: callers may add columns to the rows they were given
+        "rows": [dict(r) for r in rows],
+        "printed": printed,
+        "secret": _required_secret(digest, account_password, opened),
+        "nbytes": _estimate(rows),
+        "holders": {},
+    }
+    with _lock:
+        old = _entries.pop(digest, None)
+        if old is not None:
+            _size -= old["nbytes"]
+            entry["holders"] = old["holders"]
+        _entries[digest] = entry
+        _size += entry["nbytes"]
+        _evict_locked()
+
+
+def parse(filepath: str, account_password: str = None):
+    """
+    (rows, printed_totals) as parsing._parse_file_safely returns them, from the cache
+    when an identical file was parsed before; concurrent callers of the same file
+    wait for one parse. printed_totals["content_hash"] names the cache entry.
+    """
+    from .parsing import _parse_file_safely
+
+    while True:
+        hit = lookup(filepath, account_password)
+        if hit is not None:
+            return hit
+        try:
+            digest = page_cache.file_hash(filepath)
+        except OSError:
+            return _parse_file_safely(filepath, account_password)
+        with _lock:
+            running = _inflight.get(digest)
+            if running is None:
+                running = _inflight[digest] = threading.Event()
+                break
+        # another thread is parsing the same bytes; its result may serve this caller too
+        running.wait()
+    try:
+        result = _parse_file_safely(filepath, account_password)
+        store(filepath, account_password, result)
+        return result
+    finally:
+        with _lock:
+            _inflight.pop(digest, None)
+        running.set()
+
+
+def acquire(digest: str, holder: str):
+    """Marks the entry digest as in use by holder (e.g. a session); it is evicted after unheld entries."""
+    with _lock:
+        entry = _entries.get(digest)
+        if entry is not None:
+            entry["holders"][holder] = time.monotonic()
+
+
+def release(digest: str, holder: str):
+    with _lock:
+        entry = _entries.get(digest)
+        if entry is not None:
+            entry["holders"].pop(holder, None)
+        _evict_locked()
+
+
+def release_all(holder: str):
+    """Drops every reference of holder, e.g. when its session logs out."""
+    with _lock:
+        for entry in _entries.values():
+            entry["holders"].pop(holder, None)
+        _evict_locked()
+
+
+def _evict_locked():
+    global _size
+    if _size <= MAX_BYTES:
+        return
+    now = time.monotonic()
+    for evict_held in (False, True):
+        for digest in list(_entries):
+            if _size <= MAX_BYTES:
+                return
+            entry = _entries[digest]
+            for holder in [h for h, seen in entry["holders"].items() if now - seen > HOLDER_TTL_S]:
+                del entry["holders"][holder]
+            if evict_held or not entry["holders"]:
+                del _entries[digest]
+                _size -= entry["nbytes"]
+                _stats["evictions"] += 1
+
+
+def clear():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
+
+
+def usage() -> dict:
+    """Size, limit and hit counters, for diagnostics."""
+    with _lock:
+        return {
+            "bytes": _size,
+            "max_bytes": MAX_BYTES,
+            "entries": len(_entries),
+            "held": sum(1 for e in _entries.values() if e["holders"]),
+            **_stats,
+        }
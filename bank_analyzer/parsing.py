@@ -0,0 +1,1304 @@
+"""
+PDF statement parsing: page text extraction, column-table reading of statements
+with debit/credit columns, HDFC delta inference, legacy IDBI/Axis/ADCB regex
+parsing, printed summary extraction and balance-chain reconciliation.
+"""
+import logging
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import instrument, page_cache, parse_cache
+
+# numpy, pandas and pdfplumber are imported inside the functions that need them so
+# that importing this module (UI startup, CLI, worker processes) stays cheap.
+
+logger = logging.getLogger(__name__)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# PDF parsing
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Helper regexes for delta-based HDFC parsing
+DATE_LINE_RE = re.compile(r"^\s*(\d{2}/\d{2}/\d{2}(?:\d{2})?|\d{2}/\d{2}/\d{4})\b")
+NUM_RE = re.compile(r"[\d,]+\.\d{2}")
+
+# Intra-document parallelism: a PDF with at least PAGES_PER_WORKER * 2 pages is split into
+# contiguous page ranges extracted by separate processes that each open the file themselves.
+PAGES_PER_WORKER = 25
+PAGE_WORKERS_ENV = "BANK_ANALYZER_PAGE_WORKERS"
+_page_workers = None
+_in_batch_worker = False
+
+def configure_page_workers(workers: int = None):
+    """Upper bound on processes used to extract one PDF (1 disables; None = CPU count)."""
+    global _page_workers
+    _page_workers = workers
+
+def _max_page_workers() -> int:
+    if _in_batch_worker:
+        # parse_many_pdfs already runs one file per process; don't oversubscribe
+        return 1
+    if _page_workers is not None:
+        return max(1, int(_page_workers))
+    env = os.environ.get(PAGE_WORKERS_ENV)
+    if env:
+        return max(1, int(env))
+    return os.cpu_count() or 1
+
+def _mark_batch_worker(page_cache_dir: str = None, page_cache_enabled: bool = True):
+    """Initializer of batch worker processes: spawned, they start with the page cache's defaults."""
+    global _in_batch_worker
+    _in_batch_worker = True
+    page_cache.configure(page_cache_dir, page_cache_enabled)
+
+def _batch_worker_args() -> tuple:
+    """initargs for _mark_batch_worker carrying this process's page cache configuration."""
+    cache = page_cache.get_cache()
+    return (cache.cache_dir, True) if cache is not None else (None, False)
+
+def _page_ranges(page_count: int, workers: int) -> list:
+    """Contiguous half-open [start, end) 0-based page ranges, as even as possible."""
+    base, extra = divmod(page_count, workers)
+    ranges, start = [], 0
+    for i in range(workers):
+        end = start + base + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def _extract_pages(pages, table=None):
+    """
+    (texts, tables, table) of pdfplumber pages. From the first page whose text shows
+    a TABLE_LAYOUTS header on, pages are also sliced into columns (see _table_page)
+    while their characters are parsed anyway; tables is None when no page was.
+    table: (layout name, column boundaries) as learned so far, passed in and returned.
+    """
+    texts, tables = [], []
+    for page in pages:
+        text = page.extract_text() or ""
+        texts.append(text)
+        if table is None:
+            name = table_layout([text])
+            if name is None:
+                tables.append("")
+                continue
+            table = (name, None)
+        boundaries, sliced = _table_page(page, TABLE_LAYOUTS[table[0]]["columns"], table[1])
+        table = (table[0], boundaries)
+        tables.append(sliced)
+    return texts, (tables if table is not None else None), table
+
+def _extract_page_range(pdf_path: str, password, start: int, end: int, table=None):
+    """Worker: opens the PDF independently and extracts pages [start, end)."""
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path, password=password, pages=list(range(start + 1, end + 1))) as pdf:
+        texts, tables, _ = _extract_pages(pdf.pages, table)
+        return texts, tables
+
+def _is_encrypted(pdf) -> bool:
+    return bool(getattr(pdf.doc, "encryption", None))
+
+def _extract_all_pages(pdf_path: str, password):
+    """
+    (page_texts, page_tables, encrypted) for one open attempt. Large documents are
+    extracted page-range-parallel; texts are stitched back in page order so Page numbers hold.
+    """
+    import multiprocessing
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path, password=password) as pdf:
+        encrypted = _is_encrypted(pdf)
+        page_count = len(pdf.pages)
+        workers = min(_max_page_workers(), page_count // PAGES_PER_WORKER)
+        if workers < 2:
+            texts, tables, _ = _extract_pages(pdf.pages)
+            return texts, tables, encrypted
+        # column boundaries of a header on the first page hold for every range
+        _, _, table = _extract_pages(pdf.pages[:1])
+
+    instrument.count("page_workers", workers)
+    ranges = _page_ranges(page_count, workers)
+    # spawn: forking the multi-threaded Streamlit server is not safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_extract_page_range, pdf_path, password, start, end, table) for start, end in ranges]
+        chunks = [f.result() for f in futures]
+    texts = [text for chunk, _ in chunks for text in chunk]
+    if all(tables is None for _, tables in chunks):
+        return texts, None, encrypted
+    tables = [sliced for chunk, chunk_tables in chunks for sliced in (chunk_tables or [""] * len(chunk))]
+    return texts, tables, encrypted
+
+# ── Opening encrypted PDFs ───────────────────────────────────────────────────
+# bytes at the end of the file searched first for the trailer's /Encrypt entry
+TRAILER_SCAN_BYTES = 64 * 1024
+
+class PdfPasswordError(Exception):
+    """The PDF is encrypted and neither the account password nor an empty password opens it."""
+
+# content hash -> (encrypted, page_cache.password_secret of the password that opened it), as page_cache records it
+_open_strategies = {}
+_open_lock = threading.Lock()
+
+def pdf_is_encrypted(pdf_path: str) -> bool:
+    """
+    Whether the PDF has an /Encrypt entry, found by a byte search of the trailer (or of a
+    linearized file's leading cross-reference stream) without parsing any object.
+    """
+    with open(pdf_path, "rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file; opening it reports the real problem
+            return False
+        with mm:
+            tail = max(0, len(mm) - TRAILER_SCAN_BYTES)
+            return mm.find(b"/Encrypt", tail) != -1 or mm.find(b"/Encrypt", 0, tail) != -1
+
+def _password_candidates(pdf_path: str, digest: str, account_password) -> list:
+    """
+    Passwords to open the PDF with, in order. Once a strategy worked for these bytes
+    (in this process, or recorded by the page cache) only that one is tried.
+    """
+    with _open_lock:
+        known = _open_strategies.get(digest)
+    if known is None and page_cache.get_cache() is not None:
+        known = page_cache.get_cache().encryption(digest)
+    if known is None:
+        with instrument.stage("detect_encryption"):
+            encrypted = pdf_is_encrypted(pdf_path)
+        if not encrypted:
+            return [None]
+        return [account_password, None] if account_password else [None]
+    encrypted, secret = known
+    if not encrypted or secret == page_cache.password_secret(None, digest):
+        return [None]
+    # it opens with a password; only the caller's own can be tried
+    return [account_password] if account_password else []
+
+def _remember_strategy(digest: str, encrypted: bool, password):
+    with _open_lock:
+        _open_strategies[digest] = (encrypted, page_cache.password_secret(password if encrypted else None, digest))
+
+def open_strategy(digest: str):
+    """(encrypted, password secret) of the bytes digest as this process opened them, or None."""
+    with _open_lock:
+        return _open_strategies.get(digest)
+
+def _is_password_error(exc) -> bool:
+    from pdfminer.pdfdocument import PDFPasswordIncorrect
+
+    # pdfplumber wraps pdfminer's errors
+    return isinstance(exc, PDFPasswordIncorrect) or any(isinstance(a, PDFPasswordIncorrect) for a in exc.args)
+
+def extract_pages_text(pdf_path: str, account_password: str = None) -> list:
+    """Page texts of a PDF (see extract_pages)."""
+    return extract_pages(pdf_path, account_password)[0]
+
+def extract_pages(pdf_path: str, account_password: str = None):
+    """
+    (page_texts, page_tables) of a PDF, served from the page text cache when this
+    file's bytes were already extracted by the same extractor version (see page_cache).
+    page_tables holds the column-sliced table region of each page (see _table_page),
+    or is None when the statement has no TABLE_LAYOUTS header or it was not cached.
+    Encryption is detected once per file; the PDF is then opened only with the
+    password that works for it. Raises PdfPasswordError when no candidate does.
+    """
+    digest = page_cache.file_hash(pdf_path)
+    candidates = _password_candidates(pdf_path, digest, account_password)
+    cache = page_cache.get_cache()
+    if cache is not None:
+        with instrument.stage("page_cache"):
+            for password in candidates:
+                cached = cache.get(digest, password)
+                if cached is not None:
+                    instrument.count("pages", len(cached))
+                    instrument.count("page_cache_hit", True)
+                    return cached, cache.get(digest, password, kind="table")
+
+    for password in candidates:
+        try:
+            with instrument.stage("extract_text"):
+                text_pages, table_pages, encrypted = _extract_all_pages(pdf_path, password)
+        except Exception as e:
+            if _is_password_error(e):
+                instrument.count("password_rejected", True)
+                continue
+            raise
+        _remember_strategy(digest, encrypted, password)
+        break
+    else:
+        raise PdfPasswordError(
+            f"{os.path.basename(pdf_path)} is password-protected and the account password does not open it"
+        )
+    instrument.count("pages", len(text_pages))
+
+    if cache is not None:
+        try:
+            cache.put(digest, text_pages, encrypted=encrypted, password=password)
+            if table_pages is not None:
+                cache.put(digest, table_pages, encrypted=encrypted, password=password, kind="table")
+        except OSError as e:
+            logger.warning("Could not write page cache for %s: %s", os.path.basename(pdf_path), e)
+    return text_pages, table_pages
+
+def parse_amount_and_balance_from_line(line: str):
+    nums = NUM_RE.findall(line)
+    if not nums:
+        return None, None
+    closing = float(nums[-1].replace(",", ""))
+    amount = float(nums[-2].replace(",", "")) if len(nums) >= 2 else None
+    return amount, closing
+
+def infer_types_by_delta(tx_records: list, opening_balance: float, tolerance: float = 0.6):
+    """
+    Infer Type for each tx_record using opening_balance and closing balances.
+    Returns list of dicts with inference_reason.
+    """
+    recs = []
+    prev_bal = opening_balance
+    for t in tx_records:
+        amt = float(t['Amount']) if t['Amount'] is not None else 0.0
+        new_bal = float(t['Balance'])
+        delta = round(new_bal - prev_bal, 2)
+        reason = None
+
+        # If delta equals +amount -> credit, if delta equals -amount -> debit
+        if abs(delta - amt) <= tolerance:
+            typ = "CR"
+            reason = "delta_matches_plus_amount"
+        elif abs(delta + amt) <= tolerance:
+            typ = "DR"
+            reason = "delta_matches_minus_amount"
+        else:
+            # fallback to textual tokens
+            if re.search(r"\b(CR|NEFT CR|NEFTCR|CREDIT|DEPOSIT|REFUND|INTEREST)\b", t['Remarks'], flags=re.I):
+                typ = "CR"; reason = "text_credit_token"
+            elif re.search(r"\b(ATW|POS|IMPS|UPI|WITHDRAWAL|ATM|DEBIT)\b", t['Remarks'], flags=re.I):
+                typ = "DR"; reason = "text_debit_token"
+            else:
+                typ = "CR" if delta > 0 else "DR"
+                reason = "delta_sign_fallback"
+
+        rec = {
+            "Date": t.get('Date', ''),
+            "Remarks": t.get('Remarks', ''),
+            "Amount": amt,
+            "Type": typ,
+            "Balance": new_bal,
+            "Page": t.get('Page', None),
+            "inference_reason": reason,
+            "delta": delta
+        }
+        recs.append(rec)
+        prev_bal = new_bal
+    return recs
+
+def _score_opening_for_records(opening, tx_records, tolerance=0.6, sample_size=6):
+    """
+    Runs infer_types_by_delta on a small sample and returns a score:
+    count of records where inference_reason indicates delta match.
+    """
+    sample = tx_records[:min(sample_size, len(tx_records))]
+    recs = infer_types_by_delta(sample, opening, tolerance=tolerance)
+    score = sum(1 for r in recs if r.get("inference_reason", "").startswith("delta_matches"))
+    return score
+
+# Summary extraction works page by page: keywords are located with literal searches and
+# the numbers after them are read with patterns anchored at that position, so no pattern
+# can backtrack across the document.
+SUMMARY_HEADER_RE = re.compile(r"STATEMENTSUMMARY|OpeningBalance|Debits", re.IGNORECASE)
+SUMMARY_COLUMNS = "OPENINGBALANCEDRCOUNTCRCOUNTDEBITSCREDITSCLOSINGBAL"
+OPENING_KEY_RE = re.compile(r"OpeningBalance", re.IGNORECASE)
+OPENING_VALUE_RE = re.compile(r"[:\s]*([\d,]+\.\d{2})")
+DEBITS_KEY_RE = re.compile(r"Debits", re.IGNORECASE)
+DEBITS_CREDITS_VALUE_RE = re.compile(r"[:\s]*([\d,]+\.\d{2})\s+Credits[:\s]*([\d,]+\.\d{2})", re.IGNORECASE)
+
+def _summary_pages(pages: list) -> list:
+    """Pages holding a summary header: first/last page when they have one, otherwise any page that does."""
+    if not pages:
+        return []
+    edges = sorted({0, len(pages) - 1})
+    found = [i for i in edges if SUMMARY_HEADER_RE.search(pages[i] or "")]
+    if found:
+        return [pages[i] for i in found]
+    return [pg for pg in pages[1:-1] if pg and SUMMARY_HEADER_RE.search(pg)]
+
+def _last_numbers(pages: list, count: int) -> list:
+    """Reverse scan for the last `count` amounts in the document; stops as soon as they are found."""
+    found = []
+    for pg in reversed(pages):
+        for ln in reversed((pg or "").splitlines()):
+            nums = NUM_RE.findall(ln)
+            if nums:
+                found[:0] = nums
+                if len(found) >= count:
+                    return found[-count:]
+    return found
+
+def _summary_table(page: str):
+    """HDFC STATEMENTSUMMARY block: column header line followed by a values line."""
+    lines = page.splitlines()
+    for idx, ln in enumerate(lines[:-1]):
+        if "".join(ln.split()).upper() != SUMMARY_COLUMNS:
+            continue
+        tokens = lines[idx + 1].split()
+        if len(tokens) < 6 or not (tokens[-5].isdigit() and tokens[-4].isdigit()):
+            continue
+        try:
+            return (
+                float("".join(tokens[:-5]).replace(",", "")),
+                float(tokens[-3].replace(",", "")),
+                float(tokens[-2].replace(",", "")),
+                float(tokens[-1].replace(",", "")),
+            )
+        except ValueError:
+            continue
+    return None
+
+def extract_statement_summary(pages):
+    """
+    Best-effort opening balance & printed summary values.
+    Accepts the list of page texts (a single string is treated as one page).
+    Returns (opening, printed_debits, printed_credits, printed_closing).
+    """
+    if isinstance(pages, str):
+        pages = [pages]
+    opening = None
+    printed_debits = None
+    printed_credits = None
+    printed_closing = None
+
+    header_pages = _summary_pages(pages)
+    if not header_pages:
+        return opening, printed_debits, printed_credits, printed_closing
+
+    for pg in header_pages:
+        table = _summary_table(pg)
+        if table:
+            return table
+
+    for pg in header_pages:
+        for key in OPENING_KEY_RE.finditer(pg):
+            m2 = OPENING_VALUE_RE.match(pg, key.end())
+            if not m2:
+                continue
+            opening = float(m2.group(1).replace(",", ""))
+            nums = _last_numbers(pages, 3)
+            if len(nums) >= 3:
+                printed_debits = float(nums[-3].replace(",", ""))
+                printed_credits = float(nums[-2].replace(",", ""))
+                printed_closing = float(nums[-1].replace(",", ""))
+            return opening, printed_debits, printed_credits, printed_closing
+
+    # HDFC sometimes lists "Debits" and "Credits" in a table - try to capture more generically
+    for pg in header_pages:
+        for key in DEBITS_KEY_RE.finditer(pg):
+            m3 = DEBITS_CREDITS_VALUE_RE.match(pg, key.end())
+            if not m3:
+                continue
+            printed_debits = float(m3.group(1).replace(",", ""))
+            printed_credits = float(m3.group(2).replace(",", ""))
+            nums = _last_numbers(pages, 1)
+            if nums:
+                printed_closing = float(nums[-1].replace(",", ""))
+            return opening, printed_debits, printed_credits, printed_closing
+
+    return opening, printed_debits, printed_credits, printed_closing
+
+# ── Table extraction ─────────────────────────────────────────────────────────
+# Statements that print debits and credits in separate columns are read from the page
+# geometry instead of text lines: the header row gives each column's x-span, words
+# are sliced into columns between the header and the footer, and every row comes out
+# typed, so no amount/balance guessing or delta inference is needed.
+# Header labels are listed left to right as (column role, label).
+TABLE_LAYOUTS = {
+    "HDFC": {
+        "columns": [("date", "Date"), ("remarks", "Narration"), ("ref", "Chq./Ref.No."), ("value_date", "ValueDt"),
+                    ("debit", "WithdrawalAmt."), ("credit", "DepositAmt."), ("balance", "ClosingBalance")],
+        "date_formats": ("%d/%m/%y", "%d/%m/%Y"),
+        "currency": "INR",
+    },
+    "ADCB": {
+        "columns": [("date", "Posting Date"), ("value_date", "Value Date"), ("remarks", "Description"), ("ref", "Ref"),
+                    ("debit", "Debit"), ("credit", "Credit"), ("balance", "Balance")],
+        "date_formats": ("%d/%m/%Y",),
+        "currency": "AED",
+    },
+}
+TABLE_FOOTER_RE = re.compile(r"STATEMENT\s*SUMMARY|END OF STATEMENT|PAGE \d+ OF \d+", re.IGNORECASE)
+# printed as the first body row by many layouts (ADCB among them); not a transaction
+TABLE_OPENING_RE = re.compile(r"OPENING\s*BALANCE", re.IGNORECASE)
+TABLE_DATE_RE = re.compile(r"^\d{2}/\d{2}/\d{2}(?:\d{2})?$")
+# words whose tops differ by less than this many points are on one line
+TABLE_LINE_TOLERANCE = 3
+
+def _squash(text: str) -> str:
+    return "".join(text.split()).upper()
+
+def table_layout(pages: list):
+    """Name of the TABLE_LAYOUTS entry whose header row appears in the page texts, else None."""
+    headers = {name: _squash(" ".join(label for _, label in layout["columns"]))
+               for name, layout in TABLE_LAYOUTS.items()}
+    for pg in pages:
+        for ln in (pg or "").splitlines():
+            squashed = _squash(ln)
+            for name, header in headers.items():
+                if header in squashed:
+                    return name
+    return None
+
+def _word_lines(words: list) -> list:
+    """extract_words output grouped into lines, top to bottom, each sorted left to right."""
+    lines = []
+    for w in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if lines and w["top"] - lines[-1][0]["top"] < TABLE_LINE_TOLERANCE:
+            lines[-1].append(w)
+        else:
+            lines.append([w])
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+def _column_boundaries(line: list, columns: list):
+    """
+    Column x-boundaries learned from a header line: the midpoints between adjacent
+    header labels. None when the line is not the header of these columns.
+    """
+    texts = [w["text"].upper() for w in line]
+    spans, pos = [], 0
+    for _, label in columns:
+        parts = label.upper().split()
+        while pos + len(parts) <= len(texts) and texts[pos:pos + len(parts)] != parts:
+            pos += 1
+        if pos + len(parts) > len(texts):
+            return None
+        spans.append((line[pos]["x0"], line[pos + len(parts) - 1]["x1"]))
+        pos += len(parts)
+    return [(left[1] + right[0]) / 2 for left, right in zip(spans, spans[1:])]
+
+def _table_page(page, columns: list, boundaries=None):
+    """
+    (boundaries, sliced) for one pdfplumber page: the lines between its header row (if
+    it repeats one) and its footer, one per line, with the words of each column joined
+    and the columns separated by tabs. Boundaries are learned from the first header row
+    seen and then kept; sliced is empty until they are known.
+    """
+    from bisect import bisect
+
+    lines = _word_lines(page.extract_words())
+    start = 0
+    for idx, line in enumerate(lines):
+        header = _column_boundaries(line, columns)
+        if header is not None:
+            boundaries = boundaries or header
+            start = idx + 1
+            break
+    if boundaries is None:
+        return None, ""
+    out = []
+    for line in lines[start:]:
+        text = " ".join(w["text"] for w in line)
+        if TABLE_FOOTER_RE.search(text):
+            break
+        if TABLE_OPENING_RE.search(text):
+            continue
+        cells = [[] for _ in columns]
+        for w in line:
+            cells[bisect(boundaries, (w["x0"] + w["x1"]) / 2)].append(w["text"])
+        out.append("\t".join(" ".join(cell) for cell in cells))
+    return boundaries, "\n".join(out)
+
+def extract_table_pages(pdf_path: str, account_password: str, layout_name: str) -> list:
+    """
+    Column-sliced pages of a statement whose page texts came from a cache entry
+    written without them; stored next to the texts for the next time.
+    """
+    import pdfplumber
+
+    digest = page_cache.file_hash(pdf_path)
+    columns = TABLE_LAYOUTS[layout_name]["columns"]
+    # the password that opened the texts is remembered, so this is normally one attempt
+    for password in _password_candidates(pdf_path, digest, account_password):
+        boundaries, tables = None, []
+        try:
+            with pdfplumber.open(pdf_path, password=password) as pdf:
+                encrypted = _is_encrypted(pdf)
+                for page in pdf.pages:
+                    boundaries, sliced = _table_page(page, columns, boundaries)
+                    tables.append(sliced)
+        except Exception as e:
+            if _is_password_error(e):
+                continue
+            raise
+        _remember_strategy(digest, encrypted, password)
+        break
+    else:
+        raise PdfPasswordError(
+            f"{os.path.basename(pdf_path)} is password-protected and the account password does not open it"
+        )
+    cache = page_cache.get_cache()
+    if cache is not None:
+        try:
+            cache.put(digest, tables, encrypted=encrypted, password=password, kind="table")
+        except OSError as e:
+            logger.warning("Could not write page cache for %s: %s", os.path.basename(pdf_path), e)
+    return tables
+
+def _table_amount(text: str):
+    """Amount printed in a column; 0.0 for a blank cell, None when it is not a number."""
+    text = text.replace(",", "").strip()
+    if not text:
+        return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def table_rows(table_pages: list, layout_name: str, filepath: str) -> list:
+    """
+    Typed transaction rows of column-sliced pages: a line with a date in the date
+    column starts a transaction, a line with only narration continues the previous
+    one. Debit, credit and balance are read from their own columns.
+    """
+    import pandas as pd
+
+    layout = TABLE_LAYOUTS[layout_name]
+    roles = [role for role, _ in layout["columns"]]
+    cells = []
+    for page_num, sliced in enumerate(table_pages, start=1):
+        for ln in sliced.splitlines():
+            line = dict(zip(roles, ln.split("\t")))
+            filled = {role for role, text in line.items() if text}
+            if TABLE_DATE_RE.match(line.get("date", "")):
+                cells.append(dict(line, page=page_num))
+            elif cells and cells[-1]["page"] == page_num and filled and filled <= {"remarks", "ref"}:
+                # narration wrapped onto the next line
+                for role in filled:
+                    cells[-1][role] = f"{cells[-1][role]} {line[role]}".strip()
+
+    rows = []
+    name = os.path.basename(filepath)
+    for cell in cells:
+        debit, credit, balance = (_table_amount(cell.get(role, "")) for role in ("debit", "credit", "balance"))
+        if not cell.get("balance") or None in (debit, credit, balance) or debit == credit == 0:
+            continue
+        tx_type, amount = ("DR", debit) if debit > credit else ("CR", credit)
+        date = pd.NaT
+        for fmt in layout["date_formats"]:
+            date = pd.to_datetime(cell["date"], format=fmt, errors="coerce")
+            if not pd.isna(date):
+                break
+        rows.append({
+            "Date": date,
+            "Amount": amount,
+            "Type": tx_type,
+            "Balance": balance,
+            "Remarks": f"{cell.get('remarks', '')} {cell.get('ref', '')}".strip(),
+            "Source File": name,
+            "Currency": layout["currency"],
+            "inference_reason": "table_columns",
+            "Page": cell["page"]
+        })
+    return rows
+
+def _empty_totals(status: str, error: str = None) -> dict:
+    """printed_totals for a file that produced no rows; status says why."""
+    return {
+        "printed_credits": None,
+        "printed_debits": None,
+        "printed_closing": None,
+        "opening_balance": None,
+        "status": status,
+        "error": error
+    }
+
+# parse_pdf_file now returns (rows_list, printed_totals_dict)
+def parse_pdf_file(filepath: str, account_password: str):
+    """
+    Updated parser:
+    - Returns tuple: (rows_list, printed_totals_dict)
+      printed_totals_dict: {"printed_credits": float or None, "printed_debits": float or None, "printed_closing": float or None}
+    - For HDFC-style statements it extracts printed totals from summary when possible.
+    - For other banks it falls back to legacy parser but still attempts to extract printed totals.
+    """
+    import pandas as pd
+
+    try:
+        pages, table_pages = extract_pages(filepath, account_password)
+    except PdfPasswordError as e:
+        logger.error("Wrong password for PDF: %s", os.path.basename(filepath))
+        return [], _empty_totals("wrong_password", f"🔒 {e}")
+    except Exception as e:
+        logger.error("Failed to open PDF: %s — %s", os.path.basename(filepath), e)
+        return [], _empty_totals("open_failed", f"Failed to open PDF: {os.path.basename(filepath)} — {e}")
+
+    full_text = "\n\n".join(pages)
+    if not full_text.strip():
+        logger.warning("Could not extract text from %s", os.path.basename(filepath))
+        return [], _empty_totals("no_text", f"Could not extract text from {os.path.basename(filepath)}")
+
+    # Attempt to extract printed totals regardless (best-effort)
+    with instrument.stage("summary"):
+        opening_balance, printed_debits, printed_credits, printed_closing = extract_statement_summary(pages)
+    printed_totals = {
+        "printed_credits": printed_credits,
+        "printed_debits": printed_debits,
+        "printed_closing": printed_closing,
+        "opening_balance": opening_balance
+    }
+
+    # Statements with separate debit/credit columns are read from their page geometry
+    layout_name = table_layout(pages)
+    if layout_name:
+        with instrument.stage("table_extract"):
+            if table_pages is None:
+                table_pages = extract_table_pages(filepath, account_password, layout_name)
+            rows = table_rows(table_pages, layout_name, filepath)
+        if rows:
+            with instrument.stage("reconcile"):
+                rows, printed_totals["reconciliation"] = reconcile_rows(rows, opening_balance, printed_totals)
+            return rows, printed_totals
+
+    # Quick check: if file appears HDFC-like (header has 'ClosingBalance' or 'StatementSummary'), prefer delta approach
+    if ("ClosingBalance" in full_text or "STATEMENTSUMMARY" in full_text or "WithdrawalAmt." in full_text or "Debits" in full_text and "Credits" in full_text):
+        # Build transaction-like lines: lines starting with date token
+        tx_lines = []
+        with instrument.stage("line_matching"):
+            for p_idx, pg in enumerate(pages, start=1):
+                for ln in (pg.splitlines() if pg else []):
+                    ln_s = ln.strip()
+                    date_match = DATE_LINE_RE.match(ln_s)
+                    if date_match:
+                        tx_lines.append((p_idx, ln_s, date_match.group(1)))
+
+        # If no tx_lines found, fallback to legacy parser
+        if not tx_lines:
+            rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password, pages)
+            with instrument.stage("reconcile"):
+                rows, printed_totals["reconciliation"] = reconcile_rows(rows, opening_balance, printed_totals)
+            return rows, printed_totals
+
+        # Build tx_records with amount & closing
+        tx_records = []
+        with instrument.stage("line_matching"):
+            for idx, (page_num, raw_line, date_str) in enumerate(tx_lines):
+                amt, closing = parse_amount_and_balance_from_line(raw_line)
+                if closing is None:
+                    # Could be a header/footer line; skip
+                    continue
+                tx_records.append({
+                    "Date": date_str,
+                    "Remarks": raw_line,
+                    "Amount": float(amt) if amt is not None else 0.0,
+                    "Balance": float(closing),
+                    "Page": page_num
+                })
+
+        with instrument.stage("date_parsing"):
+            for rec in tx_records:
+                date_str = rec["Date"]
+                # try parse date to datetime if possible (handle dd/mm/yy and dd/mm/yyyy)
+                dt_val = None
+                for fmt in ("%d/%m/%y", "%d/%m/%Y"):
+                    try:
+                        dt_val = pd.to_datetime(date_str, format=fmt, errors='coerce')
+                        if not pd.isna(dt_val):
+                            break
+                    except Exception:
+                        dt_val = pd.to_datetime(date_str, errors='coerce')
+                rec["Date"] = dt_val
+
+        if not tx_records:
+            rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password, pages)
+            with instrument.stage("reconcile"):
+                rows, printed_totals["reconciliation"] = reconcile_rows(rows, opening_balance, printed_totals)
+            return rows, printed_totals
+
+        # If opening_balance not present, try to estimate robustly:
+        # Try both possible openings for first transaction:
+        # opening_a = first_closing + first_amount  (assumes first tx was debit)
+        # opening_b = first_closing - first_amount  (assumes first tx was credit)
+        first = tx_records[0]
+        first_closing = float(first['Balance'])
+        first_amt = float(first['Amount'])
+        candidate_openings = []
+        # Candidate A: assume first tx is debit -> opening = closing + amt
+        candidate_openings.append(("debit_assumption", first_closing + first_amt))
+        # Candidate B: assume first tx is credit -> opening = closing - amt
+        candidate_openings.append(("credit_assumption", first_closing - first_amt))
+
+        # if there is some externally extracted opening_balance, include as candidate
+        if opening_balance is not None:
+            candidate_openings.insert(0, ("extracted_opening", opening_balance))
+
+        # Score each candidate using first few records
+        best_opening = None
+        best_score = -1
+        with instrument.stage("opening_scoring"):
+            for name, op in candidate_openings:
+                try:
+                    score = _score_opening_for_records(op, tx_records, tolerance=0.6, sample_size=8)
+                except Exception:
+                    score = -1
+                if score > best_score:
+                    best_score = score
+                    best_opening = op
+
+        # If none produced a positive score, fallback to debit_assumption
+        if best_opening is None:
+            best_opening = first_closing + first_amt
+
+        # Now infer full recs using best_opening
+        with instrument.stage("infer_types_by_delta"):
+            recs = infer_types_by_delta(tx_records, best_opening, tolerance=0.6)
+
+        # Convert recs to expected output format
+        out = []
+        for r in recs:
+            dt = r.get("Date")
+            if isinstance(dt, pd.Timestamp):
+                date_val = dt
+            else:
+                try:
+                    date_val = pd.to_datetime(r.get("Date"), errors="coerce")
+                except Exception:
+                    date_val = pd.NaT
+            out.append({
+                "Date": date_val,
+                "Amount": float(r.get("Amount", 0.0)),
+                "Type": r.get("Type"),
+                "Balance": float(r.get("Balance", 0.0)),
+                "Remarks": r.get("Remarks", ""),
+                "Source File": os.path.basename(filepath),
+                "Currency": "INR",
+                "inference_reason": r.get("inference_reason", ""),
+                "Page": r.get("Page")
+            })
+
+        # Verify the whole chain; only broken segments are re-inferred
+        with instrument.stage("reconcile"):
+            out, recon = reconcile_rows(
+                out, best_opening, printed_totals,
+                candidate_openings=[op for _, op in candidate_openings]
+            )
+        printed_totals["reconciliation"] = recon
+        return out, printed_totals
+
+    else:
+        # If not HDFC-like, use legacy parser (keeps previous regex behavior for IDBI/Axis/ADCB)
+        rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password, pages)
+        with instrument.stage("reconcile"):
+            rows, recon = reconcile_rows(rows, opening_balance, printed_totals)
+        printed_totals["reconciliation"] = recon
+        return rows, printed_totals
+
+# Helper wrapper: return only rows (used by parse_pdf_file to call legacy)
+def _legacy_parse_pdf_file_return_only_rows(filepath: str, account_password: str, pages=None):
+    with instrument.stage("legacy_parse"):
+        rows = _legacy_parse_pdf_file(filepath, account_password, pages)
+    return rows
+
+# Original legacy parsing logic returns rows (kept mostly as-is; used as fallback)
+def _legacy_parse_pdf_file(filepath: str, account_password: str, pages=None):
+    import pandas as pd
+
+    # pages already extracted by the caller spare opening the PDF a second time
+    if pages is None:
+        try:
+            pages = extract_pages_text(filepath, account_password)
+        except Exception as e:
+            logger.error("Failed to open PDF: %s — %s", os.path.basename(filepath), e)
+            return []
+    text = "\n".join(pages)
+
+    if not text.strip():
+        logger.warning("Could not extract text from %s", os.path.basename(filepath))
+
+    lines = [ln.strip() for ln in text.split("\n") if ln.strip()]
+    data = []
+    last_balance = None
+    detected_bank = None
+
+    TX_PATTERN = r"^(\d{2}/\d{2}/\d{2})\s+(.+?)\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})$"
+    IDBI_PATTERN = r"^\d+\s+(\d{2}/\d{2}/\d{2})\s+\d{2}/\d{2}/\d{2}\s+(.+?)\s+(CR|DR)\s+INR\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})$"
+    AXIS_PATTERN = r"^(\d{2}-\d{2}-\d{4})\s+(.+?)\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})\s+(\d+)$"
+    ADCB_PATTERN = r"^(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([A-Z0-9\-/]+)\s+([\d,]+\.\d{1,2})\s+([\d,]+\.\d{1,2})\s+([\d,]+\.\d{1,2})$"
+
+    def clean_amt(s: str) -> float:
+        if not s:
+            return 0.0
+        s = re.sub(r"[^\d\.,\-]", "", s)
+        s = s.replace(",", "")
+        try:
+            return float(s)
+        except:
+            return 0.0
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        m1 = re.match(TX_PATTERN, line)
+        if m1:
+            date, remarks, amt_str, bal_str = m1.groups()
+            try:
+                amt_val = float(amt_str.replace(",", ""))
+            except:
+                amt_val = 0.0
+            try:
+                bal_val = float(bal_str.replace(",", ""))
+            except:
+                bal_val = None
+            tx_type = "DR"
+            if any(kw in remarks.upper() for kw in ["NEFT CR", "IMPS", "UPI", "CREDIT", "REFUND", "INTEREST"]):
+                tx_type = "CR"
+            data.append({
+                "Date": pd.to_datetime(date, format="%d/%m/%y", errors="coerce"),
+                "Amount": amt_val,
+                "Type": tx_type,
+                "Balance": bal_val,
+                "Remarks": remarks,
+                "Source File": os.path.basename(filepath),
+                "Currency": "INR"
+            })
+            last_balance = bal_val
+            i += 1
+            continue
+
+        m2 = re.match(IDBI_PATTERN, line)
+        if m2:
+            date, remarks, tx_type, amt_str, bal_str = m2.groups()
+            amt_val = float(amt_str.replace(",", ""))
+            bal_val = float(bal_str.replace(",", ""))
+            data.append({
+                "Date": pd.to_datetime(date, format="%d/%m/%y", errors="coerce"),
+                "Amount": amt_val,
+                "Type": tx_type,
+                "Balance": bal_val,
+                "Remarks": remarks,
+                "Source File": os.path.basename(filepath),
+                "Currency": "INR"
+            })
+            last_balance = bal_val
+            i += 1
+            continue
+
+        if (i + 1) < len(lines):
+            nxt = lines[i + 1]
+            m3 = re.match(AXIS_PATTERN, nxt)
+            if m3:
+                date, part2, amt_str, bal_str, br = m3.groups()
+                remarks = (line + " " + part2).strip()
+                amt_val = float(amt_str.replace(",", ""))
+                bal_val = float(bal_str.replace(",", ""))
+                tx_type = "CR" if bal_val > (last_balance or 0) else "DR"
+                data.append({
+                    "Date": pd.to_datetime(date, format="%d-%m-%Y", errors="coerce"),
+                    "Amount": amt_val,
+                    "Type": tx_type,
+                    "Balance": bal_val,
+                    "Remarks": remarks,
+                    "Source File": os.path.basename(filepath),
+                    "Currency": "INR"
+                })
+                last_balance = bal_val
+                i += 2
+                continue
+
+        m4 = re.match(ADCB_PATTERN, line)
+        if m4:
+            detected_bank = "ADCB"
+            post_date, value_date, desc, ref, debit_str, credit_str, bal_str = m4.groups()
+            debit_val = clean_amt(debit_str)
+            credit_val = clean_amt(credit_str)
+            bal_val = clean_amt(bal_str)
+
+            if credit_val > 0 and debit_val == 0:
+                amt_val = credit_val
+                tx_type = "CR"
+            elif debit_val > 0 and credit_val == 0:
+                amt_val = debit_val
+                tx_type = "DR"
+            else:
+                if credit_val >= debit_val:
+                    amt_val = credit_val
+                    tx_type = "CR"
+                else:
+                    amt_val = debit_val
+                    tx_type = "DR"
+
+            remarks = f"{desc} {ref}".strip()
+            data.append({
+                "Date": pd.to_datetime(post_date, format="%d/%m/%Y", errors="coerce"),
+                "Amount": amt_val,
+                "Type": tx_type,
+                "Balance": bal_val,
+                "Remarks": remarks,
+                "Source File": os.path.basename(filepath),
+                "Bank": detected_bank,
+                "Currency": "AED"
+            })
+            last_balance = bal_val
+            i += 1
+            continue
+
+        i += 1
+
+    return data
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Balance-chain reconciliation
+# ──────────────────────────────────────────────────────────────────────────────
+RECON_TOLERANCE = 0.6
+
+def verify_balance_chain(rows: list, opening_balance: float = None, tolerance: float = RECON_TOLERANCE):
+    """
+    Checks the running balance of one file's rows in a single vectorized pass.
+    Row i is consistent when Balance[i] - Balance[i-1] equals +Amount (CR) or -Amount (DR).
+    The first row is checked against opening_balance when known; rows without a
+    balance cannot be verified and are treated as consistent.
+    Returns (ok_mask, deltas, expected_deltas) as numpy arrays.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not rows:
+        empty = np.array([], dtype=float)
+        return np.array([], dtype=bool), empty, empty
+    frame = pd.DataFrame(rows, columns=["Amount", "Type", "Balance"])
+    amounts = pd.to_numeric(frame["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+    balances = pd.to_numeric(frame["Balance"], errors="coerce").to_numpy(dtype=float)
+    signs = np.where(frame["Type"].to_numpy() == "CR", 1.0, -1.0)
+
+    prev = np.empty_like(balances)
+    prev[0] = np.nan if opening_balance is None else float(opening_balance)
+    prev[1:] = balances[:-1]
+
+    deltas = np.round(balances - prev, 2)
+    expected = signs * amounts
+    ok = np.abs(deltas - expected) <= tolerance
+    ok[np.isnan(deltas)] = True
+    return ok, deltas, expected
+
+def find_chain_breaks(ok_mask) -> list:
+    """Groups consecutive inconsistent rows into half-open (start, end) segments."""
+    import numpy as np
+
+    bad = np.concatenate(([0], (~np.asarray(ok_mask, dtype=bool)).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(bad))
+    return [(int(s), int(e)) for s, e in zip(edges[::2], edges[1::2])]
+
+def _opening_candidates(rows: list) -> list:
+    """Openings the first row implies when it is a debit (closing + amount) or a credit (closing - amount)."""
+    if not rows:
+        return []
+    try:
+        closing, amount = float(rows[0]["Balance"]), float(rows[0]["Amount"])
+    except (KeyError, TypeError, ValueError):
+        return []
+    return [closing + amount, closing - amount]
+
+def _repair_opening_segment(rows: list, end: int, candidate_openings: list, tolerance: float):
+    """
+    Re-runs delta inference on the leading segment only, with every opening (the
+    current one, candidate_openings[0], included) so they are scored alike.
+    Returns the alternate opening that explains the most rows, or None if none
+    explains more than the current one.
+    """
+    segment = rows[:end]
+    best_opening, best_score, best_recs = None, -1, None
+    for idx, op in enumerate(candidate_openings):
+        recs = infer_types_by_delta(segment, op, tolerance=tolerance)
+        score = sum(1 for r in recs if r["inference_reason"].startswith("delta_matches"))
+        # ties keep the current opening
+        if score > best_score:
+            best_opening, best_score, best_recs = (op if idx else None), score, recs
+    if best_opening is None:
+        return None
+    for row, rec in zip(segment, best_recs):
+        row["Type"] = rec["Type"]
+        row["inference_reason"] = rec["inference_reason"]
+    return best_opening
+
+def _repair_row(row: dict, delta: float, tolerance: float):
+    """
+    Tries to explain a single broken row from its own text.
+    Returns the break kind: type_mismatch / amount_mismatch when repaired, missed_line otherwise.
+    """
+    amt = float(row.get("Amount") or 0.0)
+    if abs(abs(delta) - amt) <= tolerance:
+        row["Type"] = "CR" if delta > 0 else "DR"
+        row["inference_reason"] = "reconciled_type"
+        return "type_mismatch"
+    # Wrapped rows and remarks with decimals make the last-two-numbers guess pick the wrong amount
+    for tok in NUM_RE.findall(str(row.get("Remarks", ""))):
+        val = float(tok.replace(",", ""))
+        if val > 0 and abs(abs(delta) - val) <= tolerance:
+            row["Amount"] = val
+            row["Type"] = "CR" if delta > 0 else "DR"
+            row["inference_reason"] = "reconciled_amount"
+            return "amount_mismatch"
+    return "missed_line"
+
+def reconcile_rows(rows: list, opening_balance: float, printed_totals: dict,
+                   candidate_openings: list = None, tolerance: float = RECON_TOLERANCE):
+    """
+    Verifies and repairs one file's balance chain in place.
+    - Breaks in the leading segment re-try the alternate openings on that segment only
+      (candidate_openings, by default the two the first row implies; see _opening_candidates).
+    - Remaining breaks, leading ones included, are repaired from the row's own numbers
+      when possible, otherwise reported as missed lines with the unexplained gap.
+    Returns (rows, diagnostics) where diagnostics holds the breaks plus computed-vs-printed
+    debit, credit and closing deltas.
+    """
+    import pandas as pd
+
+    printed_totals = printed_totals or {}
+    if candidate_openings is None:
+        candidate_openings = _opening_candidates(rows)
+    openings = [opening_balance] + [op for op in candidate_openings if op != opening_balance]
+    breaks = []
+
+    ok, deltas, expected = verify_balance_chain(rows, opening_balance, tolerance)
+    segments = find_chain_breaks(ok)
+    if segments and segments[0][0] == 0 and opening_balance is not None:
+        end = segments[0][1]
+        gap = round(float(deltas[0] - expected[0]), 2)
+        new_opening = _repair_opening_segment(rows, end, openings, tolerance)
+        # when no alternate explains more, the leading rows are repaired one by one below
+        if new_opening is not None:
+            opening_balance = new_opening
+            ok, deltas, expected = verify_balance_chain(rows, opening_balance, tolerance)
+            segments = find_chain_breaks(ok)
+            breaks.append({
+                "row": 0,
+                "rows_affected": end,
+                "kind": "opening_mismatch",
+                "repaired": not (segments and segments[0][0] == 0),
+                "gap": gap,
+            })
+
+    for start, end in segments:
+        for i in range(start, end):
+            kind = _repair_row(rows[i], float(deltas[i]), tolerance)
+            breaks.append({
+                "row": i,
+                "rows_affected": 1,
+                "kind": kind,
+                "repaired": kind != "missed_line",
+                "gap": round(float(deltas[i] - expected[i]), 2),
+            })
+    for b in breaks:
+        b["page"] = rows[b["row"]].get("Page")
+        b["date"] = rows[b["row"]].get("Date")
+
+    ok, _, _ = verify_balance_chain(rows, opening_balance, tolerance)
+    unresolved = int((~ok).sum())
+
+    frame = pd.DataFrame(rows, columns=["Amount", "Type", "Balance"])
+    amounts = pd.to_numeric(frame["Amount"], errors="coerce").fillna(0.0)
+    computed_credits = float(amounts[frame["Type"] == "CR"].sum())
+    computed_debits = float(amounts[frame["Type"] == "DR"].sum())
+    balances = pd.to_numeric(frame["Balance"], errors="coerce").dropna()
+    computed_closing = float(balances.iloc[-1]) if not balances.empty else None
+
+    def _delta(printed, computed):
+        if printed is None or computed is None:
+            return None
+        return round(float(printed) - float(computed), 2)
+
+    diagnostics = {
+        "opening_balance": opening_balance,
+        "rows": len(rows),
+        "breaks": breaks,
+        "breaks_repaired": sum(1 for b in breaks if b["repaired"]),
+        "breaks_unresolved": unresolved,
+        "computed_credits": round(computed_credits, 2),
+        "computed_debits": round(computed_debits, 2),
+        "computed_closing": computed_closing,
+        "printed_credits": printed_totals.get("printed_credits"),
+        "printed_debits": printed_totals.get("printed_debits"),
+        "printed_closing": printed_totals.get("printed_closing"),
+        "credit_delta": _delta(printed_totals.get("printed_credits"), computed_credits),
+        "debit_delta": _delta(printed_totals.get("printed_debits"), computed_debits),
+        "closing_delta": _delta(printed_totals.get("printed_closing"), computed_closing),
+    }
+    totals_match = all(
+        d is None or abs(d) <= tolerance
+        for d in (diagnostics["credit_delta"], diagnostics["debit_delta"], diagnostics["closing_delta"])
+    )
+    if unresolved or not totals_match:
+        diagnostics["status"] = "mismatch"
+    elif breaks:
+        diagnostics["status"] = "repaired"
+    else:
+        diagnostics["status"] = "ok"
+    return rows, diagnostics
+
+def _parse_file_safely(filepath: str, account_password: str):
+    """
+    parse_pdf_file for batch use: an unexpected error marks the file instead of aborting the batch.
+    The file's stage timings come back under printed_totals["metrics"] so that records made in
+    worker processes reach the sinks of the parent, and how the file was opened (see
+    open_strategy) under printed_totals["encryption"] for the parent's parse cache.
+    """
+    with instrument.track("file", os.path.basename(filepath)) as rec:
+        try:
+            rows, printed = parse_pdf_file(filepath, account_password)
+        except Exception as e:
+            logger.exception("Parsing failed for %s", filepath)
+            rows, printed = [], _empty_totals("error", f"{os.path.basename(filepath)}: {e}")
+        instrument.count("rows", len(rows))
+    printed["metrics"] = rec
+    try:
+        printed["encryption"] = open_strategy(page_cache.file_hash(filepath))
+    except OSError:
+        pass
+    return rows, printed
+
+def aggregate_results(filepaths, results, emit_metrics: bool = True):
+    """
+    Folds per-file (rows, printed_totals) results, aligned with filepaths, into the
+    (all_rows, aggregated) pair returned by parse_many_pdfs.
+    """
+    all_rows = []
+    reconciliation = []
+    file_status = []
+    total_printed_credits = 0.0
+    total_printed_debits = 0.0
+    any_printed = False
+    printed_by_currency = {}
+    metrics = []
+    for p, (rows, printed) in zip(filepaths, results):
+        # a statement is in one currency, set per row by its parser
+        currency = rows[0].get("Currency") if rows else None
+        if rows:
+            all_rows.extend(rows)
+        if printed and printed.get("metrics"):
+            metrics.append(printed["metrics"])
+            if emit_metrics:
+                instrument.emit(printed["metrics"])
+        recon = printed.get("reconciliation") if printed else None
+        if recon is not None:
+            reconciliation.append(dict(recon, file=os.path.basename(p)))
+        file_status.append({
+            "file": os.path.basename(p),
+            "path": p,
+            "status": (printed or {}).get("status") or ("ok" if rows else "no_rows"),
+            "error": (printed or {}).get("error"),
+            "rows": len(rows),
+            "currency": currency,
+            "printed_credits": (printed or {}).get("printed_credits"),
+            "printed_debits": (printed or {}).get("printed_debits"),
+            "printed_closing": (printed or {}).get("printed_closing"),
+            "reconciliation": recon.get("status") if recon else None
+        })
+        # printed could be None values
+        pc = printed.get("printed_credits") if printed else None
+        pd_ = printed.get("printed_debits") if printed else None
+        if pc is not None:
+            any_printed = True
+            total_printed_credits += float(pc)
+        if pd_ is not None:
+            any_printed = True
+            total_printed_debits += float(pd_)
+        if pc is not None or pd_ is not None:
+            by_cur = printed_by_currency.setdefault(currency or "INR", {"printed_credits": 0.0, "printed_debits": 0.0})
+            by_cur["printed_credits"] += float(pc or 0.0)
+            by_cur["printed_debits"] += float(pd_ or 0.0)
+    aggregated = {
+        # plain sums are only meaningful for single-currency batches; see printed_by_currency
+        "printed_credits": total_printed_credits if any_printed else None,
+        "printed_debits": total_printed_debits if any_printed else None,
+        "printed_by_currency": printed_by_currency,
+        "reconciliation": reconciliation,
+        "file_status": file_status,
+        "metrics": metrics
+    }
+    return all_rows, aggregated
+
+def merge_aggregated(parts):
+    """
+    Combines aggregated dicts of disjoint file sets (as returned by aggregate_results)
+    into the one aggregate_results would return for all of them, in the given order.
+    """
+    merged = {"printed_credits": None, "printed_debits": None, "printed_by_currency": {},
+              "reconciliation": [], "file_status": [], "metrics": []}
+    for part in parts:
+        for key in ("printed_credits", "printed_debits"):
+            if part.get(key) is not None:
+                merged[key] = (merged[key] or 0.0) + float(part[key])
+        for code, totals in (part.get("printed_by_currency") or {}).items():
+            by_cur = merged["printed_by_currency"].setdefault(code, {"printed_credits": 0.0, "printed_debits": 0.0})
+            by_cur["printed_credits"] += totals["printed_credits"]
+            by_cur["printed_debits"] += totals["printed_debits"]
+        for key in ("reconciliation", "file_status", "metrics"):
+            merged[key].extend(part.get(key) or [])
+    return merged
+
+def _copy_result(result, filepath):
+    """result of an identical file, restamped with filepath's name (for results the parse cache did not keep)."""
+    rows, printed = result
+    name = os.path.basename(filepath)
+    return [{**r, "Source File": name} for r in rows], dict(printed)
+
+def parse_many_pdfs(filepaths, account_password: str, workers: int = 1, progress=None):
+    """
+    Now returns tuple: (all_rows_list, aggregated_printed_totals)
+    aggregated_printed_totals = {"printed_credits": sum or None, "printed_debits": sum or None,
+                                 "printed_by_currency": {currency code: {"printed_credits", "printed_debits"}},
+                                 "reconciliation": [per-file diagnostics],
+                                 "file_status": [per-file status dicts],
+                                 "metrics": [per-file stage timings, see instrument]}
+    If none of the files contain printed totals, values will be None.
+    With workers > 1 files are parsed in a process pool; rows keep the input file order.
+    progress, if given, is called with each file path as soon as that file is done.
+    """
+    import multiprocessing
+
+    filepaths = list(filepaths)
+    results = [None] * len(filepaths)
+    if workers and workers > 1 and len(filepaths) > 1:
+        # files already parsed in this process need no worker; identical files within
+        # the batch share one: content hash -> indexes, the first one submitted
+        todo = {}
+        for idx, p in enumerate(filepaths):
+            results[idx] = parse_cache.lookup(p, account_password)
+            if results[idx] is None:
+                try:
+                    key = page_cache.file_hash(p)
+                except OSError:
+                    key = idx
+                todo.setdefault(key, []).append(idx)
+            elif progress:
+                progress(p)
+        # spawn: forking a multi-threaded parent is not safe
+        with ProcessPoolExecutor(max_workers=workers, initializer=_mark_batch_worker, initargs=_batch_worker_args(),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(_parse_file_safely, filepaths[same[0]], account_password): same
+                for same in todo.values()
+            }
+            for fut in as_completed(futures):
+                first, *copies = futures[fut]
+                try:
+                    results[first] = fut.result()
+                except Exception as e:
+                    # worker process died (e.g. out of memory) — report it like any other failure
+                    results[first] = ([], _empty_totals("error", f"{os.path.basename(filepaths[first])}: {e}"))
+                parse_cache.store(filepaths[first], account_password, results[first])
+                for idx in copies:
+                    results[idx] = (parse_cache.lookup(filepaths[idx], account_password)
+                                    or _copy_result(results[first], filepaths[idx]))
+                if progress:
+                    for idx in futures[fut]:
+                        progress(filepaths[idx])
+    else:
+        for idx, p in enumerate(filepaths):
+            results[idx] = parse_cache.parse(p, account_password)
+            if progress:
+                progress(p)
+
+    return aggregate_results(filepaths, results)
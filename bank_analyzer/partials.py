@@ -0,0 +1,133 @@
+"""
+Mergeable partial aggregates of an analysis.
+
+compute() reduces one statement's rows to three small tables that add and
+subtract exactly: per-file credit/debit/count, monthly CR/DR sums and counts,
+and per-category totals and counts. An analysis keeps one set per statement
+and merges them, so selecting or deselecting a statement costs that
+statement's partials instead of a groupby over every row:
+
+    total = partials.merge(partials.compute(frame, key=path) for path, frame in files)
+    total = partials.subtract(total, removed)
+    partials.monthly_summary(total)         # same table as dashboard.monthly_summary
+
+The *_summary functions return the same shapes as their dashboard
+counterparts. Amounts are summed as given, so compute partials from frames
+already converted to the reporting currency.
+"""
+from functools import reduce
+
+from . import dashboard, instrument
+
+TABLES = ("files", "monthly", "categories")
+# count column of each table: a group whose count drops to zero is gone
+_COUNTS = {"files": "Transactions", "monthly": "Count", "categories": "Count"}
+
+
+def empty():
+    import pandas as pd
+
+    return {
+        "files": pd.DataFrame({"Total_Credit": [], "Total_Debit": [], "Transactions": []},
+                              index=pd.Index([], name="Source File")),
+        "monthly": pd.DataFrame({"CR": [], "DR": [], "Count": []}, index=pd.PeriodIndex([], freq="M", name="Month")),
+        "categories": pd.DataFrame({"Total": [], "Count": []}, index=pd.Index([], name="Category")),
+    }
+
+
+@instrument.timed("partials.compute")
+def compute(df, key=None):
+    """
+    Partials of df's rows. The files table has one row keyed by key (e.g. the
+    statement's path), or one row per Source File when key is None.
+    """
+    import pandas as pd
+
+    if df.empty:
+        return empty()
+    credit, debit = dashboard.split_amounts(df)
+    signed = df.assign(Total_Credit=credit, Total_Debit=debit)
+    if key is None:
+        files = signed.groupby("Source File", observed=True).agg(
+            Total_Credit=("Total_Credit", "sum"),
+            Total_Debit=("Total_Debit", "sum"),
+            Transactions=("Amount", "count")
+        )
+    else:
+        files = pd.DataFrame({"Total_Credit": [float(credit.sum())], "Total_Debit": [float(debit.sum())],
+                              "Transactions": [len(df)]}, index=pd.Index([key], name="Source File"))
+
+    month = pd.to_datetime(df["Date"], errors="coerce").dt.to_period("M").rename("Month")
+    monthly = signed.groupby(month, observed=True).agg(
+        CR=("Total_Credit", "sum"),
+        DR=("Total_Debit", "sum"),
+        Count=("Amount", "count")
+    )
+    categories = df.groupby("Category", observed=True).agg(
+        Total=("Amount", "sum"),
+        Count=("Amount", "count")
+    )
+    categories.index = categories.index.astype(object)
+    return {"files": files.astype("float64"), "monthly": monthly.astype("float64"),
+            "categories": categories.astype("float64")}
+
+
+def _combine(a, b, sign):
+    out = {}
+    for name in TABLES:
+        table = a[name].add(b[name] * sign, fill_value=0.0)
+        out[name] = table[table[_COUNTS[name]] > 0.5]
+    return out
+
+
+def add(a, b):
+    return _combine(a, b, 1.0)
+
+
+def subtract(a, b):
+    """a without b; b must be partials that were added into a."""
+    return _combine(a, b, -1.0)
+
+
+def merge(parts):
+    return reduce(add, parts, empty())
+
+
+def computed_totals(parts):
+    """(total_credit, total_debit), as dashboard.computed_totals."""
+    files = parts["files"]
+    return float(files["Total_Credit"].sum()), float(files["Total_Debit"].sum())
+
+
+def transaction_count(parts) -> int:
+    return int(round(parts["files"]["Transactions"].sum()))
+
+
+def file_summary(parts, names=None):
+    """As dashboard.file_summary; names maps the files keys to display names."""
+    summary = parts["files"].copy()
+    summary["Transactions"] = summary["Transactions"].round().astype("int64")
+    if names:
+        # statements sharing a display name are one row, as when grouping by Source File
+        summary.index = [names.get(k, k) for k in summary.index]
+        summary = summary.groupby(level=0, sort=False).sum()
+        summary.index.name = "Source File"
+    summary["Net_Flow"] = summary["Total_Credit"] - summary["Total_Debit"]
+    return summary
+
+
+def monthly_summary(parts):
+    """As dashboard.monthly_summary."""
+    import pandas as pd
+
+    summary = parts["monthly"][["CR", "DR"]].sort_index()
+    summary.columns = pd.Index(["CR", "DR"], name="Type")
+    summary["Net"] = summary["CR"] - summary["DR"]
+    return summary
+
+
+def category_summary(parts):
+    """As dashboard.category_summary."""
+    summary = parts["categories"].copy()
+    summary["Count"] = summary["Count"].round().astype("int64")
+    return summary.sort_values("Total", ascending=False)
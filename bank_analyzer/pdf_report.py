@@ -0,0 +1,191 @@
+"""
+PDF summary report of an analysis, rendered with reportlab.
+
+write_report() lays out the sections the dashboard shows as live output —
+summary totals, per-file, monthly and category tables and the largest
+transactions — for the statements listed in the options:
+
+    options = {"files": ["jan.pdf", "feb.pdf"], "sections": ["summary", "monthly"]}
+
+An empty "files" list means every statement. The report only holds
+aggregates, so its size does not grow with the transaction count.
+"""
+import os
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from . import dashboard
+
+SECTIONS = {
+    "summary": "Summary",
+    "files": "By File",
+    "monthly": "Monthly Trends",
+    "categories": "Category Analysis",
+    "top": "Top Transactions",
+}
+TOP_N = 10
+
+GREEN = "#4CAF50"
+
+
+def _money_prefix(currency_symbol: str) -> str:
+    # the base-14 PDF fonts have no rupee glyph
+    if not currency_symbol or currency_symbol == "₹":
+        return "INR "
+    return currency_symbol if currency_symbol.endswith(" ") else f"{currency_symbol} "
+
+
+def select_statements(df, files):
+    """Rows of the listed Source Files (all rows when files is empty)."""
+    if not files:
+        return df
+    return df[df["Source File"].isin(files)]
+
+
+def _table(rows, col_widths=None, money_cols=()):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    table = Table(rows, colWidths=col_widths, repeatRows=1)
+    style = [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(GREEN)),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F4F6F8")]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#CCCCCC")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]
+    for col in money_cols:
+        style.append(("ALIGN", (col, 1), (col, -1), "RIGHT"))
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def _summary_section(df, money, printed_totals):
+    credit, debit = dashboard.computed_totals(df)
+    printed_totals = printed_totals or {}
+    rows = [["", "Computed", "Printed"]]
+    for label, computed, printed in (
+        ("Total Credit", credit, printed_totals.get("printed_credits")),
+        ("Total Debit", debit, printed_totals.get("printed_debits")),
+    ):
+        rows.append([label, money(computed), money(printed) if printed is not None else "—"])
+    rows.append(["Net Flow", money(credit - debit), ""])
+    rows.append(["Transactions", f"{len(df):,}", ""])
+    story = [_table(rows, [140, 120, 120], money_cols=(1, 2))]
+
+    by_currency = dashboard.currency_summary(df)
+    if len(by_currency) > 1:
+        from reportlab.platypus import Spacer
+
+        rows = [["Currency", "Credit", "Debit", "Net Flow", "Transactions"]]
+        for code, r in by_currency.iterrows():
+            native = _money_prefix(str(code))
+            rows.append([str(code)] + [f"{native}{float(r[c]):,.2f}" for c in ("Total_Credit", "Total_Debit", "Net_Flow")]
+                        + [f"{int(r['Transactions']):,}"])
+        story += [Spacer(1, 8), _table(rows, [70, 100, 100, 100, 70], money_cols=(1, 2, 3, 4))]
+    return story
+
+
+def _files_section(df, money):
+    summary = dashboard.file_summary(df)
+    rows = [["Source File", "Credit", "Debit", "Net Flow", "Transactions"]]
+    for name, r in summary.iterrows():
+        rows.append([str(name), money(r["Total_Credit"]), money(r["Total_Debit"]), money(r["Net_Flow"]), f"{int(r['Transactions']):,}"])
+    return [_table(rows, [170, 85, 85, 85, 70], money_cols=(1, 2, 3, 4))]
+
+
+def _monthly_section(df, money):
+    summary = dashboard.monthly_summary(df)
+    rows = [["Month", "Credit", "Debit", "Net"]]
+    for month, r in summary.iterrows():
+        rows.append([str(month), money(r.get("CR", 0.0)), money(r.get("DR", 0.0)), money(r["Net"])])
+    return [_table(rows, [100, 110, 110, 110], money_cols=(1, 2, 3))]
+
+
+def _categories_section(df, money):
+    summary = dashboard.category_summary(df)
+    rows = [["Category", "Total", "Count", "Avg / Transaction"]]
+    for cat, r in summary.iterrows():
+        rows.append([str(cat), money(r["Total"]), f"{int(r['Count']):,}", money(r["Total"] / r["Count"] if r["Count"] else 0.0)])
+    return [_table(rows, [150, 110, 60, 110], money_cols=(1, 2, 3))]
+
+
+def _top_section(df, money, styles):
+    import pandas as pd
+    from reportlab.platypus import Paragraph
+
+    rows = [["Date", "Type", "Amount", "Category", "Remarks"]]
+    for _, r in dashboard.top_transactions(df, TOP_N).iterrows():
+        date = pd.to_datetime(r["Date"], errors="coerce")
+        rows.append([
+            date.strftime("%d %b %Y") if not pd.isna(date) else "",
+            r["Type"],
+            money(r["Amount"]),
+            str(r.get("Category", "")),
+            Paragraph(escape(str(r["Remarks"])), styles["BodyText"]),
+        ])
+    return [_table(rows, [60, 30, 80, 80, 250], money_cols=(2,))]
+
+
+def write_report(df, path: str, currency_symbol: str = "₹", printed_totals: dict = None, options: dict = None) -> str:
+    """
+    Renders the PDF report to path (atomically) and returns path.
+    options: {"files": [Source File names], "sections": [keys of SECTIONS]}; missing keys mean everything.
+    Printed totals only apply to the whole dataset, so they are left out when a subset of files is selected.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    options = options or {}
+    files = list(options.get("files") or [])
+    sections = [s for s in (options.get("sections") or list(SECTIONS)) if s in SECTIONS]
+    subset = select_statements(df, files)
+    prefix = _money_prefix(currency_symbol)
+
+    def money(value):
+        return f"{prefix}{float(value):,.2f}"
+
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph("Bank Statement Analysis", styles["Title"]),
+        Paragraph(f"Generated {datetime.now().strftime('%d %b %Y %H:%M')}", styles["Normal"]),
+        Paragraph("Statements: " + escape(", ".join(files) if files else "all"), styles["Normal"]),
+        Spacer(1, 6 * mm),
+    ]
+    if subset.empty:
+        story.append(Paragraph("No transactions for the selected statements.", styles["Normal"]))
+    for key in sections if not subset.empty else []:
+        story.append(Paragraph(SECTIONS[key], styles["Heading2"]))
+        if key == "summary":
+            story += _summary_section(subset, money, None if files else printed_totals)
+        elif key == "files":
+            story += _files_section(subset, money)
+        elif key == "monthly":
+            story += _monthly_section(subset, money)
+        elif key == "categories":
+            story += _categories_section(subset, money)
+        elif key == "top":
+            story += _top_section(subset, money, styles)
+        story.append(Spacer(1, 5 * mm))
+
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".pdf.tmp")
+    os.close(fd)
+    try:
+        doc = SimpleDocTemplate(tmp, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                                topMargin=15 * mm, bottomMargin=15 * mm, title="Bank Statement Analysis")
+        doc.build(story)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return path
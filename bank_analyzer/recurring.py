@@ -0,0 +1,117 @@
+"""
+Recurring payment detection.
+
+detect_recurring() finds debits that repeat on a schedule (rent, EMIs,
+subscriptions, utility bills) in the analyzed transactions:
+
+    recurring = detect_recurring(df)
+
+Debits are keyed by merchant id (see merchants), sorted once by (merchant,
+date), and every test is a grouped vector operation over that sorted frame,
+so a multi-year history costs one sort plus a few linear passes. A merchant
+is recurring when it has at least MIN_OCCURRENCES debits, the median gap
+between them matches one of the CADENCES, and most gaps and amounts stay
+close to that cadence and to the median amount.
+"""
+from . import instrument
+from .merchants import known, merchant_ids, merchant_names
+
+# name: (period in days, tolerance in days, calendar step for the next expected date, payments per year)
+CADENCES = {
+    "Weekly": (7, 2, {"weeks": 1}, 52),
+    "Fortnightly": (14, 3, {"weeks": 2}, 26),
+    "Monthly": (30, 5, {"months": 1}, 12),
+    "Quarterly": (91, 12, {"months": 3}, 4),
+    "Yearly": (365, 20, {"years": 1}, 1),
+}
+MIN_OCCURRENCES = 3
+# share of gaps on cadence, and of amounts within AMOUNT_TOLERANCE of the median, a merchant needs
+MIN_REGULAR_SHARE = 0.75
+AMOUNT_TOLERANCE = 0.2
+
+RESULT_COLUMNS = ["Merchant", "Category", "Cadence", "Typical_Amount", "Monthly_Cost", "Occurrences",
+                  "First", "Last", "Next_Expected", "Status"]
+
+
+def _next_dates(last, cadence):
+    """last + one calendar step of each row's cadence (one vector op per cadence)."""
+    import pandas as pd
+
+    out = pd.Series(pd.NaT, index=last.index, dtype="datetime64[ns]")
+    for name, (_, _, step, _) in CADENCES.items():
+        mask = cadence == name
+        if mask.any():
+            out[mask] = last[mask] + pd.DateOffset(**step)
+    return out
+
+
+@instrument.timed("recurring.detect_recurring")
+def detect_recurring(df, as_of=None):
+    """
+    One row per recurring debit (see RESULT_COLUMNS), active ones first by next
+    expected date. Status is "Lapsed" when the next payment is overdue by more
+    than the cadence tolerance at as_of (default: the latest transaction date).
+    """
+    import numpy as np
+    import pandas as pd
+
+    debits = df[df["Type"] == "DR"]
+    if debits.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    ids = debits["Merchant ID"] if "Merchant ID" in debits.columns else merchant_ids(debits["Remarks"])
+    # remarks naming no merchant share one id; grouped together they would look like one payee
+    named = known(ids).to_numpy()
+    debits, ids = debits[named], ids[named]
+    frame = pd.DataFrame({
+        "Merchant": ids.to_numpy(),
+        "Date": pd.to_datetime(debits["Date"], errors="coerce").to_numpy(),
+        "Amount": debits["Amount"].to_numpy(dtype="float64"),
+        "Category": debits["Category"].astype(str).to_numpy() if "Category" in debits.columns else "",
+    })
+    frame = frame[frame["Date"].notna()]
+    frame = frame.sort_values(["Merchant", "Date"], kind="stable")
+    frame["Gap"] = frame.groupby("Merchant", sort=False)["Date"].diff().dt.days
+
+    stats = frame.groupby("Merchant", sort=False).agg(
+        Occurrences=("Amount", "size"),
+        First=("Date", "first"),
+        Last=("Date", "last"),
+        Typical_Amount=("Amount", "median"),
+        Median_Gap=("Gap", "median"),
+        Category=("Category", "first"),
+    )
+    stats = stats[stats["Occurrences"] >= MIN_OCCURRENCES]
+
+    # cadence whose period the median gap falls within
+    names = np.array(list(CADENCES))
+    periods = np.array([c[0] for c in CADENCES.values()], dtype="float64")
+    tolerances = np.array([c[1] for c in CADENCES.values()], dtype="float64")
+    fits = np.abs(stats["Median_Gap"].to_numpy()[:, None] - periods[None, :]) <= tolerances[None, :]
+    matched = fits.any(axis=1)
+    stats = stats[matched].assign(Cadence=names[fits[matched].argmax(axis=1)])
+    if stats.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    stats["Period"] = stats["Cadence"].map(dict(zip(names, periods)))
+    stats["Tolerance"] = stats["Cadence"].map(dict(zip(names, tolerances)))
+
+    # interval and amount stability over the candidates' rows
+    rows = frame[frame["Merchant"].isin(stats.index)]
+    merchant = rows["Merchant"]
+    on_cadence = (rows["Gap"] - merchant.map(stats["Period"])).abs() <= merchant.map(stats["Tolerance"])
+    typical = merchant.map(stats["Typical_Amount"])
+    steady = (rows["Amount"] - typical).abs() <= AMOUNT_TOLERANCE * typical
+    gap_share = on_cadence.groupby(merchant).sum() / (stats["Occurrences"] - 1)
+    amount_share = steady.groupby(merchant).mean()
+    stats = stats[(gap_share.reindex(stats.index) >= MIN_REGULAR_SHARE)
+                  & (amount_share.reindex(stats.index) >= MIN_REGULAR_SHARE)]
+    if stats.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    as_of = pd.Timestamp(as_of) if as_of is not None else frame["Date"].max()
+    stats["Next_Expected"] = _next_dates(stats["Last"], stats["Cadence"])
+    overdue = stats["Next_Expected"] + pd.to_timedelta(stats["Tolerance"], unit="D") < as_of
+    stats["Status"] = np.where(overdue, "Lapsed", "Active")
+    stats["Monthly_Cost"] = stats["Typical_Amount"] * stats["Cadence"].map({n: c[3] / 12 for n, c in CADENCES.items()})
+    stats["Merchant"] = merchant_names(stats.index).to_numpy()
+    stats = stats.reset_index(drop=True).sort_values(["Status", "Next_Expected"], kind="stable")
+    return stats[RESULT_COLUMNS].reset_index(drop=True)
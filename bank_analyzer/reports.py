@@ -0,0 +1,112 @@
+"""
+Background generation of downloadable reports.
+
+Report builders (see excel_report) are slow functions of the analyzed
+DataFrame. submit() runs them on a small shared thread pool so a Streamlit
+rerun never waits on one, and the builders write to files under
+DATA_DIR/reports instead of returning the whole document in memory.
+
+submit_cached() additionally names the output after (dataset fingerprint,
+report options): asking again for an unchanged report returns the existing
+file at once, and identical requests in flight share one build.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MAX_WORKERS = 2
+# cached reports kept per user; older ones are deleted when a new one is built
+MAX_CACHED_REPORTS = 20
+
+_executor = None
+_executor_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# columns that define a dataset for report caching (display-only columns excluded)
+FINGERPRINT_COLUMNS = ["Date", "Amount", "Type", "Balance", "Remarks", "Source File", "Category", "Currency"]
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="report")
+        return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the report pool; returns its Future."""
+    return _get_executor().submit(fn, *args, **kwargs)
+
+
+def report_dir(owner: str) -> str:
+    """Per-user output directory for generated reports."""
+    from .db import DATA_DIR
+
+    path = os.path.join(DATA_DIR, "reports", owner)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def dataset_fingerprint(df) -> str:
+    """Content hash of the analyzed rows: equal for equal data, whatever session produced it."""
+    import pandas as pd
+
+    cols = [c for c in FINGERPRINT_COLUMNS if c in df.columns]
+    h = hashlib.sha256(",".join(cols).encode())
+    h.update(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def options_key(options: dict) -> str:
+    return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def cache_path(owner: str, kind: str, fingerprint: str, options: dict, ext: str) -> str:
+    return os.path.join(report_dir(owner), "cache", f"{kind}_{fingerprint[:16]}_{options_key(options)[:12]}{ext}")
+
+
+def _prune(cache_dir: str, keep: int):
+    try:
+        entries = [os.path.join(cache_dir, n) for n in os.listdir(cache_dir) if not n.endswith(".tmp")]
+        entries.sort(key=os.path.getmtime, reverse=True)
+    except OSError:
+        return
+    for stale in entries[keep:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def submit_cached(path: str, build) -> Future:
+    """
+    Future for the report at path: already resolved when the file exists, the
+    running build when one is in flight, else build() (which writes path and
+    returns it) on the report pool.
+    """
+    with _inflight_lock:
+        running = _inflight.get(path)
+        if running is not None and not running.done():
+            return running
+        if os.path.exists(path):
+            os.utime(path)
+            done = Future()
+            done.set_result(path)
+            return done
+        cache_dir = os.path.dirname(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        _prune(cache_dir, MAX_CACHED_REPORTS - 1)
+        future = submit(build)
+        _inflight[path] = future
+    future.add_done_callback(lambda _f: _forget(path, _f))
+    return future
+
+
+def _forget(path: str, future):
+    with _inflight_lock:
+        if _inflight.get(path) is future:
+            del _inflight[path]
@@ -0,0 +1,322 @@
+"""
+Session datasets under one process-wide memory budget.
+
+Every logged-in session keeps its analyzed rows (the per-statement frames and
+the combined last_df). Held in st.session_state they would stay in RAM for as
+long as the session lives, so the server would grow with every user. They are
+kept here instead, keyed by (session id, name), and their total in-memory size
+stays under MEMORY_BUDGET: when a put() or a reload goes over it, the least
+recently used frames of any session are spilled to an Arrow IPC file under
+DATA_DIR/sessions/<owner>/ and memory-mapped back on their next get().
+
+    session_data.put(sid, "last_df", compact(df), owner=user)
+    df = session_data.get(sid, "last_df")       # None once dropped
+
+Frames are handed out, not copied: after editing one in place, put() it again
+so its size is re-measured and an outdated spill file is never read back.
+Entries nobody has read for ENTRY_TTL_S (sessions that ended without logging
+out) are forgotten along with their spill files.
+
+Frames to spill are picked under the module lock, but written and read back
+outside it, under a lock of their own entry, so one session's Arrow I/O never
+stalls the others. Spill files live under a directory per process
+(DATA_DIR/sessions/<pid>/); directories of processes that are gone, such as a
+server that crashed, are removed before this process spills for the first time.
+"""
+import hashlib
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+BUDGET_ENV = "BANK_ANALYZER_SESSION_MEMORY_MB"
+MEMORY_BUDGET = int(float(os.environ.get(BUDGET_ENV) or 512) * 1024 * 1024)
+ENTRY_TTL_S = 24 * 3600
+# parser diagnostics no dashboard view reads
+DIAGNOSTIC_COLUMNS = ("inference_reason", "delta")
+
+_lock = threading.Lock()
+# (session, name) -> {"owner", "frame", "nbytes", "path", "dirty", "used", "io", "spilling", "dropped"};
+# least recently used first. "io" serializes the entry's file I/O, done without _lock.
+_entries = OrderedDict()
+_resident = 0
+# bytes of frames picked for spilling whose files are still being written
+_spilling = 0
+_stats = {"spills": 0, "reloads": 0}
+# every entry gets its own spill file, so a replaced or dropped entry's late write never lands on another's
+_file_numbers = itertools.count()
+_root_lock = threading.Lock()
+_root_cleaned = False
+
+
+def compact(df):
+    """df without the parser diagnostics, with categorical text columns (see export.normalize_dtypes)."""
+    from .export import normalize_dtypes
+
+    return normalize_dtypes(df.drop(columns=[c for c in DIAGNOSTIC_COLUMNS if c in df.columns]))
+
+
+def _sessions_root() -> str:
+    from .db import DATA_DIR
+
+    return os.path.join(DATA_DIR, "sessions")
+
+
+def spill_dir(owner: str) -> str:
+    return os.path.join(_sessions_root(), str(os.getpid()), owner)
+
+
+def _spill_path(owner, session, name) -> str:
+    digest = hashlib.sha256(f"{session}\0{name}".encode()).hexdigest()[:24]
+    return os.path.join(spill_dir(owner), f"{digest}-{next(_file_numbers)}.arrow")
+
+
+def _alive(pid: int) -> bool:
+    if os.name == "nt":
+        import ctypes
+
+        # PROCESS_QUERY_LIMITED_INFORMATION; os.kill() would terminate the process on Windows
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _clean_stale_spills():
+    """
+    Removes the spill directories of processes that are no longer running, once
+    per process. A directory named after this process's own pid was left by an
+    earlier process that had it (containers reuse pids across restarts), and
+    directories not named after a pid come from the per-owner layout before it.
+    """
+    global _root_cleaned
+    with _root_lock:
+        if _root_cleaned:
+            return
+        _root_cleaned = True
+        root = _sessions_root()
+        try:
+            names = os.listdir(root)
+        except OSError:
+            return
+        for name in names:
+            if name.isdigit() and int(name) != os.getpid() and _alive(int(name)):
+                continue
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def _size(df) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _write(df, path):
+    import pyarrow as pa
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _forget_locked(entry):
+    """
+    Takes an entry popped from _entries out of the totals. Returns its spill file
+    for the caller to remove once _lock is released, or None when a spill of the
+    entry is being written, in which case _spill() removes the file itself.
+    """
+    global _resident, _spilling
+    if entry["frame"] is not None:
+        _resident -= entry["nbytes"]
+    if entry["spilling"]:
+        _spilling -= entry["nbytes"]
+        entry["spilling"] = False
+        entry["dropped"] = True
+        return None
+    return entry["path"]
+
+
+def _spill(entry):
+    """Moves entry's frame out of memory; it stays resident when it cannot be written."""
+    global _resident, _spilling
+    _clean_stale_spills()
+    with entry["io"]:
+        with _lock:
+            frame, dirty = entry["frame"], entry["dirty"]
+        written, ok = False, True
+        if not entry["dropped"] and (dirty or not os.path.exists(entry["path"])):
+            try:
+                _write(frame, entry["path"])
+                written = True
+            except Exception:
+                logger.warning("Could not spill a session frame to %s", entry["path"], exc_info=True)
+                ok = False
+        with _lock:
+            dropped = entry["dropped"]
+            if not dropped:
+                entry["spilling"] = False
+                _spilling -= entry["nbytes"]
+                if ok:
+                    entry["frame"] = None
+                    entry["dirty"] = False
+                    _resident -= entry["nbytes"]
+                    _stats["spills"] += written
+    if dropped:
+        # replaced, dropped or expired while it was being written
+        _remove(entry["path"])
+
+
+def _spill_all(victims):
+    for entry in victims:
+        _spill(entry)
+
+
+def _expire_locked(now) -> list:
+    """Forgets entries unused for ENTRY_TTL_S; returns the spill files to remove."""
+    stale = [k for k, e in _entries.items() if now - e["used"] > ENTRY_TTL_S]
+    return [_forget_locked(_entries.pop(key)) for key in stale]
+
+
+def _enforce_budget_locked(keep) -> list:
+    """
+    Picks least recently used frames, except keep, until what stays resident fits
+    the budget, and marks them as spilling. The caller spills them with
+    _spill_all() once _lock is released.
+    """
+    global _spilling
+    victims = []
+    for key, entry in _entries.items():
+        if _resident - _spilling <= MEMORY_BUDGET:
+            break
+        if key != keep and entry["frame"] is not None and not entry["spilling"]:
+            entry["spilling"] = True
+            _spilling += entry["nbytes"]
+            victims.append(entry)
+    return victims
+
+
+def _remove_all(paths):
+    for path in paths:
+        if path is not None:
+            _remove(path)
+
+
+def put(session: str, name: str, df, owner: str):
+    """Stores df as the session's dataset name (replacing any earlier one); returns df."""
+    global _resident
+    key = (session, name)
+    now = time.monotonic()
+    with _lock:
+        old = _entries.pop(key, None)
+        stale = [_forget_locked(old)] if old is not None else []
+        entry = {
+            "owner": owner,
+            "frame": df,
+            "nbytes": _size(df),
+            "path": _spill_path(owner, session, name),
+            "dirty": True,
+            "used": now,
+            "io": threading.Lock(),
+            "spilling": False,
+            "dropped": False,
+        }
+        _entries[key] = entry
+        _resident += entry["nbytes"]
+        stale += _expire_locked(now)
+        victims = _enforce_budget_locked(key)
+    _remove_all(stale)
+    _spill_all(victims)
+    return df
+
+
+def get(session: str, name: str):
+    """The session's dataset name, read back from its spill file if it was spilled; None if there is none."""
+    global _resident
+    key = (session, name)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        _entries.move_to_end(key)
+        entry["used"] = time.monotonic()
+        frame = entry["frame"]
+    if frame is not None:
+        return frame
+    victims = []
+    with entry["io"]:
+        with _lock:
+            # another get() may have read it back while this one waited
+            frame = entry["frame"]
+        if frame is None:
+            try:
+                frame = _read(entry["path"])
+            except Exception:
+                with _lock:
+                    lost = _entries.get(key) is entry
+                    if lost:
+                        del _entries[key]
+                if lost:
+                    logger.warning("Lost spilled session frame %s", entry["path"], exc_info=True)
+                return None
+            with _lock:
+                if _entries.get(key) is entry:
+                    entry["frame"] = frame
+                    _stats["reloads"] += 1
+                    _resident += entry["nbytes"]
+                    victims = _enforce_budget_locked(key)
+    _spill_all(victims)
+    return frame
+
+
+def contains(session: str, name: str) -> bool:
+    with _lock:
+        return (session, name) in _entries
+
+
+def drop(session: str, name: str = None):
+    """Forgets the session's dataset name, or all of the session's datasets when name is None."""
+    with _lock:
+        keys = [k for k in _entries if k[0] == session and (name is None or k[1] == name)]
+        stale = [_forget_locked(_entries.pop(key)) for key in keys]
+    _remove_all(stale)
+
+
+def usage() -> dict:
+    """Budget and current totals, for diagnostics."""
+    with _lock:
+        return {
+            "budget": MEMORY_BUDGET,
+            "resident": _resident,
+            "entries": len(_entries),
+            "spilled": sum(1 for e in _entries.values() if e["frame"] is None),
+            "sessions": len({k[0] for k in _entries}),
+            **_stats,
+        }
@@ -0,0 +1,192 @@
+"""
+Synthetic bank statements for benchmarks and regression tests.
+
+write_statement() renders an HDFC, IDBI, Axis or ADCB-style PDF with reportlab
+whose text lines match what the corresponding parser expects, and returns the
+ground truth: the transactions it printed plus the printed summary totals.
+HDFC and ADCB statements are laid out in columns under their header labels,
+with debits and credits in separate columns, as the banks print them.
+"""
+import random
+from datetime import date, timedelta
+
+BANKS = ("HDFC", "IDBI", "AXIS", "ADCB")
+
+ROWS_PER_PAGE = 45
+LINE_HEIGHT = 15
+FONT_SIZE = 8
+
+# (remark, is_credit, typical amount) — keywords exercise detect_category incl. fuzzy matches
+MERCHANTS = [
+    ("SWIGGY BANGALORE", False, 450.0),
+    ("ZOMATO ORDER", False, 380.0),
+    ("UBER TRIP", False, 260.0),
+    ("OLA CABS", False, 210.0),
+    ("NETFLIX SUBSCRIPTION", False, 649.0),
+    ("SPOTIFY PREMIUM", False, 119.0),
+    ("BIGBASKET GROCERY", False, 1850.0),
+    ("DMART STORE", False, 2200.0),
+    ("APOLLO PHARMACY MEDICAL", False, 760.0),
+    ("HOUSE RENT TRANSFER", False, 18000.0),
+    ("TNEB ELECTRICITY BILL", False, 1450.0),
+    ("IRCTC TRAIN BOOKING", False, 1320.0),
+    ("CREDIT CARD PAYMENT BILLDESK", False, 12500.0),
+    ("ATM CASH WITHDRAWAL", False, 3000.0),
+    ("SALARY SUTHERLAND GLOBAL", True, 65000.0),
+    ("CASHBACK REWARD", True, 75.0),
+    ("INTEREST CREDIT", True, 210.0),
+    ("REFUND AMAZON", True, 999.0),
+    ("MISC PAYMENT GROSERY", False, 540.0),
+]
+
+# (header label, x, right-aligned) per column of the banks printed as tables
+TABLE_COLUMNS = {
+    "HDFC": [("Date", 30, False), ("Narration", 70, False), ("Chq./Ref.No.", 240, False), ("ValueDt", 300, False),
+             ("WithdrawalAmt.", 410, True), ("DepositAmt.", 480, True), ("ClosingBalance", 560, True)],
+    "ADCB": [("Posting Date", 30, False), ("Value Date", 80, False), ("Description", 130, False), ("Ref", 320, False),
+             ("Debit", 420, True), ("Credit", 485, True), ("Balance", 560, True)],
+}
+
+HEADERS = {
+    "IDBI": "Sl Txn Date Value Date Description Type Ccy Amount Balance",
+    "AXIS": "Tran Date Particulars Amount Balance Branch",
+    **{bank: " ".join(label for label, _, _ in columns) for bank, columns in TABLE_COLUMNS.items()},
+}
+
+
+def generate_transactions(count: int, seed: int = 0, opening: float = 50000.0, start: date = date(2024, 1, 1)) -> list:
+    """
+    Deterministic transaction list with a consistent running balance.
+    Each dict has Date (datetime.date), Remarks, Amount, Type and Balance.
+    """
+    rng = random.Random(seed)
+    balance = opening
+    day = start
+    txs = []
+    for i in range(count):
+        remark, is_credit, base = MERCHANTS[rng.randrange(len(MERCHANTS))]
+        amount = round(base * rng.uniform(0.6, 1.4), 2)
+        if not is_credit and amount > balance:
+            is_credit, remark = True, "NEFT CR TRANSFER IN"
+        balance = round(balance + amount if is_credit else balance - amount, 2)
+        if rng.random() < 0.35:
+            day += timedelta(days=1)
+        txs.append({
+            "Date": day,
+            "Remarks": f"{remark} {100000 + i}",
+            "Amount": amount,
+            "Type": "CR" if is_credit else "DR",
+            "Balance": balance,
+        })
+    return txs
+
+
+def _fmt(amount: float) -> str:
+    return f"{amount:,.2f}"
+
+
+def _format_line(bank: str, idx: int, tx: dict) -> list:
+    """Printed text line(s) for one transaction, matching each bank's parser pattern."""
+    d = tx["Date"]
+    amt, bal = _fmt(tx["Amount"]), _fmt(tx["Balance"])
+    if bank == "HDFC":
+        ds = d.strftime("%d/%m/%y")
+        return [" ".join(cell for cell in _table_cells(bank, idx, tx) if cell)]
+    if bank == "IDBI":
+        ds = d.strftime("%d/%m/%y")
+        return [f"{idx + 1} {ds} {ds} {tx['Remarks']} {tx['Type']} INR {amt} {bal}"]
+    if bank == "AXIS":
+        # Axis wraps the particulars: the first half sits on its own line above the dated line
+        words = tx["Remarks"].split()
+        half = max(1, len(words) // 2)
+        return [" ".join(words[:half]), f"{d.strftime('%d-%m-%Y')} {' '.join(words[half:])} {amt} {bal} {1000 + idx % 90}"]
+    if bank == "ADCB":
+        return [" ".join(_table_cells(bank, idx, tx))]
+    raise ValueError(f"Unknown bank format: {bank}")
+
+
+def _table_cells(bank: str, idx: int, tx: dict) -> list:
+    """One text per TABLE_COLUMNS column of the bank; HDFC leaves the unused amount column blank."""
+    d = tx["Date"]
+    amt, bal = _fmt(tx["Amount"]), _fmt(tx["Balance"])
+    if bank == "HDFC":
+        ds = d.strftime("%d/%m/%y")
+        debit, credit = (amt, "") if tx["Type"] == "DR" else ("", amt)
+        return [ds, tx["Remarks"], f"0000{idx:08d}", ds, debit, credit, bal]
+    ds = d.strftime("%d/%m/%Y")
+    debit, credit = (amt, "0.00") if tx["Type"] == "DR" else ("0.00", amt)
+    return [ds, ds, tx["Remarks"], f"REF{idx:06d}", debit, credit, bal]
+
+
+def _draw_row(c, y, columns, cells):
+    for (_, x, right), cell in zip(columns, cells):
+        if right:
+            c.drawRightString(x, y, cell)
+        else:
+            c.drawString(x, y, cell)
+
+
+def printed_summary(txs: list, opening: float) -> dict:
+    debits = round(sum(t["Amount"] for t in txs if t["Type"] == "DR"), 2)
+    credits = round(sum(t["Amount"] for t in txs if t["Type"] == "CR"), 2)
+    return {
+        "opening_balance": opening,
+        "printed_debits": debits,
+        "printed_credits": credits,
+        "printed_closing": txs[-1]["Balance"] if txs else opening,
+        "dr_count": sum(1 for t in txs if t["Type"] == "DR"),
+        "cr_count": sum(1 for t in txs if t["Type"] == "CR"),
+    }
+
+
+def write_statement(path: str, bank: str = "HDFC", pages: int = 1, rows_per_page: int = ROWS_PER_PAGE,
+                    seed: int = 0, opening: float = 50000.0) -> dict:
+    """
+    Renders a statement PDF to path and returns the ground truth:
+    {"bank", "pages", "transactions", "summary"}.
+    Only HDFC statements carry a printed STATEMENTSUMMARY block.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    bank = bank.upper()
+    if bank not in BANKS:
+        raise ValueError(f"Unknown bank format: {bank}")
+    per_page = rows_per_page // 2 if bank == "AXIS" else rows_per_page
+    txs = generate_transactions(per_page * pages, seed=seed, opening=opening)
+    summary = printed_summary(txs, opening)
+
+    _, height = A4
+    c = canvas.Canvas(path, pagesize=A4)
+    for page in range(pages):
+        c.setFont("Helvetica", FONT_SIZE)
+        y = height - 40
+        c.drawString(30, y, f"{bank} BANK STATEMENT OF ACCOUNT  Page {page + 1} of {pages}")
+        y -= LINE_HEIGHT * 2
+        columns = TABLE_COLUMNS.get(bank)
+        if columns:
+            _draw_row(c, y, columns, [label for label, _, _ in columns])
+        else:
+            c.drawString(30, y, HEADERS[bank])
+        y -= LINE_HEIGHT
+        for idx in range(page * per_page, (page + 1) * per_page):
+            if columns:
+                _draw_row(c, y, columns, _table_cells(bank, idx, txs[idx]))
+                y -= LINE_HEIGHT
+                continue
+            for line in _format_line(bank, idx, txs[idx]):
+                c.drawString(30, y, line)
+                y -= LINE_HEIGHT
+        if bank == "HDFC" and page == pages - 1:
+            y -= LINE_HEIGHT
+            c.drawString(30, y, "STATEMENTSUMMARY :-")
+            y -= LINE_HEIGHT
+            c.drawString(30, y, "OpeningBalance DrCount CrCount Debits Credits ClosingBal")
+            y -= LINE_HEIGHT
+            c.drawString(30, y, " ".join([
+                _fmt(summary["opening_balance"]), str(summary["dr_count"]), str(summary["cr_count"]),
+                _fmt(summary["printed_debits"]), _fmt(summary["printed_credits"]), _fmt(summary["printed_closing"]),
+            ]))
+        c.showPage()
+    c.save()
+    return {"bank": bank, "pages": pages, "transactions": txs, "summary": summary}
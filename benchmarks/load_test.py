@@ -0,0 +1,426 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+    python benchmarks/load_test.py --sessions 1 4 8 -o load.json
+    python benchmarks/load_test.py --sessions 16 --statements 3 --pages 5 --shared-statements
+
+Drives N simulated sessions of frontend_v17.py in one process with Streamlit's
+AppTest, each on its own thread as the server runs each session's script on
+its own thread. Every session logs in through the login form
+(auth.begin_login), uploads synthetic statements with save_uploaded_files, runs
+the analysis and polls it to completion, then changes filters, the search and
+the dashboard tab. For each session count the report gives p50/p95 rerun
+latency (overall and per action), how long SQLite statements waited for a
+lock, and the process RSS. All data goes to a throwaway
+BANK_ANALYZER_DATA_DIR, so user_data is never touched.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "frontend_v17.py")
+sys.path.insert(0, ROOT)
+
+# sqlite3.connect's default busy timeout, kept while lock waits are timed here instead
+LOCK_TIMEOUT_S = 5.0
+PASSWORD = "load-test"
+FILTER_TYPES = ["Debit", "Credit", "All"]
+SEARCH_TERMS = ["SWIGGY", "RENT", ""]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# SQLite lock waits
+# ──────────────────────────────────────────────────────────────────────────────
+class LockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = []
+        self.timeouts = 0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits.append(seconds)
+            self.timeouts += timed_out
+
+    def reset(self):
+        with self._lock:
+            self.waits, self.timeouts = [], 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            waits = sorted(self.waits)
+        return {
+            "waits": len(waits),
+            "total_s": round(sum(waits), 4),
+            "p95_s": round(_percentile(waits, 95), 4) if waits else 0.0,
+            "max_s": round(waits[-1], 4) if waits else 0.0,
+            "timeouts": self.timeouts,
+        }
+
+
+lock_stats = LockStats()
+
+
+def _retry_locked(call, *args):
+    """
+    Runs a statement on a connection opened without a busy timeout, retrying while the
+    database is locked as SQLite's busy handler would, and records how long it waited.
+    """
+    started, delay = None, 0.001
+    while True:
+        try:
+            result = call(*args)
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            now = time.perf_counter()
+            started = started if started is not None else now
+            if now - started > LOCK_TIMEOUT_S:
+                lock_stats.record(now - started, timed_out=True)
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+            continue
+        if started is not None:
+            lock_stats.record(time.perf_counter() - started)
+        return result
+
+
+class LockTimingCursor(sqlite3.Cursor):
+    def execute(self, *args):
+        return _retry_locked(super().execute, *args)
+
+    def executemany(self, *args):
+        return _retry_locked(super().executemany, *args)
+
+
+class LockTimingConnection(sqlite3.Connection):
+    def cursor(self, factory=LockTimingCursor):
+        return super().cursor(factory)
+
+    # these create their cursor in C, bypassing cursor()
+    def execute(self, *args):
+        return _retry_locked(super().execute, *args)
+
+    def executemany(self, *args):
+        return _retry_locked(super().executemany, *args)
+
+    def commit(self):
+        return _retry_locked(super().commit)
+
+
+class _TimedSqlite:
+    """Stands in for the sqlite3 module inside bank_analyzer.db."""
+
+    def __getattr__(self, name):
+        return getattr(sqlite3, name)
+
+    @staticmethod
+    def connect(database, **kwargs):
+        kwargs.update(timeout=0, factory=LockTimingConnection)
+        return sqlite3.connect(database, **kwargs)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Process memory
+# ──────────────────────────────────────────────────────────────────────────────
+def rss_mb() -> float:
+    """Current resident set size; the peak so far where /proc is not available."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = self.start_mb = rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self) -> dict:
+        self._stop_event.set()
+        self.join()
+        end = rss_mb()
+        return {"start_mb": round(self.start_mb, 1), "peak_mb": round(max(self.peak, end), 1), "end_mb": round(end, 1)}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# AppTest sessions
+# ──────────────────────────────────────────────────────────────────────────────
+def share_app_test_runtime():
+    """
+    AppTest installs a mock Runtime for the length of each run and clears it after,
+    and patches global.appTest the same way; runs on other threads then find no
+    runtime. Give every run a shared fallback so sessions can run concurrently.
+    It also compiles the script on every run; like the server, compile it once
+    (concurrent ast.parse calls are not thread-safe on Python 3.11).
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    script_cache = ScriptCache()
+    get_bytecode = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, script_path: get_bytecode(script_cache, script_path)
+
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: cls._instance or shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option("global.appTest", True)
+
+
+class Upload:
+    """The parts of Streamlit's UploadedFile that save_uploaded_files uses."""
+
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+        with open(path, "rb") as fh:
+            self._data = fh.read()
+
+    def getbuffer(self):
+        return memoryview(self._data)
+
+
+class SimulatedSession:
+    def __init__(self, account: str, statements: list, rounds: int, poll_s: float, timeout: float):
+        self.account = account
+        self.statements = statements
+        self.rounds = rounds
+        self.poll_s = poll_s
+        self.timeout = timeout
+        self.reruns = []
+        self.upload_s = None
+        self.analysis_s = None
+        self.errors = []
+
+    def _rerun(self, action: str, run):
+        start = time.perf_counter()
+        at = run()
+        self.reruns.append((action, time.perf_counter() - start))
+        self.errors.extend(f"{action}: {e.value}" for e in at.exception)
+        return at
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+    def _run(self):
+        from streamlit.testing.v1 import AppTest
+
+        from bank_analyzer.db import save_uploaded_files
+
+        at = AppTest.from_file(APP, default_timeout=self.timeout)
+        self._rerun("open", at.run)
+        at.text_input(key="login_user").input(self.account)
+        at.text_input(key="login_pass").input(PASSWORD)
+        self._rerun("login", at.button(key="login_btn").click().run)
+        while "login_attempt" in at.session_state:
+            time.sleep(self.poll_s)
+            self._rerun("login", at.run)
+        if not at.session_state["authenticated"]:
+            raise RuntimeError(f"{self.account} could not log in")
+
+        start = time.perf_counter()
+        save_uploaded_files(self.account, [Upload(p) for p in self.statements])
+        self.upload_s = time.perf_counter() - start
+        self._rerun("refresh", at.run)
+        self._rerun("select", at.button(key="library_select_all").click().run)
+
+        start = time.perf_counter()
+        run_button = next(b for b in at.button if "Run Analysis" in b.label)
+        self._rerun("run_analysis", run_button.click().run)
+        job = at.session_state["analysis_job"]
+        while job.active:
+            time.sleep(self.poll_s)
+            self._rerun("poll", at.run)
+        self._rerun("poll", at.run)
+        self.analysis_s = time.perf_counter() - start
+
+        tabs = at.radio(key="dashboard_tab").options
+        for i in range(self.rounds):
+            at.radio(key="dashboard_tab").set_value(tabs[0])
+            self._rerun("tab", at.run)
+            at.selectbox(key="cached_filter_type").set_value(FILTER_TYPES[i % len(FILTER_TYPES)])
+            self._rerun("filter", at.run)
+            at.text_input(key="cached_search").input(SEARCH_TERMS[i % len(SEARCH_TERMS)])
+            self._rerun("search", at.run)
+            at.radio(key="dashboard_tab").set_value(tabs[1 + i % (len(tabs) - 1)])
+            self._rerun("tab", at.run)
+
+
+def _percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))]
+
+
+def _latency(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_s": round(_percentile(values, 50), 4),
+        "p95_s": round(_percentile(values, 95), 4),
+        "max_s": round(values[-1], 4) if values else 0.0,
+    }
+
+
+def make_statements(workdir: str, sessions: int, count: int, pages: int, shared: bool) -> list:
+    """Statement paths per session, cycling through the bank formats; the same files for all when shared."""
+    from bank_analyzer.synthetic import BANKS, write_statement
+
+    out = []
+    for s in range(1 if shared else sessions):
+        paths = []
+        for j in range(count):
+            bank = BANKS[(s + j) % len(BANKS)]
+            seed = j if shared else s * 100 + j
+            path = os.path.join(workdir, f"{bank.lower()}_{pages}p_seed{seed}.pdf")
+            if not os.path.exists(path):
+                write_statement(path, bank, pages=pages, seed=seed)
+            paths.append(path)
+        out.append(paths)
+    return out * sessions if shared else out
+
+
+def run_level(sessions: int, args, workdir: str, level: int) -> dict:
+    from bank_analyzer import parse_cache, session_data
+    from bank_analyzer.db import register_user_db
+
+    statements = make_statements(workdir, sessions, args.statements, args.pages, args.shared_statements)
+    users = []
+    for i in range(sessions):
+        account = f"load{level}_{i}"
+        register_user_db(account, PASSWORD)
+        users.append(SimulatedSession(account, statements[i], args.rounds, args.poll, args.timeout))
+
+    lock_stats.reset()
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    threads = []
+    for i, user in enumerate(users):
+        threads.append(threading.Thread(target=user.run, name=user.account))
+        threads[-1].start()
+        if args.ramp and i < len(users) - 1:
+            time.sleep(args.ramp / len(users))
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    rss = sampler.stop()
+
+    by_action = {}
+    for user in users:
+        for action, seconds in user.reruns:
+            by_action.setdefault(action, []).append(seconds)
+    return {
+        "sessions": sessions,
+        "wall_s": round(wall, 3),
+        "reruns": _latency([s for values in by_action.values() for s in values]),
+        "reruns_by_action": {action: _latency(values) for action, values in sorted(by_action.items())},
+        "interaction_reruns": _latency([s for a in ("filter", "search", "tab") for s in by_action.get(a, [])]),
+        "analysis": _latency([u.analysis_s for u in users if u.analysis_s is not None]),
+        "upload": _latency([u.upload_s for u in users if u.upload_s is not None]),
+        "sqlite_lock_waits": lock_stats.summary(),
+        "rss": rss,
+        "session_data": session_data.usage(),
+        "parse_cache": parse_cache.usage(),
+        "errors": [f"{u.account}: {e}" for u in users for e in u.errors],
+    }
+
+
+def _print_level(r: dict):
+    rr, ir, locks, rss = r["reruns"], r["interaction_reruns"], r["sqlite_lock_waits"], r["rss"]
+    print(f"{r['sessions']:4} sessions  {r['wall_s']:8.2f}s wall  "
+          f"rerun p50 {rr['p50_s']:.3f}s p95 {rr['p95_s']:.3f}s  "
+          f"filter/tab p50 {ir['p50_s']:.3f}s p95 {ir['p95_s']:.3f}s  "
+          f"analysis p95 {r['analysis']['p95_s']:.2f}s  "
+          f"lock waits {locks['waits']} ({locks['total_s']:.3f}s, max {locks['max_s']:.3f}s)  "
+          f"RSS {rss['start_mb']:.0f}->{rss['peak_mb']:.0f} MB  errors {len(r['errors'])}")
+    for err in r["errors"][:5]:
+        print(f"      {err}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 4, 8],
+                        help="concurrent session counts, run one after another")
+    parser.add_argument("--statements", type=int, default=2, help="statements each session uploads")
+    parser.add_argument("--pages", type=int, default=3, help="pages per statement")
+    parser.add_argument("--shared-statements", action="store_true",
+                        help="every session uploads the same files (one team account, several tabs)")
+    parser.add_argument("--rounds", type=int, default=3, help="filter/search/tab changes per session")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which sessions start")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between reruns while the analysis runs")
+    parser.add_argument("--timeout", type=float, default=300.0, help="limit for a single rerun")
+    parser.add_argument("--data-dir", help="BANK_ANALYZER_DATA_DIR for the run (default: temporary directory)")
+    parser.add_argument("--workdir", help="keep generated PDFs here (default: temporary directory)")
+    parser.add_argument("-o", "--output", default="load_output.json")
+    args = parser.parse_args(argv)
+
+    # before anything imports bank_analyzer.db
+    os.environ["BANK_ANALYZER_DATA_DIR"] = args.data_dir or tempfile.mkdtemp(prefix="bank_load_")
+    from bank_analyzer import db
+
+    from run_benchmarks import _git_revision
+
+    db.sqlite3 = _TimedSqlite()
+    share_app_test_runtime()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bank_load_pdfs_")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    for level, sessions in enumerate(args.sessions):
+        results.append(run_level(sessions, args, workdir, level))
+        _print_level(results[-1])
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "data_dir": db.DATA_DIR,
+            **{k: v for k, v in vars(args).items() if k not in ("output", "data_dir", "workdir")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"Results written to {args.output}")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Parser and dashboard benchmarks over synthetic statements.
+
+    python benchmarks/run_benchmarks.py --pages 1 10 50 -o bench.json
+    python benchmarks/run_benchmarks.py --pages 1 10 50 -o new.json --baseline bench.json
+
+Generates HDFC/IDBI/Axis/ADCB-style PDFs with bank_analyzer.synthetic, then
+times extract_pages_text, parse_pdf_file, infer_types_by_delta, the
+column-table reader (HDFC/ADCB), detect_category, each dashboard aggregation, computing and merging a
+file's partial aggregates and the recurring-payment detector separately. Results go to a
+JSON file; --baseline compares against an earlier run and flags stages that
+got slower than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank_analyzer import dashboard, page_cache, partials, recurring  # noqa: E402
+from bank_analyzer.categories import DEFAULT_CATEGORIES, detect_category  # noqa: E402
+from bank_analyzer.parsing import (  # noqa: E402
+    extract_pages, extract_pages_text, infer_types_by_delta, parse_pdf_file, table_layout, table_rows
+)
+from bank_analyzer.synthetic import BANKS, write_statement  # noqa: E402
+
+
+def time_stage(fn, repeat: int):
+    """Runs fn repeat times; returns (timings, last result)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t0)
+    return timings, result
+
+
+def _record(bank, pages, rows, stage, timings):
+    best = min(timings)
+    return {
+        "bank": bank,
+        "pages": pages,
+        "rows": rows,
+        "stage": stage,
+        "runs": len(timings),
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(timings), 6),
+        "pages_per_s": round(pages / best, 2) if best > 0 else None,
+    }
+
+
+def bench_statement(path: str, bank: str, pages: int, repeat: int) -> list:
+    import pandas as pd
+
+    out = []
+    timings, _ = time_stage(lambda: extract_pages_text(path, None), repeat)
+    out.append(_record(bank, pages, None, "extract_pages_text", timings))
+
+    timings, (rows, printed) = time_stage(lambda: parse_pdf_file(path, None), repeat)
+    n = len(rows)
+    out.append(_record(bank, pages, n, "parse_pdf_file", timings))
+    if not rows:
+        return out
+
+    tx_records = [{"Amount": r["Amount"], "Balance": r["Balance"], "Remarks": r["Remarks"]} for r in rows]
+    first = rows[0]
+    opening = printed.get("opening_balance")
+    if opening is None:
+        opening = first["Balance"] - first["Amount"] if first["Type"] == "CR" else first["Balance"] + first["Amount"]
+    timings, _ = time_stage(lambda: infer_types_by_delta(tx_records, opening), repeat)
+    out.append(_record(bank, pages, n, "infer_types_by_delta", timings))
+
+    texts, tables = extract_pages(path, None)
+    layout_name = table_layout(texts)
+    if layout_name and tables is not None:
+        timings, _ = time_stage(lambda: table_rows(tables, layout_name, path), repeat)
+        out.append(_record(bank, pages, n, "table_rows", timings))
+
+    remarks = [r["Remarks"] for r in rows]
+    timings, categories = time_stage(lambda: [detect_category(r, DEFAULT_CATEGORIES) for r in remarks], repeat)
+    out.append(_record(bank, pages, n, "detect_category", timings))
+
+    df = pd.DataFrame(rows)
+    df["Category"] = categories
+    for name in ("computed_totals", "file_summary", "monthly_summary", "category_summary", "merchant_summary",
+                 "top_transactions"):
+        fn = getattr(dashboard, name)
+        timings, _ = time_stage(lambda: fn(df), repeat)
+        out.append(_record(bank, pages, n, f"dashboard.{name}", timings))
+    timings, parts = time_stage(lambda: partials.compute(df, key=path), repeat)
+    out.append(_record(bank, pages, n, "partials.compute", timings))
+    timings, _ = time_stage(lambda: partials.add(parts, parts), repeat)
+    out.append(_record(bank, pages, n, "partials.add", timings))
+    timings, _ = time_stage(lambda: recurring.detect_recurring(df), repeat)
+    out.append(_record(bank, pages, n, "recurring.detect_recurring", timings))
+    return out
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(current: list, baseline: list, threshold: float) -> list:
+    """Stages whose best time grew by more than threshold (a ratio, e.g. 1.25) versus the baseline."""
+    base = {(r["bank"], r["pages"], r["stage"]): r for r in baseline}
+    regressions = []
+    for r in current:
+        old = base.get((r["bank"], r["pages"], r["stage"]))
+        if not old or not old["best_s"]:
+            continue
+        ratio = r["best_s"] / old["best_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        print(f"{r['bank']:5} {r['pages']:4}p {r['stage']:28} {old['best_s']:10.5f}s -> {r['best_s']:10.5f}s  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(dict(r, baseline_best_s=old["best_s"], ratio=round(ratio, 3)))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--banks", nargs="+", default=list(BANKS), choices=list(BANKS))
+    parser.add_argument("--pages", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_output.json")
+    parser.add_argument("--workdir", help="keep generated PDFs here (default: temporary directory)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--page-cache", action="store_true",
+                        help="leave the page text cache on (extraction is then only measured on the first run)")
+    args = parser.parse_args(argv)
+
+    if not args.page_cache:
+        page_cache.configure(enabled=False)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bank_bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    results = []
+    for bank in args.banks:
+        for pages in args.pages:
+            path = os.path.join(workdir, f"{bank.lower()}_{pages}p_seed{args.seed}.pdf")
+            if not os.path.exists(path):
+                write_statement(path, bank, pages=pages, seed=args.seed)
+            recs = bench_statement(path, bank, pages, args.repeat)
+            for r in recs:
+                print(f"{bank:5} {pages:4}p {r['stage']:28} {r['best_s']:10.5f}s")
+            results.extend(recs)
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "page_cache": args.page_cache,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than x{args.threshold} of the baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
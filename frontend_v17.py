@@ -1,16 +1,24 @@
 import streamlit as st
-import pdfplumber
-import re
 import pandas as pd
-import matplotlib.pyplot as plt
-import sqlite3
+import functools
 import os
-import hashlib
+import uuid
 from datetime import datetime
-from difflib import get_close_matches
 import plotly.express as px
 import plotly.graph_objects as go
 
+from bank_analyzer.db import (
+    DATA_DIR, save_uploaded_files,
+    get_saved_pdfs, delete_pdf, rename_pdf
+)
+from bank_analyzer import (
+    auth, dashboard, excel_report, export, fx, instrument, library, merchants, partials, pdf_report, recurring, parse_cache, reports, session_data
+)
+from bank_analyzer.jobs import AnalysisJob, CANCELLED, FAILED
+from bank_analyzer.parsing import aggregate_results, merge_aggregated
+from bank_analyzer.currency import default_reporting_currency, format_money, statement_currencies, symbol_for
+from bank_analyzer.categories import DEFAULT_CATEGORIES, DEFAULT_CATEGORY_KEYWORDS, detect_category
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Page Configuration
 # ──────────────────────────────────────────────────────────────────────────────
@@ -166,658 +174,785 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Setup
+# Timing diagnostics
 # ──────────────────────────────────────────────────────────────────────────────
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "user_data")
-UPLOAD_ROOT = os.path.join(DATA_DIR, "uploads")
-DB_PATH = os.path.join(DATA_DIR, "bank_app.db")
-
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(UPLOAD_ROOT, exist_ok=True)
+METRICS_PATH = os.path.join(DATA_DIR, "metrics", "metrics.jsonl")
+instrument.register_sink("jsonl", instrument.jsonl_sink(METRICS_PATH))
+
+def render_diagnostics(records):
+    """Per-file and per-rerun stage timings from the instrument records of the last analysis."""
+    if not records:
+        return
+    with st.expander("⏱️ Diagnostics", expanded=False):
+        table = pd.DataFrame([instrument.flatten(r) for r in records])
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.caption(f"Timings are also appended to {METRICS_PATH}")
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Helpers
+# Reconciliation diagnostics
 # ──────────────────────────────────────────────────────────────────────────────
-def hash_pw(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+def render_reconciliation(diagnostics):
+    """Per-file balance-chain and printed-totals check, shown under the summary metrics."""
+    if not diagnostics:
+        return
+    mismatched = [d for d in diagnostics if d.get("status") == "mismatch"]
+    label = f"🧮 Reconciliation — {len(mismatched)} file(s) need attention" if mismatched else "🧮 Reconciliation — all files balance"
+    with st.expander(label, expanded=bool(mismatched)):
+        table = pd.DataFrame([{
+            "File": d.get("file"),
+            "Status": d.get("status"),
+            "Rows": d.get("rows"),
+            "Breaks repaired": d.get("breaks_repaired"),
+            "Breaks unresolved": d.get("breaks_unresolved"),
+            "Credit Δ": d.get("credit_delta"),
+            "Debit Δ": d.get("debit_delta"),
+            "Closing Δ": d.get("closing_delta"),
+        } for d in diagnostics])
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        breaks = [dict(b, File=d.get("file")) for d in diagnostics for b in d.get("breaks", []) if not b.get("repaired")]
+        if breaks:
+            st.caption("Unresolved breaks (likely missed or wrapped lines)")
+            st.dataframe(
+                pd.DataFrame(breaks)[["File", "page", "date", "kind", "gap"]],
+                use_container_width=True,
+                hide_index=True
+            )
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Database helpers
+# Session datasets
 # ──────────────────────────────────────────────────────────────────────────────
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            account_number TEXT PRIMARY KEY,
-            password TEXT NOT NULL
-        )
-    """)
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS pdf_files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            account_number TEXT NOT NULL,
-            filename TEXT NOT NULL,
-            filepath TEXT NOT NULL,
-            uploaded_at TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    return conn
-
-def register_user_db(account_number: str, password: str):
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM users WHERE account_number=?", (account_number,))
-    if cur.fetchone():
-        conn.close()
-        return False, "Account already exists!"
-    cur.execute("INSERT INTO users (account_number, password) VALUES (?, ?)", (account_number, hash_pw(password)))
-    conn.commit()
-    conn.close()
-    return True, "Registration successful!"
-
-def login_user_db(account_number: str, password: str):
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT password FROM users WHERE account_number=?", (account_number,))
-    row = cur.fetchone()
-    conn.close()
-    if not row:
-        return False, "User not found!"
-    if row[0] != hash_pw(password):
-        return False, "Incorrect password!"
-    return True, "Login successful!"
-
-def save_uploaded_files(account_number: str, files):
-    user_dir = os.path.join(UPLOAD_ROOT, account_number)
-    os.makedirs(user_dir, exist_ok=True)
-    saved_paths = []
-    conn = get_db()
-    for f in files:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        fname = f"{ts}__{f.name}"
-        fpath = os.path.join(user_dir, fname)
-        with open(fpath, "wb") as out:
-            out.write(f.getbuffer())
-        conn.execute(
-            "INSERT INTO pdf_files (account_number, filename, filepath, uploaded_at) VALUES (?, ?, ?, ?)",
-            (account_number, f.name, fpath, datetime.now().isoformat(timespec="seconds"))
-        )
-        saved_paths.append(fpath)
-    conn.commit()
-    conn.close()
-    return saved_paths
-
-def get_saved_pdfs(account_number: str):
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, filename, filepath, uploaded_at FROM pdf_files WHERE account_number=? ORDER BY uploaded_at DESC",
-        (account_number,)
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return [{"id": r[0], "filename": r[1], "filepath": r[2], "uploaded_at": r[3]} for r in rows]
-
-def delete_pdf(pdf_id: int):
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("SELECT filepath FROM pdf_files WHERE id=?", (pdf_id,))
-    row = cur.fetchone()
-    if row:
-        try:
-            os.remove(row[0])
-        except FileNotFoundError:
-            pass
-        cur.execute("DELETE FROM pdf_files WHERE id=?", (pdf_id,))
-    conn.commit()
-    conn.close()
+# Row-level frames live in session_data, under one memory budget shared by every
+# session; cold ones are spilled to disk and read back on their next use.
+def data_session():
+    """Id of this browser session's frames in session_data."""
+    if "data_session" not in st.session_state:
+        st.session_state.data_session = uuid.uuid4().hex
+    return st.session_state.data_session
+
+def session_frame(name):
+    return session_data.get(data_session(), name)
+
+def store_session_frame(name, df):
+    """Stores (or, with None, drops) a frame; call again after editing a frame in place."""
+    if df is None:
+        session_data.drop(data_session(), name)
+        return None
+    return session_data.put(data_session(), name, df, owner=st.session_state.username)
+
+def has_dataset():
+    return session_data.contains(data_session(), "last_df")
+
+def dataset():
+    """The analyzed rows (last_df); None when there are none."""
+    return session_frame("last_df")
+
+def set_dataset(df):
+    return store_session_frame("last_df", None if df is None else session_data.compact(df))
+
+def file_frame(path):
+    """Categorized rows of one cached statement (see sync_analysis)."""
+    return session_frame(f"file:{path}")
+
+def set_file_frame(path, df):
+    return store_session_frame(f"file:{path}", None if df is None else session_data.compact(df))
+
+def cached_frame(name, key, build):
+    """A frame derived from last_df, kept in session_data and rebuilt when key changes."""
+    if st.session_state.get(f"{name}_key") == key:
+        frame = session_frame(name)
+        if frame is not None:
+            return frame
+    frame = store_session_frame(name, build())
+    st.session_state[f"{name}_key"] = key
+    return frame
 
 # ──────────────────────────────────────────────────────────────────────────────
-# PDF parsing
+# Background analysis
 # ──────────────────────────────────────────────────────────────────────────────
+RESULT_KEYS = ("last_reconciliation", "last_printed_totals", "last_file_status", "last_file_metrics",
+               "reporting_currency", "reporting_view_key", "transactions_view_key", "job_synced_version",
+               "export_payload", "analysis_paths", "dataset_paths", "analysis_partials")
+# statuses of a parse worth retrying on the next run (a wrong password, an unreadable file)
+RETRY_STATUSES = ("open_failed", "error")
 
-# Helper regexes for delta-based HDFC parsing
-DATE_LINE_RE = re.compile(r"^\s*(\d{2}/\d{2}/\d{2}(?:\d{2})?|\d{2}/\d{2}/\d{4})\b")
-NUM_RE = re.compile(r"[\d,]+\.\d{2}")
-
-def extract_pages_text(pdf_path: str, account_password: str = None) -> list:
-    text_pages = []
-    try:
-        if account_password:
-            with pdfplumber.open(pdf_path, password=account_password) as pdf:
-                for p in pdf.pages:
-                    text_pages.append(p.extract_text() or "")
-        else:
-            with pdfplumber.open(pdf_path) as pdf:
-                for p in pdf.pages:
-                    text_pages.append(p.extract_text() or "")
-    except Exception as e:
-        # try without password if initial failed
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for p in pdf.pages:
-                    text_pages.append(p.extract_text() or "")
-        except Exception as e2:
-            raise e2
-    return text_pages
-
-def parse_amount_and_balance_from_line(line: str):
-    nums = NUM_RE.findall(line)
-    if not nums:
-        return None, None
-    closing = float(nums[-1].replace(",", ""))
-    amount = float(nums[-2].replace(",", "")) if len(nums) >= 2 else None
-    return amount, closing
-
-def infer_types_by_delta(tx_records: list, opening_balance: float, tolerance: float = 0.6):
+def start_analysis(paths, user, display_names):
     """
-    Infer Type for each tx_record using opening_balance and closing balances.
-    Returns list of dicts with inference_reason.
+    Makes paths the analysis: files parsed earlier in this session come from the file
+    cache, and a background job parses only the others.
     """
-    recs = []
-    prev_bal = opening_balance
-    for t in tx_records:
-        amt = float(t['Amount']) if t['Amount'] is not None else 0.0
-        new_bal = float(t['Balance'])
-        delta = round(new_bal - prev_bal, 2)
-        reason = None
-
-        # If delta equals +amount -> credit, if delta equals -amount -> debit
-        if abs(delta - amt) <= tolerance:
-            typ = "CR"
-            reason = "delta_matches_plus_amount"
-        elif abs(delta + amt) <= tolerance:
-            typ = "DR"
-            reason = "delta_matches_minus_amount"
-        else:
-            # fallback to textual tokens
-            if re.search(r"\b(CR|NEFT CR|NEFTCR|CREDIT|DEPOSIT|REFUND|INTEREST)\b", t['Remarks'], flags=re.I):
-                typ = "CR"; reason = "text_credit_token"
-            elif re.search(r"\b(ATW|POS|IMPS|UPI|WITHDRAWAL|ATM|DEBIT)\b", t['Remarks'], flags=re.I):
-                typ = "DR"; reason = "text_debit_token"
-            else:
-                typ = "CR" if delta > 0 else "DR"
-                reason = "delta_sign_fallback"
-
-        rec = {
-            "Date": t.get('Date', ''),
-            "Remarks": t.get('Remarks', ''),
-            "Amount": amt,
-            "Type": typ,
-            "Balance": new_bal,
-            "Page": t.get('Page', None),
-            "inference_reason": reason,
-            "delta": delta
-        }
-        recs.append(rec)
-        prev_bal = new_bal
-    return recs
+    job = st.session_state.get("analysis_job")
+    if job is not None:
+        # keep what the previous job finished; files still in flight are parsed again if needed
+        sync_analysis(job)
+        if job.active:
+            job.cancel()
+    cache = st.session_state.setdefault("file_cache", {})
+    for path in paths:
+        if path in cache and cache[path]["aggregated"]["file_status"][0]["status"] in RETRY_STATUSES:
+            del cache[path]
+    todo = [p for p in paths if p not in cache]
+    st.session_state.job_display_names = display_names
+    st.session_state.analysis_paths = list(paths)
+    st.session_state.pop("job_synced_version", None)
+    if todo:
+        st.session_state.analysis_job = AnalysisJob(todo, account_password=user, name=user).start()
+    else:
+        st.session_state.pop("analysis_job", None)
+    refresh_dataset()
+
+def sync_analysis(job):
+    """Adds the files the job finished since the last rerun to the file cache."""
+    # read before completed(): a file finishing meanwhile is then picked up on the next rerun
+    version = job.version
+    if version == st.session_state.get("job_synced_version"):
+        return
+    cache = st.session_state.setdefault("file_cache", {})
+    names = st.session_state.get("job_display_names", {})
+    for path, rows, printed in job.completed():
+        if path in cache:
+            continue
+        if rows:
+            frame = pd.DataFrame(rows)
+            frame["Source File"] = frame["Source File"].apply(lambda x: names.get(x, x))
+            frame["Category"] = frame["Remarks"].apply(lambda r: detect_category(r, st.session_state.categories))
+            frame["Merchant ID"] = merchants.merchant_ids(frame["Remarks"])
+            set_file_frame(path, frame)
+        _, aggregated = aggregate_results([path], [(rows, printed)], emit_metrics=False)
+        # the shared parse result stays cached while this session uses the file
+        digest = printed.get("content_hash")
+        if digest:
+            parse_cache.acquire(digest, data_session())
+        # partials are filled per reporting currency on first use (see file_partials)
+        cache[path] = {"rows": len(rows), "digest": digest, "aggregated": aggregated, "partials": {}}
+    st.session_state.job_synced_version = version
+    refresh_dataset()
+
+def refresh_dataset():
+    """Rebuilds last_df and the per-file results from the cached files of the analysis, when that set changed."""
+    cache = st.session_state.setdefault("file_cache", {})
+    ready = tuple(p for p in st.session_state.get("analysis_paths", []) if p in cache)
+    if ready == st.session_state.get("dataset_paths"):
+        return
+    frames = []
+    for path in [p for p in ready if cache[p]["rows"]]:
+        frame = file_frame(path)
+        if frame is None:
+            # its spill file is gone: the next run parses the statement again
+            del cache[path]
+            continue
+        frames.append(frame)
+    st.session_state.dataset_paths = ready = tuple(p for p in ready if p in cache)
+    set_dataset(pd.concat(frames, ignore_index=True) if frames else None)
+    aggregated = merge_aggregated(cache[p]["aggregated"] for p in ready)
+    st.session_state.last_printed_totals = {
+        "printed_credits": aggregated.get("printed_credits"),
+        "printed_debits": aggregated.get("printed_debits"),
+        "printed_by_currency": aggregated.get("printed_by_currency", {}),
+    }
+    st.session_state.last_reconciliation = aggregated.get("reconciliation", [])
+    st.session_state.last_file_status = aggregated.get("file_status", [])
+    st.session_state.last_file_metrics = aggregated.get("metrics", [])
+    mark_dataset_changed()
+
+def forget_file(path):
+    """Drops a file from the cache, e.g. once it is deleted from the library."""
+    entry = st.session_state.get("file_cache", {}).pop(path, None)
+    if entry is not None and entry["digest"]:
+        parse_cache.release(entry["digest"], data_session())
+    set_file_frame(path, None)
+    if path in st.session_state.get("analysis_paths", []):
+        st.session_state.analysis_paths.remove(path)
+    refresh_dataset()
+
+@st.fragment(run_every=1.0)
+def render_job_progress(job):
+    """Polls a running job; triggers a full rerun whenever new files are ready or the job stops."""
+    done, total = job.progress()
+    label = f"🔄 Parsed {done} of {total} file(s)"
+    if job.current:
+        label += f" — {job.current}"
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.progress(done / total if total else 1.0, text=label)
+    with col2:
+        if st.button("⏹️ Cancel", key="cancel_analysis", use_container_width=True, disabled=not job.active):
+            job.cancel()
+    if job.version != st.session_state.get("job_synced_version") or not job.active:
+        st.rerun()
+
+def render_job_status(job):
+    """Progress while the job runs; per-file problems and a resume option once it stops."""
+    if job.active:
+        render_job_progress(job)
+    elif job.status == CANCELLED:
+        done, total = job.progress()
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.info(f"⏸️ Analysis cancelled after {done} of {total} file(s); the results below are partial.")
+        with col2:
+            if st.button("▶️ Resume", key="resume_analysis", use_container_width=True):
+                job.resume()
+                st.rerun()
+    elif job.status == FAILED:
+        st.error(f"❌ Analysis stopped: {job.error}")
+
+    for fs in st.session_state.get("last_file_status", []):
+        if fs["status"] in ("open_failed", "wrong_password", "error"):
+            st.error(fs["error"])
+        elif fs["status"] == "no_text":
+            st.warning(fs["error"])
+    if not job.active and job.status != CANCELLED and not has_dataset():
+        st.error("❌ No valid transactions found. Please check your PDF format.")
 
-def _score_opening_for_records(opening, tx_records, tolerance=0.6, sample_size=6):
+# ──────────────────────────────────────────────────────────────────────────────
+# Reporting currency
+# ──────────────────────────────────────────────────────────────────────────────
+def reporting_currency():
+    """Currency the dashboard reports in: the one picked in the selector, else the one most transactions are in."""
+    return (st.session_state.get("reporting_currency")
+            or default_reporting_currency(st.session_state.get("last_file_status")))
+
+def convertible_currencies():
+    """Currencies the FX rate table can convert between (none when it cannot be read)."""
+    try:
+        return fx.known_currencies(fx.load_rates())
+    except (OSError, ValueError):
+        return []
+
+def reporting_view(df):
+    """last_df with Amount converted to the reporting currency, computed once per (dataset, currency)."""
+    code = reporting_currency()
+    if fx.currencies_of(df) in ([], [code]):
+        return df
+    try:
+        rates = fx.load_rates()
+        return cached_frame("reporting_view", (st.session_state.get("dataset_version", 0), code),
+                            lambda: fx.to_reporting(df, code, rates))
+    except (OSError, ValueError) as e:
+        st.warning(f"⚠️ Cannot convert to {code}: {e}. Amounts are shown in their statement currencies.")
+        return df
+
+def reporting_printed_totals():
     """
-    Runs infer_types_by_delta on a small sample and returns a score:
-    count of records where inference_reason indicates delta match.
+    Printed totals comparable with the reporting-currency amounts: statements only print
+    totals in their own currency, so they are dropped when any statement is in another one.
     """
-    sample = tx_records[:min(sample_size, len(tx_records))]
-    recs = infer_types_by_delta(sample, opening, tolerance=tolerance)
-    score = sum(1 for r in recs if r.get("inference_reason", "").startswith("delta_matches"))
-    return score
-
-def extract_statement_summary(full_text: str):
-    # Try to extract the opening balance & printed summary values (best-effort)
-    opening = None
-    printed_debits = None
-    printed_credits = None
-    printed_closing = None
-
-    m = re.search(
-        r"STATEMENTSUMMARY\s*[:\-]?\s*[\r\n]+(?:OpeningBalance\s+DrCount\s+CrCount\s+Debits\s+Credits\s+ClosingBal)[\r\n]+([0-9\.,\s]+)\s+\d+\s+\d+\s+([0-9\.,]+)\s+([0-9\.,]+)\s+([0-9\.,]+)",
-        full_text,
-        flags=re.IGNORECASE
-    )
-    if m:
-        try:
-            opening = float(m.group(1).replace(",", "").strip())
-            printed_debits = float(m.group(2).replace(",", "").strip())
-            printed_credits = float(m.group(3).replace(",", "").strip())
-            printed_closing = float(m.group(4).replace(",", "").strip())
-            return opening, printed_debits, printed_credits, printed_closing
-        except Exception:
-            pass
+    printed = st.session_state.get("last_printed_totals") or {}
+    by_currency = printed.get("printed_by_currency")
+    if by_currency is None:
+        # analyses saved before totals were kept per currency
+        return printed
+    code = reporting_currency()
+    if set(statement_currencies(st.session_state.get("last_file_status"))) | set(by_currency) <= {code}:
+        return by_currency.get(code, {})
+    return {}
+
+def render_currency_summary(df):
+    """Per-currency totals in statement units, when the statements are in more than one currency."""
+    summary = dashboard.currency_summary(df)
+    if len(summary) < 2:
+        return
+    printed = (st.session_state.get("last_printed_totals") or {}).get("printed_by_currency") or {}
+    table = pd.DataFrame({
+        "Credit": [format_money(v, symbol_for(c)) for c, v in summary["Total_Credit"].items()],
+        "Debit": [format_money(v, symbol_for(c)) for c, v in summary["Total_Debit"].items()],
+        "Net Flow": [format_money(v, symbol_for(c)) for c, v in summary["Net_Flow"].items()],
+        "Printed Credit": [format_money(printed[c]["printed_credits"], symbol_for(c)) if c in printed else "—" for c in summary.index],
+        "Printed Debit": [format_money(printed[c]["printed_debits"], symbol_for(c)) if c in printed else "—" for c in summary.index],
+        "Transactions": summary["Transactions"].tolist(),
+    }, index=summary.index.astype(str))
+    st.caption("Totals per statement currency (before conversion)")
+    st.dataframe(table, use_container_width=True)
 
-    m2 = re.search(r"OpeningBalance[:\s]*([\d,]+\.\d{2})", full_text, flags=re.IGNORECASE)
-    if m2:
+# ──────────────────────────────────────────────────────────────────────────────
+# Incremental aggregates
+# ──────────────────────────────────────────────────────────────────────────────
+def file_partials(path, code):
+    """partials of one cached file in the reporting currency, computed once per (file, currency)."""
+    entry = st.session_state.file_cache[path]
+    if code not in entry["partials"]:
+        frame = file_frame(path) if entry["rows"] else None
+        if frame is None:
+            entry["partials"][code] = partials.empty()
+            return entry["partials"][code]
         try:
-            opening = float(m2.group(1).replace(",", ""))
-            nums = NUM_RE.findall(full_text)
-            if len(nums) >= 3:
-                printed_debits = float(nums[-3].replace(",", ""))
-                printed_credits = float(nums[-2].replace(",", ""))
-                printed_closing = float(nums[-1].replace(",", ""))
-            return opening, printed_debits, printed_credits, printed_closing
-        except Exception:
+            frame = fx.to_reporting(frame, code, fx.load_rates())
+        except (OSError, ValueError):
+            # reporting_view has warned already and shows these amounts unconverted too
             pass
+        entry["partials"][code] = partials.compute(frame, key=path)
+    return entry["partials"][code]
 
-    # HDFC sometimes lists "Debits" and "Credits" in a table - try to capture more generically
-    m3 = re.search(r"Debits[:\s]*([\d,]+\.\d{2})\s+Credits[:\s]*([\d,]+\.\d{2})", full_text, flags=re.IGNORECASE)
-    if m3:
-        try:
-            printed_debits = float(m3.group(1).replace(",", ""))
-            printed_credits = float(m3.group(2).replace(",", ""))
-            nums = NUM_RE.findall(full_text)
-            if nums:
-                printed_closing = float(nums[-1].replace(",", ""))
-            return opening, printed_debits, printed_credits, printed_closing
-        except Exception:
-            pass
+def analysis_partials():
+    """
+    Totals, monthly and category partials of the dashboard data in the reporting currency.
+    For an analysis of parsed files, a file joining or leaving the selection adds or
+    subtracts that file's partials; a loaded analysis is reduced once per dataset version.
+    """
+    code = reporting_currency()
+    paths = st.session_state.get("dataset_paths")
+    state = st.session_state.get("analysis_partials")
+    if paths is None:
+        key = (st.session_state.get("dataset_version", 0), code)
+        if state is None or state.get("key") != key:
+            state = {"key": key, "parts": partials.compute(reporting_view(dataset()))}
+            st.session_state.analysis_partials = state
+        return state["parts"]
+
+    if state is None or state.get("currency") != code:
+        state = {"currency": code, "files": {}, "parts": partials.empty()}
+        st.session_state.analysis_partials = state
+    for path in [p for p in state["files"] if p not in paths]:
+        state["parts"] = partials.subtract(state["parts"], state["files"].pop(path))
+    for path in paths:
+        if path not in state["files"]:
+            state["files"][path] = file_partials(path, code)
+            state["parts"] = partials.add(state["parts"], state["files"][path])
+    return state["parts"]
+
+def reset_partials():
+    """Call after categories change: every file's partials are recomputed on next use."""
+    for entry in st.session_state.get("file_cache", {}).values():
+        entry["partials"].clear()
+    st.session_state.pop("analysis_partials", None)
+
+def file_display_names():
+    """Display name of each analyzed file path, for partials.file_summary (None for a loaded analysis)."""
+    paths = st.session_state.get("dataset_paths")
+    if paths is None:
+        return None
+    names = st.session_state.get("job_display_names", {})
+    return {p: names.get(os.path.basename(p), os.path.basename(p)) for p in paths}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Dashboard tabs (lazy)
+# ──────────────────────────────────────────────────────────────────────────────
+DASHBOARD_TABS = [
+    "📋 All Transactions",
+    "📂 By File",
+    "📆 Monthly Trends",
+    "📊 Category Analysis",
+    "🏆 Top Transactions",
+    "🏪 Top Merchants",
+    "🔁 Recurring Payments"
+]
 
-    return opening, printed_debits, printed_credits, printed_closing
+def mark_dataset_changed():
+    """Call after last_df is replaced or edited; invalidates the cached tab contents."""
+    st.session_state.dataset_version = st.session_state.get("dataset_version", 0) + 1
 
-# parse_pdf_file now returns (rows_list, printed_totals_dict)
-def parse_pdf_file(filepath: str, account_password: str):
+def cached_tab(name, build):
     """
-    Updated parser:
-    - Returns tuple: (rows_list, printed_totals_dict)
-      printed_totals_dict: {"printed_credits": float or None, "printed_debits": float or None, "printed_closing": float or None}
-    - For HDFC-style statements it extracts printed totals from summary when possible.
-    - For other banks it falls back to legacy parser but still attempts to extract printed totals.
+    Content of one dashboard tab, built on first view of the current dataset and reused
+    until last_df or the reporting currency changes; only the selected tab is ever built.
     """
-    try:
-        pages = extract_pages_text(filepath, account_password)
-    except Exception as e:
-        # original fallback to try opening without password
-        try:
-            pages = extract_pages_text(filepath, None)
-        except Exception as e2:
-            st.error(f"Failed to open PDF: {os.path.basename(filepath)} — {e2}")
-            return [], {"printed_credits": None, "printed_debits": None, "printed_closing": None, "opening_balance": None}
-
-    full_text = "\n\n".join(pages)
-    if not full_text.strip():
-        st.warning(f"Could not extract text from {os.path.basename(filepath)}")
-        return [], {"printed_credits": None, "printed_debits": None, "printed_closing": None, "opening_balance": None}
-
-    # Attempt to extract printed totals regardless (best-effort)
-    opening_balance, printed_debits, printed_credits, printed_closing = extract_statement_summary(full_text)
-    printed_totals = {
-        "printed_credits": printed_credits,
-        "printed_debits": printed_debits,
-        "printed_closing": printed_closing,
-        "opening_balance": opening_balance
+    key = (name, st.session_state.get("dataset_version", 0), reporting_currency())
+    cache = st.session_state.setdefault("tab_cache", {})
+    if key not in cache:
+        # entries of older dataset versions can never be hit again
+        for stale in [k for k in cache if k[1:] != key[1:]]:
+            del cache[stale]
+        cache[key] = build()
+    return cache[key]
+
+def build_transactions_view(df, currency_symbol):
+    """Display columns for the whole dataset, aligned with df's index; filters only select rows."""
+    display_df = pd.DataFrame(index=df.index)
+    display_df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    display_df["Date_display"] = display_df["Date"].dt.strftime("%d %b %Y")
+    display_df.loc[display_df["Date"].isna(), "Date_display"] = df.loc[display_df["Date"].isna(), "Date"].astype(str)
+    display_df["Amount"] = df["Amount"].apply(lambda x: format_money(x, currency_symbol))
+    if "Original Amount" in df.columns:
+        display_df["Original"] = [format_money(a, symbol_for(c)) for a, c in zip(df["Original Amount"], df["Currency"])]
+    for col in ["Type", "Category", "Remarks", "Source File"]:
+        display_df[col] = df[col]
+    return display_df
+
+def build_file_tab(file_summary, currency_symbol, currency_label):
+    file_summary_display = file_summary.copy()
+    for col in ["Total_Credit", "Total_Debit", "Net_Flow"]:
+        file_summary_display[col] = file_summary_display[col].apply(lambda x: format_money(x, currency_symbol))
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Credit', x=file_summary.index, y=file_summary['Total_Credit'], marker_color='#4CAF50'))
+    fig.add_trace(go.Bar(name='Debit', x=file_summary.index, y=file_summary['Total_Debit'], marker_color='#f44336'))
+    fig.update_layout(barmode='group', title="Credit vs Debit by File", xaxis_title="File", yaxis_title=f"Amount ({currency_label})", height=400)
+    return {"table": file_summary_display, "fig": fig}
+
+def build_monthly_tab(monthly_summary, currency_symbol, currency_label):
+    monthly_display = monthly_summary.copy()
+    monthly_display.index = monthly_display.index.astype(str)
+    for col in monthly_display.columns:
+        monthly_display[col] = monthly_display[col].apply(lambda x: format_money(x, currency_symbol))
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[str(idx) for idx in monthly_summary.index], y=monthly_summary.get("CR", [0]*len(monthly_summary)), name='Credit', line=dict(color='#4CAF50', width=3), mode='lines+markers'))
+    fig.add_trace(go.Scatter(x=[str(idx) for idx in monthly_summary.index], y=monthly_summary.get("DR", [0]*len(monthly_summary)), name='Debit', line=dict(color='#f44336', width=3), mode='lines+markers'))
+    fig.update_layout(title="Monthly Credit & Debit Trends", xaxis_title="Month", yaxis_title=f"Amount ({currency_label})", height=400, hovermode='x unified')
+    return {"table": monthly_display, "fig": fig}
+
+def build_category_tab(category_summary, currency_symbol):
+
+    pie = px.pie(values=category_summary["Total"], names=category_summary.index, title="Spending Distribution by Category", hole=0.4)
+    pie.update_traces(textposition='inside', textinfo='percent+label')
+    bar = px.bar(category_summary.reset_index(), x="Category", y="Total", title="Total Amount by Category", color="Total", color_continuous_scale="Viridis")
+    bar.update_layout(xaxis_tickangle=-45, height=400)
+
+    category_display = category_summary.copy()
+    category_display["Total"] = category_display["Total"].apply(lambda x: format_money(x, currency_symbol))
+    category_display["Avg_Per_Transaction"] = (category_summary["Total"] / category_summary["Count"]).apply(lambda x: format_money(x, currency_symbol))
+    return {"pie": pie, "bar": bar, "table": category_display}
+
+def build_top_tab(df, currency_symbol):
+    """HTML cards for the five largest transactions."""
+    cards = []
+    for _, row in dashboard.top_transactions(df, 5).iterrows():
+        bg_color = "rgba(76, 175, 80, 0.1)" if row['Type'] == "CR" else "rgba(244, 67, 54, 0.1)"
+        border_color = "#4CAF50" if row['Type'] == "CR" else "#f44336"
+        cards.append(f"""
+        <div style='background-color: {bg_color}; border-left: 4px solid {border_color}; border-radius: 8px; padding: 16px; margin-bottom: 12px;'>
+            <div style='display: flex; justify-content: space-between; align-items: center;'>
+                <div style='flex: 1;'>
+                    <div style='font-size: 14px; color: #888; margin-bottom: 4px;'>{row['Date'].strftime('%d %B %Y') if not pd.isna(row['Date']) else ''}</div>
+                    <div style='font-size: 18px; font-weight: 600; margin-bottom: 8px;'>{"🟢" if row['Type'] == "CR" else "🔴"} {format_money(row['Amount'], currency_symbol)}</div>
+                    <div style='font-size: 12px; background: rgba(0,0,0,0.1); display: inline-block; padding: 4px 8px; border-radius: 4px; margin-bottom: 8px;'>{row['Category']}</div>
+                    <div style='font-size: 14px; color: #666; margin-top: 8px;'>{row['Remarks']}</div>
+                </div>
+            </div>
+        </div>
+        """)
+    return cards
+
+def build_merchant_tab(df, currency_symbol, currency_label):
+    """Merchants with the largest total spend: bar chart and formatted table."""
+    summary = dashboard.merchant_summary(df, 15)
+    fig = px.bar(summary, x="Merchant", y="Total", title="Top Merchants by Spend", color="Total",
+                 color_continuous_scale="Reds")
+    fig.update_layout(xaxis_tickangle=-45, yaxis_title=f"Amount ({currency_label})", height=400)
+    table = summary.set_index("Merchant")
+    for col in ("Total", "Average"):
+        table[col] = table[col].apply(lambda x: format_money(x, currency_symbol))
+    return {"fig": fig, "table": table}
+
+def build_recurring_tab(df, currency_symbol):
+    """Detected recurring debits with their next expected date, formatted for display."""
+    found = recurring.detect_recurring(df)
+    active = found[found["Status"] == "Active"]
+    table = found.copy()
+    for col in ("Typical_Amount", "Monthly_Cost"):
+        table[col] = found[col].apply(lambda x: format_money(x, currency_symbol))
+    for col in ("First", "Last", "Next_Expected"):
+        table[col] = pd.to_datetime(found[col]).dt.strftime("%d %b %Y")
+    return {
+        "table": table.rename(columns={"Typical_Amount": "Typical Amount", "Monthly_Cost": "Per Month",
+                                       "Next_Expected": "Next Expected"}),
+        "active": len(active),
+        "monthly_total": float(active["Monthly_Cost"].sum()),
     }
 
-    # Quick check: if file appears HDFC-like (header has 'ClosingBalance' or 'StatementSummary'), prefer delta approach
-    if ("ClosingBalance" in full_text or "STATEMENTSUMMARY" in full_text or "WithdrawalAmt." in full_text or "Debits" in full_text and "Credits" in full_text):
-        # Build transaction-like lines: lines starting with date token
-        tx_lines = []
-        for p_idx, pg in enumerate(pages, start=1):
-            for ln in (pg.splitlines() if pg else []):
-                ln_s = ln.strip()
-                if DATE_LINE_RE.match(ln_s):
-                    tx_lines.append((p_idx, ln_s))
-
-        # If no tx_lines found, fallback to legacy parser
-        if not tx_lines:
-            rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password)
-            return rows, printed_totals
-
-        # Build tx_records with amount & closing
-        tx_records = []
-        for idx, (page_num, raw_line) in enumerate(tx_lines):
-            amt, closing = parse_amount_and_balance_from_line(raw_line)
-            if closing is None:
-                # Could be a header/footer line; skip
-                continue
-            # date string
-            date_match = DATE_LINE_RE.match(raw_line)
-            date_str = date_match.group(1) if date_match else ""
-            # try parse date to datetime if possible (handle dd/mm/yy and dd/mm/yyyy)
-            dt_val = None
-            for fmt in ("%d/%m/%y", "%d/%m/%Y"):
-                try:
-                    dt_val = pd.to_datetime(date_str, format=fmt, errors='coerce')
-                    if not pd.isna(dt_val):
-                        break
-                except Exception:
-                    dt_val = pd.to_datetime(date_str, errors='coerce')
-            tx_records.append({
-                "Date": dt_val,
-                "Remarks": raw_line,
-                "Amount": float(amt) if amt is not None else 0.0,
-                "Balance": float(closing),
-                "Page": page_num
-            })
-
-        if not tx_records:
-            rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password)
-            return rows, printed_totals
-
-        # If opening_balance not present, try to estimate robustly:
-        # Try both possible openings for first transaction:
-        # opening_a = first_closing + first_amount  (assumes first tx was debit)
-        # opening_b = first_closing - first_amount  (assumes first tx was credit)
-        first = tx_records[0]
-        first_closing = float(first['Balance'])
-        first_amt = float(first['Amount'])
-        candidate_openings = []
-        # Candidate A: assume first tx is debit -> opening = closing + amt
-        candidate_openings.append(("debit_assumption", first_closing + first_amt))
-        # Candidate B: assume first tx is credit -> opening = closing - amt
-        candidate_openings.append(("credit_assumption", first_closing - first_amt))
-
-        # if there is some externally extracted opening_balance, include as candidate
-        if opening_balance is not None:
-            candidate_openings.insert(0, ("extracted_opening", opening_balance))
-
-        # Score each candidate using first few records
-        best_opening = None
-        best_score = -1
-        for name, op in candidate_openings:
-            try:
-                score = _score_opening_for_records(op, tx_records, tolerance=0.6, sample_size=8)
-            except Exception:
-                score = -1
-            if score > best_score:
-                best_score = score
-                best_opening = op
-
-        # If none produced a positive score, fallback to debit_assumption
-        if best_opening is None:
-            best_opening = first_closing + first_amt
-
-        # Now infer full recs using best_opening
-        recs = infer_types_by_delta(tx_records, best_opening, tolerance=0.6)
-
-        # Convert recs to expected output format
-        out = []
-        for r in recs:
-            dt = r.get("Date")
-            if isinstance(dt, pd.Timestamp):
-                date_val = dt
-            else:
-                try:
-                    date_val = pd.to_datetime(r.get("Date"), errors="coerce")
-                except Exception:
-                    date_val = pd.NaT
-            out.append({
-                "Date": date_val,
-                "Amount": float(r.get("Amount", 0.0)),
-                "Type": r.get("Type"),
-                "Balance": float(r.get("Balance", 0.0)),
-                "Remarks": r.get("Remarks", ""),
-                "Source File": os.path.basename(filepath),
-                "inference_reason": r.get("inference_reason", "")
-            })
-        return out, printed_totals
+# ──────────────────────────────────────────────────────────────────────────────
+# Export / import
+# ──────────────────────────────────────────────────────────────────────────────
+def analysis_metadata():
+    """Analysis-level results saved alongside the rows, so a reload restores the whole dashboard."""
+    return {
+        "printed_totals": st.session_state.get("last_printed_totals", {}),
+        "reconciliation": st.session_state.get("last_reconciliation", []),
+        "file_status": st.session_state.get("last_file_status", []),
+    }
 
-    else:
-        # If not HDFC-like, use legacy parser (keeps previous regex behavior for IDBI/Axis/ADCB)
-        rows = _legacy_parse_pdf_file_return_only_rows(filepath, account_password)
-        return rows, printed_totals
-
-# Helper wrapper: return only rows (used by parse_pdf_file to call legacy)
-def _legacy_parse_pdf_file_return_only_rows(filepath: str, account_password: str):
-    rows = _legacy_parse_pdf_file(filepath, account_password)
-    return rows
-
-# Original legacy parsing logic returns rows (kept mostly as-is; used as fallback)
-def _legacy_parse_pdf_file(filepath: str, account_password: str):
-    text = ""
-    try:
-        if account_password:
-            with pdfplumber.open(filepath, password=account_password) as pdf:
-                text = "\n".join([page.extract_text() or "" for page in pdf.pages])
-        else:
-            with pdfplumber.open(filepath) as pdf:
-                text = "\n".join([page.extract_text() or "" for page in pdf.pages])
-    except Exception as e:
-        try:
-            with pdfplumber.open(filepath) as pdf:
-                text = "\n".join([page.extract_text() or "" for page in pdf.pages])
-        except Exception as e:
-            st.error(f"Failed to open PDF: {os.path.basename(filepath)} — {e}")
-            return []
-
-    if not text.strip():
-        st.warning(f"Could not extract text from {os.path.basename(filepath)}")
-
-    lines = [ln.strip() for ln in text.split("\n") if ln.strip()]
-    data = []
-    last_balance = None
-    detected_bank = None
-
-    TX_PATTERN = r"^(\d{2}/\d{2}/\d{2})\s+(.+?)\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})$"
-    IDBI_PATTERN = r"^\d+\s+(\d{2}/\d{2}/\d{2})\s+\d{2}/\d{2}/\d{2}\s+(.+?)\s+(CR|DR)\s+INR\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})$"
-    AXIS_PATTERN = r"^(\d{2}-\d{2}-\d{4})\s+(.+?)\s+([\d,]+\.\d{2})\s+([\d,]+\.\d{2})\s+(\d+)$"
-    ADCB_PATTERN = r"^(\d{2}/\d{2}/\d{4})\s+(\d{2}/\d{2}/\d{4})\s+(.+?)\s+([A-Z0-9\-/]+)\s+([\d,]+\.\d{1,2})\s+([\d,]+\.\d{1,2})\s+([\d,]+\.\d{1,2})$"
-
-    def clean_amt(s: str) -> float:
-        if not s:
-            return 0.0
-        s = re.sub(r"[^\d\.,\-]", "", s)
-        s = s.replace(",", "")
-        try:
-            return float(s)
-        except:
-            return 0.0
+@st.fragment
+def render_export(df):
+    """Format picker and download; the file is serialized only once 'Prepare download' is clicked."""
+    fmt = st.selectbox(
+        "Export format",
+        list(export.FORMATS),
+        format_func=lambda f: export.FORMATS[f]["label"],
+        key="export_format"
+    )
+    spec = export.FORMATS[fmt]
+    payload_key = (st.session_state.get("dataset_version", 0), fmt)
+    payload = st.session_state.get("export_payload")
+    if payload is None or payload[0] != payload_key:
+        # drop a stale payload so an old export is never held next to a new one
+        st.session_state.pop("export_payload", None)
+        if not st.button(f"📦 Prepare {spec['label']} download", key="prepare_export", use_container_width=True):
+            return
+        with st.spinner(f"Writing {spec['label']}..."):
+            # merchant ids only mean something in this library's dictionary; exports carry the names
+            if "Merchant ID" in df.columns:
+                df = df.drop(columns="Merchant ID").assign(Merchant=merchants.merchant_names(df["Merchant ID"]))
+            payload = (payload_key, export.to_bytes(df, fmt, analysis_metadata()))
+        st.session_state.export_payload = payload
+    st.download_button(
+        label=f"⬇️ Download Complete Analysis ({spec['label']})",
+        data=payload[1],
+        file_name=f"bank_analysis_{datetime.now().strftime('%Y%m%d')}{spec['ext']}",
+        mime=spec["mime"],
+        use_container_width=True,
+        on_click="ignore",
+        key="cached_download"
+    )
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
+@st.fragment(run_every=1.0)
+def poll_report(kind, label):
+    """Ticks while a report is being built; a full rerun shows its download once it is done."""
+    job = st.session_state.get("report_jobs", {}).get(kind)
+    if job is None or job["future"].done():
+        st.rerun()
+    st.caption(f"⏳ Building {label} in the background...")
+
+def dataset_fingerprint(df):
+    """reports.dataset_fingerprint of last_df, computed once per dataset version."""
+    version = st.session_state.get("dataset_version", 0)
+    cached = st.session_state.get("dataset_fingerprint")
+    if cached is None or cached[0] != version:
+        cached = (version, reports.dataset_fingerprint(df))
+        st.session_state.dataset_fingerprint = cached
+    return cached[1]
+
+def render_report(kind, label, df, user, options, build, ext, mime):
+    """
+    Button that runs build(path) on the report pool, then a download of the finished file.
+    Reports are cached on disk by (dataset fingerprint, options): asking again for an
+    unchanged report is instant, and changing the data or the options asks for a new build.
+    """
+    report_jobs = st.session_state.setdefault("report_jobs", {})
+    path = reports.cache_path(user, kind, dataset_fingerprint(df), options, ext)
+    job = report_jobs.get(kind)
+    if job is None or job["path"] != path:
+        report_jobs.pop(kind, None)
+        if not st.button(f"🧾 Build {label}", key=f"build_{kind}", use_container_width=True):
+            return
+        job = report_jobs[kind] = {"path": path, "future": reports.submit_cached(path, lambda: build(path))}
+    future = job["future"]
+    if not future.done():
+        poll_report(kind, label)
+        return
+    if future.exception() is not None:
+        st.error(f"❌ {label} failed: {future.exception()}")
+        report_jobs.pop(kind, None)
+        return
+    with open(future.result(), "rb") as fh:
+        st.download_button(
+            label=f"⬇️ Download {label}",
+            data=fh,
+            file_name=f"bank_analysis_{datetime.now().strftime('%Y%m%d')}{ext}",
+            mime=mime,
+            use_container_width=True,
+            on_click="ignore",
+            key=f"download_{kind}"
+        )
 
-        m1 = re.match(TX_PATTERN, line)
-        if m1:
-            date, remarks, amt_str, bal_str = m1.groups()
-            try:
-                amt_val = float(amt_str.replace(",", ""))
-            except:
-                amt_val = 0.0
-            try:
-                bal_val = float(bal_str.replace(",", ""))
-            except:
-                bal_val = None
-            tx_type = "DR"
-            if any(kw in remarks.upper() for kw in ["NEFT CR", "IMPS", "UPI", "CREDIT", "REFUND", "INTEREST"]):
-                tx_type = "CR"
-            data.append({
-                "Date": pd.to_datetime(date, format="%d/%m/%y", errors="coerce"),
-                "Amount": amt_val,
-                "Type": tx_type,
-                "Balance": bal_val,
-                "Remarks": remarks,
-                "Source File": os.path.basename(filepath)
-            })
-            last_balance = bal_val
-            i += 1
-            continue
+def render_reports(df, user):
+    """Excel workbook and PDF summary (of the reporting-currency view), both built off the render path."""
+    currency_symbol = symbol_for(reporting_currency())
+    printed_totals = reporting_printed_totals()
+    # the worker must not touch session state; it gets a frame of its own and plain values
+    frame = df.copy(deep=False)
+
+    render_report(
+        "excel", "Excel report", df, user,
+        {"currency": currency_symbol, "printed": printed_totals},
+        functools.partial(excel_report.write_workbook, frame, currency_symbol=currency_symbol, printed_totals=printed_totals),
+        ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
 
-        m2 = re.match(IDBI_PATTERN, line)
-        if m2:
-            date, remarks, tx_type, amt_str, bal_str = m2.groups()
-            amt_val = float(amt_str.replace(",", ""))
-            bal_val = float(bal_str.replace(",", ""))
-            data.append({
-                "Date": pd.to_datetime(date, format="%d/%m/%y", errors="coerce"),
-                "Amount": amt_val,
-                "Type": tx_type,
-                "Balance": bal_val,
-                "Remarks": remarks,
-                "Source File": os.path.basename(filepath)
-            })
-            last_balance = bal_val
-            i += 1
-            continue
+    with st.expander("📄 PDF report", expanded=False):
+        all_files = sorted(df["Source File"].astype(str).unique().tolist())
+        files = st.multiselect("Statements", all_files, default=all_files, key="pdf_report_files")
+        sections = st.multiselect(
+            "Sections",
+            list(pdf_report.SECTIONS),
+            default=list(pdf_report.SECTIONS),
+            format_func=lambda k: pdf_report.SECTIONS[k],
+            key="pdf_report_sections"
+        )
+        if not files or not sections:
+            st.caption("Pick at least one statement and one section.")
+            return
+        options = {
+            "files": [] if set(files) == set(all_files) else sorted(files),
+            "sections": [k for k in pdf_report.SECTIONS if k in sections],
+        }
+        render_report(
+            "pdf", "PDF report", df, user,
+            dict(options, currency=currency_symbol, printed=printed_totals),
+            functools.partial(pdf_report.write_report, frame, currency_symbol=currency_symbol,
+                              printed_totals=printed_totals, options=options),
+            ".pdf", "application/pdf"
+        )
 
-        if (i + 1) < len(lines):
-            nxt = lines[i + 1]
-            m3 = re.match(AXIS_PATTERN, nxt)
-            if m3:
-                date, part2, amt_str, bal_str, br = m3.groups()
-                remarks = (line + " " + part2).strip()
-                amt_val = float(amt_str.replace(",", ""))
-                bal_val = float(bal_str.replace(",", ""))
-                tx_type = "CR" if bal_val > (last_balance or 0) else "DR"
-                data.append({
-                    "Date": pd.to_datetime(date, format="%d-%m-%Y", errors="coerce"),
-                    "Amount": amt_val,
-                    "Type": tx_type,
-                    "Balance": bal_val,
-                    "Remarks": remarks,
-                    "Source File": os.path.basename(filepath)
-                })
-                last_balance = bal_val
-                i += 2
-                continue
-
-        m4 = re.match(ADCB_PATTERN, line)
-        if m4:
-            detected_bank = "ADCB"
-            post_date, value_date, desc, ref, debit_str, credit_str, bal_str = m4.groups()
-            debit_val = clean_amt(debit_str)
-            credit_val = clean_amt(credit_str)
-            bal_val = clean_amt(bal_str)
-
-            if credit_val > 0 and debit_val == 0:
-                amt_val = credit_val
-                tx_type = "CR"
-            elif debit_val > 0 and credit_val == 0:
-                amt_val = debit_val
-                tx_type = "DR"
-            else:
-                if credit_val >= debit_val:
-                    amt_val = credit_val
-                    tx_type = "CR"
-                else:
-                    amt_val = debit_val
-                    tx_type = "DR"
-
-            remarks = f"{desc} {ref}".strip()
-            data.append({
-                "Date": pd.to_datetime(post_date, format="%d/%m/%Y", errors="coerce"),
-                "Amount": amt_val,
-                "Type": tx_type,
-                "Balance": bal_val,
-                "Remarks": remarks,
-                "Source File": os.path.basename(filepath),
-                "Bank": detected_bank,
-                "Currency": "AED"
-            })
-            last_balance = bal_val
-            i += 1
-            continue
+def load_saved_analysis(uploaded):
+    """Replaces the current results with a saved export; no PDF is read."""
+    df, meta = export.read_table(uploaded)
+    job = st.session_state.pop("analysis_job", None)
+    if job is not None and job.active:
+        job.cancel()
+    for key in RESULT_KEYS:
+        st.session_state.pop(key, None)
+    # exports from before rows carried a Currency only recorded the symbol
+    legacy = "AED" if meta.get("currency_symbol") == "AED" else fx.DEFAULT_CURRENCY
+    df = fx.with_currency(df, legacy).drop(columns="Merchant", errors="ignore")
+    df["Merchant ID"] = merchants.merchant_ids(df["Remarks"])
+    set_dataset(df)
+    st.session_state.last_printed_totals = meta.get("printed_totals", {})
+    st.session_state.last_reconciliation = meta.get("reconciliation", [])
+    st.session_state.last_file_status = meta.get("file_status", [])
+    mark_dataset_changed()
 
-        i += 1
+# ──────────────────────────────────────────────────────────────────────────────
+# File library
+# ──────────────────────────────────────────────────────────────────────────────
+def selected_files():
+    """Ids of the library files selected for analysis."""
+    return st.session_state.setdefault("selected_files", set())
+
+def rename_files(items, new_names):
+    """Renames library files ({file id: new name}; items holds their get_saved_pdfs entries) everywhere they show."""
+    by_id = {i["id"]: i for i in items}
+    relabels = {}
+    for file_id, new_name in new_names.items():
+        item = by_id[file_id]
+        old_name = st.session_state.pdf_names.get(file_id, item["filename"])
+        new_name = new_name.strip()
+        if not new_name or new_name == old_name:
+            continue
+        st.session_state.pdf_names[file_id] = new_name
+        rename_pdf(file_id, new_name)
+        # files a running analysis has not reached yet pick the new name up too
+        st.session_state.get("job_display_names", {})[os.path.basename(item["filepath"])] = new_name
+        cached = st.session_state.get("file_cache", {}).get(item["filepath"])
+        frame = file_frame(item["filepath"]) if cached is not None and cached["rows"] else None
+        if frame is not None:
+            set_file_frame(item["filepath"], library.relabel_sources(frame, {old_name: new_name}))
+        relabels[old_name] = new_name
+    df = dataset() if relabels else None
+    if df is not None:
+        set_dataset(library.relabel_sources(df, relabels))
+        mark_dataset_changed()
+
+def apply_library_edits(editor_key, page_items):
+    """on_change of the library table: selection toggles and renames, by row of the page it showed."""
+    selected = selected_files()
+    renames = {}
+    for row, changes in st.session_state[editor_key]["edited_rows"].items():
+        item = page_items[int(row)]
+        if "Select" in changes:
+            if changes["Select"]:
+                selected.add(item["id"])
+            else:
+                selected.discard(item["id"])
+        if changes.get("Name"):
+            renames[item["id"]] = changes["Name"]
+    rename_files(page_items, renames)
+    # a fresh table next rerun: its rows are rebuilt from the state the edits were applied to
+    st.session_state.library_editor_version = st.session_state.get("library_editor_version", 0) + 1
+
+def set_selection(file_ids, selected):
+    if selected:
+        selected_files().update(file_ids)
+    else:
+        selected_files().difference_update(file_ids)
 
-    return data
+def delete_files(items):
+    for item in items:
+        delete_pdf(item["id"])
+        forget_file(item["filepath"])
+        st.session_state.pdf_names.pop(item["id"], None)
+        selected_files().discard(item["id"])
 
-def parse_many_pdfs(filepaths, account_password: str):
+def render_file_library(saved_items):
     """
-    Now returns tuple: (all_rows_list, aggregated_printed_totals)
-    aggregated_printed_totals = {"printed_credits": sum or None, "printed_debits": sum or None}
-    If none of the files contain printed totals, values will be None.
+    Search, sort and one page of the library as a table with a selection column and
+    editable names. Returns the selected files' paths.
     """
-    all_rows = []
-    total_printed_credits = 0.0
-    total_printed_debits = 0.0
-    any_printed = False
-    for p in filepaths:
-        rows, printed = parse_pdf_file(p, account_password)
-        if rows:
-            all_rows.extend(rows)
-        # printed could be None values
-        pc = printed.get("printed_credits") if printed else None
-        pd_ = printed.get("printed_debits") if printed else None
-        if pc is not None:
-            any_printed = True
-            total_printed_credits += float(pc)
-        if pd_ is not None:
-            any_printed = True
-            total_printed_debits += float(pd_)
-    aggregated = {
-        "printed_credits": total_printed_credits if any_printed else None,
-        "printed_debits": total_printed_debits if any_printed else None
-    }
-    return all_rows, aggregated
-
-# Currency helpers
-def detect_currency_symbol(rows, selected_paths=None):
-    """Best-effort currency detection; defaults to INR unless ADCB hints are present."""
-    path_text = " ".join([os.path.basename(p or "").lower() for p in (selected_paths or [])])
-    if "adcb" in path_text:
-        return "AED"
-
-    for r in rows:
-        if str(r.get("Currency", "")).upper() == "AED":
-            return "AED"
-        if str(r.get("Bank", "")).upper() == "ADCB":
-            return "AED"
-        remarks = str(r.get("Remarks", "")).upper()
-        if "ADCB" in remarks or re.search(r"\bAED\b", remarks):
-            return "AED"
-    return "₹"
-
-
-def format_money(amount, currency_symbol="₹", decimals=2):
-    """Format numbers with the chosen currency prefix."""
-    prefix = currency_symbol or "₹"
-    if prefix.isalpha() and not prefix.endswith(" "):
-        prefix = f"{prefix} "
-    fmt = f"{{:,.{decimals}f}}"
-    try:
-        return f"{prefix}{fmt.format(float(amount))}"
-    except Exception:
-        return f"{prefix}{fmt.format(0)}"
+    names = st.session_state.pdf_names
+    selected = selected_files()
+    st.markdown(f"**{len(saved_items)} file(s) in library**")
+    query = st.text_input("Search files", key="library_query", placeholder="🔎 Search by name",
+                          label_visibility="collapsed")
+    sort = st.selectbox("Sort files", list(library.SORTS), key="library_sort", label_visibility="collapsed")
+    page_items, page, pages, matched = library.view(
+        saved_items, names, query, sort, st.session_state.get("library_page", 1)
+    )
+    # clamped before the page widget is created: a narrower search can leave fewer pages
+    st.session_state.library_page = page
+
+    table = pd.DataFrame({
+        "Select": [i["id"] in selected for i in page_items],
+        "Name": [library.display_name(i, names) for i in page_items],
+        "Uploaded": [i["uploaded_at"].split("T")[0] for i in page_items],
+    })
+    editor_key = f"library_editor_{st.session_state.get('library_editor_version', 0)}"
+    st.data_editor(
+        table,
+        key=editor_key,
+        hide_index=True,
+        use_container_width=True,
+        disabled=["Uploaded"],
+        column_config={
+            "Select": st.column_config.CheckboxColumn("✓", width="small"),
+            "Name": st.column_config.TextColumn("Name", required=True),
+            "Uploaded": st.column_config.TextColumn("📅", width="small"),
+        },
+        on_change=apply_library_edits,
+        args=(editor_key, page_items),
+    )
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key="library_page")
+    st.caption(f"{len(matched)} shown • {len(selected)} selected")
+
+    matched_ids = [i["id"] for i in matched]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("☑️ Select all", key="library_select_all", use_container_width=True,
+                  on_click=set_selection, args=(matched_ids, True))
+    with col2:
+        st.button("✖️ Clear", key="library_clear", use_container_width=True,
+                  on_click=set_selection, args=(matched_ids, False), disabled=not selected)
+
+    chosen = [i for i in saved_items if i["id"] in selected]
+    if chosen:
+        with st.popover(f"🗑️ Delete {len(chosen)} selected", use_container_width=True):
+            st.caption("Removes the files from your library. This cannot be undone.")
+            if st.button("Delete permanently", key="library_delete", type="primary", use_container_width=True):
+                delete_files(chosen)
+                st.rerun()
+    return [i["filepath"] for i in chosen]
 
 # ──────────────────────────────────────────────────────────────────────────────
-# Category detection
+# Login
 # ──────────────────────────────────────────────────────────────────────────────
-DEFAULT_CATEGORIES = [
-    "Restaurant", "Hospital", "Taxi", "Misc", "Grocery",
-    "Credit card payment", "Subscription", "Sutherland",
-    "Rent", "Electricity", "Cashback", "Travel"
-]
+def finish_login(account, future):
+    """Applies a resolved auth.begin_login attempt."""
+    st.session_state.pop("login_attempt", None)
+    ok, msg = future.result()
+    if ok:
+        st.session_state.authenticated = True
+        st.session_state.username = account
+        st.success(f"✅ {msg}")
+        st.balloons()
+        st.rerun()
+    else:
+        st.error(f"❌ {msg}")
+
+def finish_register(future):
+    """Applies a resolved auth.begin_register attempt."""
+    st.session_state.pop("register_attempt", None)
+    ok, msg = future.result()
+    if ok:
+        st.success(f"✅ {msg}")
+        st.info("👉 Switch to the Login tab to sign in.")
+    else:
+        st.error(f"❌ {msg}")
 
-DEFAULT_CATEGORY_KEYWORDS = {
-    "Restaurant": ["restaurant","resto","restuarant","dine","dining","cafe","coffee","bar","zomato","swiggy","dominos","pizza","mcdonald","burger","kfc","food","eatery"],
-    "Hospital": ["hospital","hostpital","clinic","medical","care","apollo","fortis","manipal","health"],
-    "Taxi": ["uber","ola","cab","taxi","ride","auto","ola cabs","uber auto","olaauto","transport"],
-    "Grocery": ["grocery","grosery","supermarket","bigbasket","dmart","reliance fresh","spencer","store","mart","super","vegetables","provision"],
-    "Credit card payment": ["credit card","card payment","visa","mastercard","amex","creditcard","cardpayment","credit","billdesk"],
-    "Subscription": ["subscription","subscrption","netflix","spotify","prime","hotstar","disney","youtube premium","zee5","sony liv"],
-    "Sutherland": ["sutherland"],
-    "Rent": ["rent","rental","house rent","flat rent","pg","lease"],
-    "Electricity": ["electricity","power","electric bill","tneb","mahavitaran","bill payment","bills","current"],
-    "Cashback": ["cashback","reward","rewards","referral","cash back"],
-    "Travel": ["flight","air","indigo","spicejet","goair","air india","train","irctc","hotel","booking","travel","trip","journey"],
-}
-
-def detect_category(remarks: str, categories):
-    if remarks is None:
-        return "Misc"
-    text = str(remarks).lower()
-    if not text.strip():
-        return "Misc"
-
-    for cat in categories:
-        kws = DEFAULT_CATEGORY_KEYWORDS.get(cat, [])
-        for kw in kws:
-            if kw in text:
-                return cat
-
-    words = text.split()
-    for word in words:
-        for cat, kws in DEFAULT_CATEGORY_KEYWORDS.items():
-            match = get_close_matches(word, kws, n=1, cutoff=0.8)
-            if match:
-                return cat
-
-    for cat in categories:
-        if cat.lower() in text:
-            return cat
-
-    return "Misc"
+@st.fragment(run_every=0.25)
+def poll_auth(future, caption):
+    """Ticks while a password is hashed or verified off the script thread; a full rerun applies the result."""
+    if future.done():
+        st.rerun()
+    st.caption(caption)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Session state
@@ -1080,15 +1215,17 @@ if not st.session_state.authenticated:
                 if not log_user or not log_pass:
                     st.warning("⚠️ Please enter both email and password.")
                 else:
-                    ok, msg = login_user_db(log_user.strip(), log_pass.strip())
-                    if ok:
-                        st.session_state.authenticated = True
-                        st.session_state.username = log_user.strip()
-                        st.success(f"✅ {msg}")
-                        st.balloons()
-                        st.rerun()
-                    else:
-                        st.error(f"❌ {msg}")
+                    account = log_user.strip()
+                    st.session_state.login_attempt = (
+                        account, auth.begin_login(account, log_pass.strip(), st.context.ip_address)
+                    )
+            
+            if "login_attempt" in st.session_state:
+                account, future = st.session_state.login_attempt
+                if future.done():
+                    finish_login(account, future)
+                else:
+                    poll_auth(future, "🔐 Signing in...")
             
             st.markdown('<div class="footer-text">Don\'t have an account? <b>Register</b></div>', unsafe_allow_html=True)
         
@@ -1100,12 +1237,16 @@ if not st.session_state.authenticated:
                 if not reg_user or not reg_pass:
                     st.warning("⚠️ Please enter both UID and password.")
                 else:
-                    ok, msg = register_user_db(reg_user.strip(), reg_pass.strip())
-                    if ok:
-                        st.success(f"✅ {msg}")
-                        st.info("👉 Switch to the Login tab to sign in.")
-                    else:
-                        st.error(f"❌ {msg}")
+                    st.session_state.register_attempt = auth.begin_register(
+                        reg_user.strip(), reg_pass.strip(), st.context.ip_address
+                    )
+            
+            if "register_attempt" in st.session_state:
+                future = st.session_state.register_attempt
+                if future.done():
+                    finish_register(future)
+                else:
+                    poll_auth(future, "🔐 Creating your account...")
             
             st.markdown('<div class="footer-text">Already have an account? <b>Login</b></div>', unsafe_allow_html=True)
         
@@ -1129,13 +1270,13 @@ if st.session_state.authenticated:
             </div>
         """, unsafe_allow_html=True)
         if st.button("🚪 Logout", use_container_width=True, key="header_logout"):
+            session_data.drop(data_session())
+            parse_cache.release_all(data_session())
+            st.session_state.pop("file_cache", None)
             st.session_state.authenticated = False
             st.session_state.username = ""
             st.rerun()
 
-    currency_symbol = st.session_state.get("currency_symbol", "₹")
-    currency_label = currency_symbol.strip() or currency_symbol
-    
     st.markdown("---")
     
     # ────────────────────────────────────────────────
@@ -1153,64 +1294,42 @@ if st.session_state.authenticated:
         if item['id'] not in st.session_state.pdf_names:
             st.session_state.pdf_names[item['id']] = item['filename']
 
+    # Names and selections of files no longer in the library (deleted here, in
+    # another session or by the CLI) are dropped so they do not pile up
+    library_ids = {item['id'] for item in saved_items}
+    for file_id in [f for f in st.session_state.pdf_names if f not in library_ids]:
+        del st.session_state.pdf_names[file_id]
+    selected_files().intersection_update(library_ids)
+
+    # Pick up files the background analysis finished since the last rerun
+    analysis_job = st.session_state.get("analysis_job")
+    if analysis_job is not None:
+        sync_analysis(analysis_job)
+
+    # Once analyzed, the dashboard follows the file selection: checking or unchecking a
+    # parsed file adds or drops it without parsing anything again
+    if "analysis_paths" in st.session_state:
+        st.session_state.analysis_paths = [i["filepath"] for i in saved_items if i["id"] in selected_files()]
+        refresh_dataset()
+
+    currency_symbol = symbol_for(reporting_currency())
+    currency_label = currency_symbol.strip() or currency_symbol
+
     with st.sidebar:
         st.markdown("### 📂 File Manager")
       
         if saved_items:
-            st.markdown(f"**{len(saved_items)} file(s) in library**")
-            st.markdown("<br>", unsafe_allow_html=True)
-            
-            for i in saved_items:
-                with st.expander(f"📄 {st.session_state.pdf_names.get(i['id'], i['filename'])}", expanded=False):
-                    upload_date = i['uploaded_at'].split('T')[0]
-                    st.caption(f"📅 Uploaded: {upload_date}")
-                    
-                    if st.checkbox("Select for analysis", key=f"chk_{i['id']}"):
-                        selected_paths.append(i["filepath"])
-                    
-                    key_name = f"rename_{i['id']}"
-                    pdf_display_name = st.session_state.pdf_names.get(i['id'], i['filename'])
-                    if key_name not in st.session_state:
-                        st.session_state[key_name] = pdf_display_name
-
-                    def rename_callback(file_id=i['id'], key_name=key_name):
-                        new_name = st.session_state[key_name].strip()
-                        if new_name and new_name != st.session_state.pdf_names.get(file_id, new_name):
-                            st.session_state.pdf_names[file_id] = new_name
-                            conn = get_db()
-                            cur = conn.cursor()
-                            cur.execute("UPDATE pdf_files SET filename=? WHERE id=?", (new_name, file_id))
-                            conn.commit()
-                            conn.close()
-                            if "last_df" in st.session_state:
-                                old_name = [item for item in saved_items if item['id'] == file_id][0]['filename']
-                                st.session_state.last_df.loc[
-                                    st.session_state.last_df["Source File"] == old_name, "Source File"
-                                ] = new_name
-
-                    st.text_input(
-                        "Rename file",
-                        value=pdf_display_name,
-                        key=key_name,
-                        on_change=rename_callback
-                    )
-
-                    if st.button("🗑️ Delete", key=f"del_{i['id']}", use_container_width=True):
-                        delete_pdf(i['id'])
-                        st.success(f"✅ Deleted {pdf_display_name}")
-                        st.session_state.pdf_names.pop(i['id'], None)
-                        if key_name in st.session_state:
-                            st.session_state.pop(key_name)
-                        st.rerun()
+            selected_paths = render_file_library(saved_items)
         else:
             st.info("📭 No PDFs in library yet.\n\nUpload some files to get started!")
         
         st.markdown("---")
         
         # Category Explorer
-        if "last_df" in st.session_state:
+        sidebar_df = dataset()
+        if sidebar_df is not None:
             st.markdown("### 🏷️ Category Explorer")
-            df = st.session_state.last_df
+            df = reporting_view(sidebar_df)
 
             for cat in st.session_state.categories:
                 cat_df = df[df["Category"] == cat]
@@ -1237,10 +1356,23 @@ if st.session_state.authenticated:
                         st.session_state.categories.append(cat_clean)
                     DEFAULT_CATEGORY_KEYWORDS.setdefault(cat_clean, []).append(kw_clean)
 
-                    if "last_df" in st.session_state:
-                        st.session_state.last_df["Category"] = st.session_state.last_df["Remarks"].apply(
-                            lambda r: detect_category(r, st.session_state.categories)
-                        )
+                    for path, entry in st.session_state.get("file_cache", {}).items():
+                        frame = file_frame(path) if entry["rows"] else None
+                        if frame is not None:
+                            frame["Category"] = frame["Remarks"].apply(
+                                lambda r: detect_category(r, st.session_state.categories)
+                            )
+                            set_file_frame(path, frame)
+                    reset_partials()
+                    if "dataset_paths" in st.session_state:
+                        # last_df is rebuilt from the recategorized files
+                        st.session_state.pop("dataset_paths")
+                        refresh_dataset()
+                    elif has_dataset():
+                        df = dataset()
+                        df["Category"] = df["Remarks"].apply(lambda r: detect_category(r, st.session_state.categories))
+                        set_dataset(df)
+                        mark_dataset_changed()
                     st.success(f"✅ Added '{kw_clean}' to '{cat_clean}' and refreshed categories")
                 else:
                     st.warning("⚠️ Please enter both fields.")
@@ -1279,6 +1411,23 @@ if st.session_state.authenticated:
             </div>
         """, unsafe_allow_html=True)
 
+    with st.expander("📥 Load a saved analysis (Parquet / Arrow / CSV)", expanded=False):
+        saved_analysis = st.file_uploader(
+            "Saved analysis",
+            type=["parquet", "arrow", "feather", "csv"],
+            key="analysis_import",
+            label_visibility="collapsed",
+            help="A file previously exported from the dashboard; restores the analysis without re-parsing PDFs"
+        )
+        if saved_analysis is not None and st.session_state.get("imported_analysis") != saved_analysis.file_id:
+            try:
+                load_saved_analysis(saved_analysis)
+            except Exception as e:
+                st.error(f"❌ Could not read {saved_analysis.name}: {e}")
+            else:
+                st.session_state.imported_analysis = saved_analysis.file_id
+                st.rerun()
+
     # Show success message if files were just uploaded (persists after rerun)
     if "just_uploaded_files" in st.session_state and st.session_state.just_uploaded_files:
         file_list = "\n".join([f"• {fname}" for fname in st.session_state.just_uploaded_files])
@@ -1318,7 +1467,7 @@ if st.session_state.authenticated:
     # Analysis section with better empty state
     st.markdown("### 🔍 Analysis")
     
-    if not selected_paths and "last_df" not in st.session_state:
+    if not selected_paths and not has_dataset():
         st.info("""
             ### 👋 Welcome to Bank Statement Analyzer!
             
@@ -1333,9 +1482,12 @@ if st.session_state.authenticated:
     
     col1, col2, col3 = st.columns([2, 1, 1])
     with col1:
-        if selected_paths:
+        unparsed = [p for p in selected_paths if p not in st.session_state.get("file_cache", {})]
+        if selected_paths and has_dataset() and unparsed:
+            st.info(f"🆕 {len(unparsed)} selected file(s) not analyzed yet — Run Analysis to add them")
+        elif selected_paths:
             st.success(f"✅ {len(selected_paths)} file(s) ready for analysis")
-        elif "last_df" in st.session_state:
+        elif has_dataset():
             st.info("💡 Select files from the sidebar to analyze")
     with col2:
         pass  # Empty space
@@ -1353,316 +1505,11 @@ if st.session_state.authenticated:
                 display_name = st.session_state.pdf_names.get(item['id'], item['filename'])
                 filename_to_display[orig_name] = display_name
 
-            with st.spinner("🔄 Parsing statements... This may take a moment."):
-                rows, printed_totals = parse_many_pdfs(selected_paths, account_password=user)
-            
-            if rows:
-                currency_symbol = detect_currency_symbol(rows, selected_paths)
-                currency_label = currency_symbol.strip() or currency_symbol
-                st.session_state.currency_symbol = currency_symbol
-
-                df = pd.DataFrame(rows)
-                
-                # Map Source File to display names
-                df["Source File"] = df["Source File"].apply(lambda x: filename_to_display.get(x, x))
-
-                # Use printed totals if available; otherwise fall back to computed totals
-                printed_credits = printed_totals.get("printed_credits")
-                printed_debits = printed_totals.get("printed_debits")
-
-                # Compute fallback totals
-                computed_credit = df[df["Type"] == "CR"]["Amount"].sum() if not df.empty else 0.0
-                computed_debit = df[df["Type"] == "DR"]["Amount"].sum() if not df.empty else 0.0
-
-                # Choose totals to display: prefer printed values when present
-                total_credit = float(printed_credits) if printed_credits is not None else float(computed_credit)
-                total_debit = float(printed_debits) if printed_debits is not None else float(computed_debit)
-
-                df["Category"] = df["Remarks"].apply(lambda r: detect_category(r, st.session_state.categories))
-                st.session_state.last_df = df
-
-                # Quick stats at the top
-                st.markdown("### 📈 Summary")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                net_flow = total_credit - total_debit
-                transaction_count = len(df)
-                
-                with col1:
-                    st.metric("💰 Total Credit", format_money(total_credit, currency_symbol), delta=None)
-                with col2:
-                    st.metric("💸 Total Debit", format_money(total_debit, currency_symbol), delta=None)
-                with col3:
-                    delta_color = "normal" if net_flow >= 0 else "inverse"
-                    st.metric("📊 Net Flow", format_money(net_flow, currency_symbol), delta=f"{'Positive' if net_flow >= 0 else 'Negative'}")
-                with col4:
-                    st.metric("🧾 Transactions", f"{transaction_count:,}")
-
-                st.markdown("---")
-
-                # Detailed tabs
-                tab1, tab2, tab3, tab4, tab5 = st.tabs([
-                    "📋 All Transactions", 
-                    "📂 By File", 
-                    "📆 Monthly Trends",
-                    "📊 Category Analysis",
-                    "🏆 Top Transactions"
-                ])
-                
-                with tab1:
-                    st.markdown("#### Transaction History")
-                    
-                    # Search and Filters
-                    col1, col2 = st.columns([2, 1])
-                    with col1:
-                        search_term = st.text_input("🔍 Search transactions", placeholder="Search by remarks...")
-                    with col2:
-                        st.write("")  # Spacer
-                    
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        filter_type = st.selectbox("Transaction Type", ["All", "Credit", "Debit"])
-                    with col2:
-                        categories_list = ["All"] + sorted(df["Category"].unique().tolist())
-                        filter_category = st.selectbox("Category", categories_list)
-                    with col3:
-                        filter_file = st.selectbox("Source File", ["All"] + df["Source File"].unique().tolist())
-                    
-                    # Apply filters
-                    filtered_df = df.copy()
-                    
-                    # Search filter
-                    if search_term:
-                        filtered_df = filtered_df[
-                            filtered_df["Remarks"].str.contains(search_term, case=False, na=False)
-                        ]
-                    
-                    if filter_type != "All":
-                        filtered_df = filtered_df[filtered_df["Type"] == ("CR" if filter_type == "Credit" else "DR")]
-                    if filter_category != "All":
-                        filtered_df = filtered_df[filtered_df["Category"] == filter_category]
-                    if filter_file != "All":
-                        filtered_df = filtered_df[filtered_df["Source File"] == filter_file]
-                    
-                    # -------------------------
-                    # Format display dataframe (robust)
-                    # -------------------------
-                    display_df = filtered_df.copy()
-
-                    # Ensure Date is a datetime — safe conversion
-                    display_df["Date"] = pd.to_datetime(display_df["Date"], errors="coerce")
-
-                    # If Date conversion succeeded, format as string; otherwise keep original
-                    display_df["Date_display"] = display_df["Date"].dt.strftime("%d %b %Y")
-                    display_df.loc[display_df["Date"].isna(), "Date_display"] = display_df.loc[display_df["Date"].isna(), "Date"].astype(str)
-
-                    # Keep the existing columns but use the safe Date_display
-                    display_df = display_df.assign(Amount=display_df["Amount"].apply(lambda x: format_money(x, currency_symbol)))
-                    display_df = display_df.sort_values("Date", ascending=False)
-
-                    # Show simple message if no records
-                    if display_df.empty:
-                        st.info("No transactions to show for the selected filters.")
-                    else:
-                        # Use st.dataframe as primary; fallback to st.table if any issue
-                        try:
-                            st.dataframe(
-                                display_df[["Date_display", "Amount", "Type", "Category", "Remarks", "Source File"]],
-                                use_container_width=True,
-                                height=500
-                            )
-                        except Exception:
-                            st.table(display_df[["Date_display", "Amount", "Type", "Category", "Remarks", "Source File"]].head(200))
-                    
-                    # Summary of filtered results
-                    if len(filtered_df) > 0:
-                        filtered_credit = filtered_df[filtered_df["Type"] == "CR"]["Amount"].sum()
-                        filtered_debit = filtered_df[filtered_df["Type"] == "DR"]["Amount"].sum()
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.caption(f"📊 Showing {len(filtered_df)} of {len(df)} transactions")
-                        with col2:
-                            st.caption(f"💰 Filtered Credit: {format_money(filtered_credit, currency_symbol)}")
-                        with col3:
-                            st.caption(f"💸 Filtered Debit: {format_money(filtered_debit, currency_symbol)}")
-                    else:
-                        st.info("No transactions match your filters.")
-                
-                with tab2:
-                    st.markdown("#### Summary by File")
-                    file_summary = df.groupby("Source File").agg(
-                        Total_Credit=("Amount", lambda x: x[df.loc[x.index, "Type"] == "CR"].sum()),
-                        Total_Debit=("Amount", lambda x: x[df.loc[x.index, "Type"] == "DR"].sum()),
-                        Transactions=("Amount", "count")
-                    )
-                    file_summary["Net_Flow"] = file_summary["Total_Credit"] - file_summary["Total_Debit"]
-                    
-                    # Format for display
-                    file_summary_display = file_summary.copy()
-                    for col in ["Total_Credit", "Total_Debit", "Net_Flow"]:
-                        file_summary_display[col] = file_summary_display[col].apply(lambda x: format_money(x, currency_symbol))
-                    
-                    st.dataframe(file_summary_display, use_container_width=True)
-                    
-                    # Visual chart
-                    fig = go.Figure()
-                    fig.add_trace(go.Bar(
-                        name='Credit',
-                        x=file_summary.index,
-                        y=file_summary['Total_Credit'],
-                        marker_color='#4CAF50'
-                    ))
-                    fig.add_trace(go.Bar(
-                        name='Debit',
-                        x=file_summary.index,
-                        y=file_summary['Total_Debit'],
-                        marker_color='#f44336'
-                    ))
-                    fig.update_layout(
-                        barmode='group',
-                        title="Credit vs Debit by File",
-                        xaxis_title="File",
-                        yaxis_title=f"Amount ({currency_label})",
-                        height=400
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                with tab3:
-                    st.markdown("#### Monthly Trends")
-                    df["Month"] = df["Date"].dt.to_period("M")
-                    monthly_summary = df.groupby(["Month", "Type"])["Amount"].sum().unstack(fill_value=0)
-                    monthly_summary["Net"] = monthly_summary.get("CR", 0) - monthly_summary.get("DR", 0)
-                    
-                    # Display table
-                    monthly_display = monthly_summary.copy()
-                    monthly_display.index = monthly_display.index.astype(str)
-                    for col in monthly_display.columns:
-                        monthly_display[col] = monthly_display[col].apply(lambda x: format_money(x, currency_symbol))
-                    st.dataframe(monthly_display, use_container_width=True)
-                    
-                    # Line chart
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=[str(idx) for idx in monthly_summary.index],
-                        y=monthly_summary.get("CR", [0]*len(monthly_summary)),
-                        name='Credit',
-                        line=dict(color='#4CAF50', width=3),
-                        mode='lines+markers'
-                    ))
-                    fig.add_trace(go.Scatter(
-                        x=[str(idx) for idx in monthly_summary.index],
-                        y=monthly_summary.get("DR", [0]*len(monthly_summary)),
-                        name='Debit',
-                        line=dict(color='#f44336', width=3),
-                        mode='lines+markers'
-                    ))
-                    fig.update_layout(
-                        title="Monthly Credit & Debit Trends",
-                        xaxis_title="Month",
-                        yaxis_title=f"Amount ({currency_label})",
-                        height=400,
-                        hovermode='x unified'
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                with tab4:
-                    st.markdown("#### Spending by Category")
-                    
-                    # Category breakdown
-                    category_summary = df.groupby("Category").agg(
-                        Total=("Amount", "sum"),
-                        Count=("Amount", "count")
-                    ).sort_values("Total", ascending=False)
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        # Pie chart
-                        fig = px.pie(
-                            values=category_summary["Total"],
-                            names=category_summary.index,
-                            title="Spending Distribution by Category",
-                            hole=0.4
-                        )
-                        fig.update_traces(textposition='inside', textinfo='percent+label')
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    with col2:
-                        # Bar chart
-                        fig = px.bar(
-                            category_summary.reset_index(),
-                            x="Category",
-                            y="Total",
-                            title="Total Amount by Category",
-                            color="Total",
-                            color_continuous_scale="Viridis"
-                        )
-                        fig.update_layout(xaxis_tickangle=-45, height=400)
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Detailed category table
-                    st.markdown("##### Category Details")
-                    category_display = category_summary.copy()
-                    category_display["Total"] = category_display["Total"].apply(lambda x: format_money(x, currency_symbol))
-                    category_display["Avg_Per_Transaction"] = (
-                        category_summary["Total"] / category_summary["Count"]
-                    ).apply(lambda x: format_money(x, currency_symbol))
-                    st.dataframe(category_display, use_container_width=True)
-                
-                with tab5:
-                    st.markdown("#### Top 5 Largest Transactions")
-                    top5 = df.nlargest(5, "Amount")
-                    
-                    for idx, row in top5.iterrows():
-                        # Create a card-like appearance for each transaction
-                        bg_color = "rgba(76, 175, 80, 0.1)" if row['Type'] == "CR" else "rgba(244, 67, 54, 0.1)"
-                        border_color = "#4CAF50" if row['Type'] == "CR" else "#f44336"
-                        
-                        st.markdown(f"""
-                        <div style='
-                            background-color: {bg_color};
-                            border-left: 4px solid {border_color};
-                            border-radius: 8px;
-                            padding: 16px;
-                            margin-bottom: 12px;
-                        '>
-                            <div style='display: flex; justify-content: space-between; align-items: center;'>
-                                <div style='flex: 1;'>
-                                    <div style='font-size: 14px; color: #888; margin-bottom: 4px;'>
-                                        {row['Date'].strftime('%d %B %Y') if not pd.isna(row['Date']) else ''}
-                                    </div>
-                                    <div style='font-size: 18px; font-weight: 600; margin-bottom: 8px;'>
-                                        {"🟢" if row['Type'] == "CR" else "🔴"} {format_money(row['Amount'], currency_symbol)}
-                                    </div>
-                                    <div style='font-size: 12px; background: rgba(0,0,0,0.1); 
-                                        display: inline-block; padding: 4px 8px; border-radius: 4px; margin-bottom: 8px;'>
-                                        {row['Category']}
-                                    </div>
-                                    <div style='font-size: 14px; color: #666; margin-top: 8px;'>
-                                        {row['Remarks']}
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                st.markdown("---")
-                
-                # Download section
-                col1, col2, col3 = st.columns([1, 2, 1])
-                with col2:
-                    st.download_button(
-                        label="⬇️ Download Complete Analysis (CSV)",
-                        data=df.to_csv(index=False).encode("utf-8"),
-                        file_name=f"bank_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv",
-                        use_container_width=True,
-                    )
-            else:
-                st.error("❌ No valid transactions found. Please check your PDF format.")
+            start_analysis(selected_paths, user, filename_to_display)
+            st.rerun()
     
     # Show helpful message when no files selected and no cached data
-    elif not selected_paths and "last_df" not in st.session_state:
+    elif not selected_paths and not has_dataset():
         st.markdown("""
             <div style='text-align: center; padding: 60px 20px; background: linear-gradient(135deg, rgba(76, 175, 80, 0.1) 0%, rgba(33, 150, 243, 0.1) 100%); border-radius: 12px; margin-top: 30px;'>
                 <div style='font-size: 48px; margin-bottom: 20px;'>📊</div>
@@ -1687,198 +1534,195 @@ if st.session_state.authenticated:
             </div>
         """, unsafe_allow_html=True)
     
-    # Display cached analysis if available (persists across sidebar interactions)
-    if "last_df" in st.session_state and not run_btn:
-        df = st.session_state.last_df
-        
-        # Re-compute totals from cached df
-        total_credit = df[df["Type"] == "CR"]["Amount"].sum()
-        total_debit = df[df["Type"] == "DR"]["Amount"].sum()
-        net_flow = total_credit - total_debit
-        transaction_count = len(df)
-        
-        # Quick stats at the top
-        st.markdown("### 📈 Summary")
-        col1, col2, col3, col4 = st.columns(4)
+    analysis_job = st.session_state.get("analysis_job")
+    if analysis_job is not None:
+        render_job_status(analysis_job)
+
+    # Display the analysis (partial while a job is still running; persists across sidebar interactions)
+    raw_df = dataset()
+    if raw_df is not None:
+        # closed however the block is left: a st.rerun() or an exception must not leave it current
+        with instrument.track("dashboard", user, emit_record=True) as dashboard_metrics:
+            df = reporting_view(raw_df)
         
-        with col1:
-            st.metric("💰 Total Credit", format_money(total_credit, currency_symbol), delta=None)
-        with col2:
-            st.metric("💸 Total Debit", format_money(total_debit, currency_symbol), delta=None)
-        with col3:
-            st.metric("📊 Net Flow", format_money(net_flow, currency_symbol), delta=f"{'Positive' if net_flow >= 0 else 'Negative'}")
-        with col4:
-            st.metric("🧾 Transactions", f"{transaction_count:,}")
-
-        st.markdown("---")
-
-        # Detailed tabs
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "📋 All Transactions", 
-            "📂 By File", 
-            "📆 Monthly Trends",
-            "📊 Category Analysis",
-            "🏆 Top Transactions"
-        ])
+            # Use printed totals if available; otherwise fall back to computed totals
+            printed_totals = reporting_printed_totals()
+            parts = analysis_partials()
+            computed_credit, computed_debit = partials.computed_totals(parts)
+            printed_credits = printed_totals.get("printed_credits")
+            printed_debits = printed_totals.get("printed_debits")
+            total_credit = float(printed_credits) if printed_credits is not None else float(computed_credit)
+            total_debit = float(printed_debits) if printed_debits is not None else float(computed_debit)
+            net_flow = total_credit - total_debit
+            transaction_count = partials.transaction_count(parts)
         
-        with tab1:
-            st.markdown("#### Transaction History")
-            
-            # Search and Filters
-            col1, col2 = st.columns([2, 1])
+            # Quick stats at the top
+            col1, col2 = st.columns([3, 1])
             with col1:
-                search_term = st.text_input("🔍 Search transactions", placeholder="Search by remarks...", key="cached_search")
+                st.markdown("### 📈 Summary")
             with col2:
-                st.write("")  # Spacer
-            
-            col1, col2, col3 = st.columns(3)
+                currency_options = sorted(set(fx.currencies_of(raw_df)) | set(convertible_currencies())
+                                          | {reporting_currency()})
+                st.selectbox(
+                    "Reporting currency",
+                    currency_options,
+                    index=currency_options.index(reporting_currency()),
+                    key="reporting_currency"
+                )
+            col1, col2, col3, col4 = st.columns(4)
+        
             with col1:
-                filter_type = st.selectbox("Transaction Type", ["All", "Credit", "Debit"], key="cached_filter_type")
+                st.metric("💰 Total Credit", format_money(total_credit, currency_symbol), delta=None)
             with col2:
-                categories_list = ["All"] + sorted(df["Category"].unique().tolist())
-                filter_category = st.selectbox("Category", categories_list, key="cached_filter_cat")
+                st.metric("💸 Total Debit", format_money(total_debit, currency_symbol), delta=None)
             with col3:
-                filter_file = st.selectbox("Source File", ["All"] + df["Source File"].unique().tolist(), key="cached_filter_file")
-            
-            # Apply filters
-            filtered_df = df.copy()
-            
-            # Search filter
-            if search_term:
-                filtered_df = filtered_df[
-                    filtered_df["Remarks"].str.contains(search_term, case=False, na=False)
-                ]
-            
-            if filter_type != "All":
-                filtered_df = filtered_df[filtered_df["Type"] == ("CR" if filter_type == "Credit" else "DR")]
-            if filter_category != "All":
-                filtered_df = filtered_df[filtered_df["Category"] == filter_category]
-            if filter_file != "All":
-                filtered_df = filtered_df[filtered_df["Source File"] == filter_file]
+                st.metric("📊 Net Flow", format_money(net_flow, currency_symbol), delta=f"{'Positive' if net_flow >= 0 else 'Negative'}")
+            with col4:
+                st.metric("🧾 Transactions", f"{transaction_count:,}")
+
+            render_currency_summary(raw_df)
+            render_reconciliation(st.session_state.get("last_reconciliation"))
+
+            st.markdown("---")
+
+            # Detailed tabs — only the selected one is computed and sent to the browser
+            active_tab = st.radio(
+                "Dashboard view",
+                DASHBOARD_TABS,
+                horizontal=True,
+                key="dashboard_tab",
+                label_visibility="collapsed"
+            )
+        
+            if active_tab == DASHBOARD_TABS[0]:
+                st.markdown("#### Transaction History")
             
-            # Format display dataframe
-            display_df = filtered_df.copy()
-            display_df["Date"] = pd.to_datetime(display_df["Date"], errors="coerce")
-            display_df["Date_display"] = display_df["Date"].dt.strftime("%d %b %Y")
-            display_df.loc[display_df["Date"].isna(), "Date_display"] = display_df.loc[display_df["Date"].isna(), "Date"].astype(str)
-            display_df = display_df.assign(Amount=display_df["Amount"].apply(lambda x: format_money(x, currency_symbol)))
-            display_df = display_df.sort_values("Date", ascending=False)
-
-            if display_df.empty:
-                st.info("No transactions to show for the selected filters.")
-            else:
-                try:
-                    st.dataframe(
-                        display_df[["Date_display", "Amount", "Type", "Category", "Remarks", "Source File"]],
-                        use_container_width=True,
-                        height=500
-                    )
-                except Exception:
-                    st.table(display_df[["Date_display", "Amount", "Type", "Category", "Remarks", "Source File"]].head(200))
+                # Search and Filters
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    search_term = st.text_input("🔍 Search transactions", placeholder="Search by remarks...", key="cached_search")
+                with col2:
+                    st.write("")  # Spacer
             
-            # Summary of filtered results
-            if len(filtered_df) > 0:
-                filtered_credit = filtered_df[filtered_df["Type"] == "CR"]["Amount"].sum()
-                filtered_debit = filtered_df[filtered_df["Type"] == "DR"]["Amount"].sum()
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.caption(f"📊 Showing {len(filtered_df)} of {len(df)} transactions")
+                    filter_type = st.selectbox("Transaction Type", ["All", "Credit", "Debit"], key="cached_filter_type")
                 with col2:
-                    st.caption(f"💰 Filtered Credit: {format_money(filtered_credit, currency_symbol)}")
+                    categories_list = ["All"] + sorted(df["Category"].unique().tolist())
+                    filter_category = st.selectbox("Category", categories_list, key="cached_filter_cat")
                 with col3:
-                    st.caption(f"💸 Filtered Debit: {format_money(filtered_debit, currency_symbol)}")
-            else:
-                st.info("No transactions match your filters.")
-        
-        with tab2:
-            st.markdown("#### Summary by File")
-            file_summary = df.groupby("Source File").agg(
-                Total_Credit=("Amount", lambda x: x[df.loc[x.index, "Type"] == "CR"].sum()),
-                Total_Debit=("Amount", lambda x: x[df.loc[x.index, "Type"] == "DR"].sum()),
-                Transactions=("Amount", "count")
-            )
-            file_summary["Net_Flow"] = file_summary["Total_Credit"] - file_summary["Total_Debit"]
+                    filter_file = st.selectbox("Source File", ["All"] + df["Source File"].unique().tolist(), key="cached_filter_file")
             
-            file_summary_display = file_summary.copy()
-            for col in ["Total_Credit", "Total_Debit", "Net_Flow"]:
-                file_summary_display[col] = file_summary_display[col].apply(lambda x: format_money(x, currency_symbol))
+                # Apply filters
+                filtered_df = df
             
-            st.dataframe(file_summary_display, use_container_width=True)
+                # Search filter
+                if search_term:
+                    filtered_df = filtered_df[
+                        filtered_df["Remarks"].str.contains(search_term, case=False, na=False)
+                    ]
             
-            fig = go.Figure()
-            fig.add_trace(go.Bar(name='Credit', x=file_summary.index, y=file_summary['Total_Credit'], marker_color='#4CAF50'))
-            fig.add_trace(go.Bar(name='Debit', x=file_summary.index, y=file_summary['Total_Debit'], marker_color='#f44336'))
-            fig.update_layout(barmode='group', title="Credit vs Debit by File", xaxis_title="File", yaxis_title=f"Amount ({currency_label})", height=400)
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with tab3:
-            st.markdown("#### Monthly Trends")
-            df["Month"] = df["Date"].dt.to_period("M")
-            monthly_summary = df.groupby(["Month", "Type"])["Amount"].sum().unstack(fill_value=0)
-            monthly_summary["Net"] = monthly_summary.get("CR", 0) - monthly_summary.get("DR", 0)
+                if filter_type != "All":
+                    filtered_df = filtered_df[filtered_df["Type"] == ("CR" if filter_type == "Credit" else "DR")]
+                if filter_category != "All":
+                    filtered_df = filtered_df[filtered_df["Category"] == filter_category]
+                if filter_file != "All":
+                    filtered_df = filtered_df[filtered_df["Source File"] == filter_file]
             
-            monthly_display = monthly_summary.copy()
-            monthly_display.index = monthly_display.index.astype(str)
-            for col in monthly_display.columns:
-                monthly_display[col] = monthly_display[col].apply(lambda x: format_money(x, currency_symbol))
-            st.dataframe(monthly_display, use_container_width=True)
+                # Formatted columns are built once per dataset; filters just pick rows
+                transactions_view = cached_frame(
+                    "transactions_view",
+                    (st.session_state.get("dataset_version", 0), reporting_currency()),
+                    lambda: build_transactions_view(df, currency_symbol)
+                )
+                display_df = transactions_view.loc[filtered_df.index].sort_values("Date", ascending=False)
+                display_columns = [c for c in ["Date_display", "Amount", "Original", "Type", "Category", "Remarks", "Source File"]
+                                   if c in display_df.columns]
+
+                if display_df.empty:
+                    st.info("No transactions to show for the selected filters.")
+                else:
+                    try:
+                        st.dataframe(
+                            display_df[display_columns],
+                            use_container_width=True,
+                            height=500
+                        )
+                    except Exception:
+                        st.table(display_df[display_columns].head(200))
             
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=[str(idx) for idx in monthly_summary.index], y=monthly_summary.get("CR", [0]*len(monthly_summary)), name='Credit', line=dict(color='#4CAF50', width=3), mode='lines+markers'))
-            fig.add_trace(go.Scatter(x=[str(idx) for idx in monthly_summary.index], y=monthly_summary.get("DR", [0]*len(monthly_summary)), name='Debit', line=dict(color='#f44336', width=3), mode='lines+markers'))
-            fig.update_layout(title="Monthly Credit & Debit Trends", xaxis_title="Month", yaxis_title=f"Amount ({currency_label})", height=400, hovermode='x unified')
-            st.plotly_chart(fig, use_container_width=True)
+                # Summary of filtered results
+                if len(filtered_df) > 0:
+                    filtered_credit = filtered_df[filtered_df["Type"] == "CR"]["Amount"].sum()
+                    filtered_debit = filtered_df[filtered_df["Type"] == "DR"]["Amount"].sum()
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.caption(f"📊 Showing {len(filtered_df)} of {len(df)} transactions")
+                    with col2:
+                        st.caption(f"💰 Filtered Credit: {format_money(filtered_credit, currency_symbol)}")
+                    with col3:
+                        st.caption(f"💸 Filtered Debit: {format_money(filtered_debit, currency_symbol)}")
+                else:
+                    st.info("No transactions match your filters.")
+        
+            elif active_tab == DASHBOARD_TABS[1]:
+                st.markdown("#### Summary by File")
+                file_tab = cached_tab("by_file", lambda: build_file_tab(
+                    partials.file_summary(parts, file_display_names()), currency_symbol, currency_label))
+                st.dataframe(file_tab["table"], use_container_width=True)
+                st.plotly_chart(file_tab["fig"], use_container_width=True)
         
-        with tab4:
-            st.markdown("#### Spending by Category")
-            category_summary = df.groupby("Category").agg(Total=("Amount", "sum"), Count=("Amount", "count")).sort_values("Total", ascending=False)
+            elif active_tab == DASHBOARD_TABS[2]:
+                st.markdown("#### Monthly Trends")
+                monthly_tab = cached_tab("monthly", lambda: build_monthly_tab(
+                    partials.monthly_summary(parts), currency_symbol, currency_label))
+                st.dataframe(monthly_tab["table"], use_container_width=True)
+                st.plotly_chart(monthly_tab["fig"], use_container_width=True)
+        
+            elif active_tab == DASHBOARD_TABS[3]:
+                st.markdown("#### Spending by Category")
+                category_tab = cached_tab("category", lambda: build_category_tab(partials.category_summary(parts), currency_symbol))
             
-            col1, col2 = st.columns(2)
-            with col1:
-                fig = px.pie(values=category_summary["Total"], names=category_summary.index, title="Spending Distribution by Category", hole=0.4)
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                st.plotly_chart(fig, use_container_width=True)
-            with col2:
-                fig = px.bar(category_summary.reset_index(), x="Category", y="Total", title="Total Amount by Category", color="Total", color_continuous_scale="Viridis")
-                fig.update_layout(xaxis_tickangle=-45, height=400)
-                st.plotly_chart(fig, use_container_width=True)
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.plotly_chart(category_tab["pie"], use_container_width=True)
+                with col2:
+                    st.plotly_chart(category_tab["bar"], use_container_width=True)
             
-            st.markdown("##### Category Details")
-            category_display = category_summary.copy()
-            category_display["Total"] = category_display["Total"].apply(lambda x: format_money(x, currency_symbol))
-            category_display["Avg_Per_Transaction"] = (category_summary["Total"] / category_summary["Count"]).apply(lambda x: format_money(x, currency_symbol))
-            st.dataframe(category_display, use_container_width=True)
+                st.markdown("##### Category Details")
+                st.dataframe(category_tab["table"], use_container_width=True)
         
-        with tab5:
-            st.markdown("#### Top 5 Largest Transactions")
-            top5 = df.nlargest(5, "Amount")
-            
-            for idx, row in top5.iterrows():
-                bg_color = "rgba(76, 175, 80, 0.1)" if row['Type'] == "CR" else "rgba(244, 67, 54, 0.1)"
-                border_color = "#4CAF50" if row['Type'] == "CR" else "#f44336"
-                
-                st.markdown(f"""
-                <div style='background-color: {bg_color}; border-left: 4px solid {border_color}; border-radius: 8px; padding: 16px; margin-bottom: 12px;'>
-                    <div style='display: flex; justify-content: space-between; align-items: center;'>
-                        <div style='flex: 1;'>
-                            <div style='font-size: 14px; color: #888; margin-bottom: 4px;'>{row['Date'].strftime('%d %B %Y') if not pd.isna(row['Date']) else ''}</div>
-                            <div style='font-size: 18px; font-weight: 600; margin-bottom: 8px;'>{"🟢" if row['Type'] == "CR" else "🔴"} {format_money(row['Amount'], currency_symbol)}</div>
-                            <div style='font-size: 12px; background: rgba(0,0,0,0.1); display: inline-block; padding: 4px 8px; border-radius: 4px; margin-bottom: 8px;'>{row['Category']}</div>
-                            <div style='font-size: 14px; color: #666; margin-top: 8px;'>{row['Remarks']}</div>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+            elif active_tab == DASHBOARD_TABS[4]:
+                st.markdown("#### Top 5 Largest Transactions")
+                for card in cached_tab("top", lambda: build_top_tab(df, currency_symbol)):
+                    st.markdown(card, unsafe_allow_html=True)
 
-        st.markdown("---")
+            elif active_tab == DASHBOARD_TABS[5]:
+                st.markdown("#### Top Merchants")
+                merchant_tab = cached_tab("merchants", lambda: build_merchant_tab(df, currency_symbol, currency_label))
+                st.plotly_chart(merchant_tab["fig"], use_container_width=True)
+                st.dataframe(merchant_tab["table"], use_container_width=True)
+
+            else:
+                st.markdown("#### Recurring Payments")
+                recurring_tab = cached_tab("recurring", lambda: build_recurring_tab(df, currency_symbol))
+                if recurring_tab["table"].empty:
+                    st.info("No recurring payments found. A payment needs at least "
+                            f"{recurring.MIN_OCCURRENCES} regular debits to the same merchant.")
+                else:
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("🔁 Active recurring payments", recurring_tab["active"])
+                    with col2:
+                        st.metric("📅 Committed per month", format_money(recurring_tab["monthly_total"], currency_symbol))
+                    st.dataframe(recurring_tab["table"], use_container_width=True, hide_index=True)
+
+            st.markdown("---")
         
-        col1, col2, col3 = st.columns([1, 2, 1])
-        with col2:
-            st.download_button(
-                label="⬇️ Download Complete Analysis (CSV)",
-                data=df.to_csv(index=False).encode("utf-8"),
-                file_name=f"bank_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                use_container_width=True,
-                key="cached_download"
-            ) 
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col2:
+                render_export(raw_df)
+                render_reports(df, user)
+
+        job_metrics = analysis_job.run_metrics if analysis_job is not None else []
+        render_diagnostics(st.session_state.get("last_file_metrics", []) + job_metrics + [dashboard_metrics])
@@ -0,0 +1,52 @@
+"""
+Shared fixtures: the golden corpus of synthetic statements, rendered once per
+session, and a page cache in a temporary directory so no test reads or writes
+user_data.
+"""
+import json
+import os
+import sys
+import tempfile
+
+# before bank_analyzer.db resolves its data directory
+os.environ.setdefault("BANK_ANALYZER_DATA_DIR", tempfile.mkdtemp(prefix="bank_analyzer_tests_"))
+# bcrypt's minimum cost keeps account fixtures fast
+os.environ.setdefault("BANK_ANALYZER_BCRYPT_ROUNDS", "4")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+from bank_analyzer import page_cache, synthetic  # noqa: E402
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "throughput: pages/sec budgets (deselect with -m 'not throughput')")
+
+
+def load_json(name: str) -> dict:
+    with open(os.path.join(GOLDEN_DIR, name), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+CORPUS = load_json("corpus.json")["cases"]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolated_page_cache(tmp_path_factory):
+    page_cache.configure(str(tmp_path_factory.mktemp("page_cache")))
+    yield
+    page_cache.configure(enabled=False)
+
+
+@pytest.fixture(scope="session")
+def corpus(tmp_path_factory):
+    """name -> {"case", "path", "truth"} for every corpus case, rendered with bank_analyzer.synthetic."""
+    root = tmp_path_factory.mktemp("corpus")
+    out = {}
+    for case in CORPUS:
+        path = str(root / f"{case['name']}.pdf")
+        options = {k: case[k] for k in ("pages", "seed", "rows_per_page") if k in case}
+        out[case["name"]] = {"case": case, "path": path, "truth": synthetic.write_statement(path, case["bank"], **options)}
+    return out
@@ -0,0 +1,155 @@
+"""
+Login path: bcrypt hashes, the legacy SHA-256 rehash, token-bucket limiting
+and the cache of recently verified logins; registration off the calling thread.
+"""
+import hashlib
+import itertools
+import threading
+
+import pytest
+
+from bank_analyzer import auth, db
+
+_accounts = itertools.count()
+
+
+@pytest.fixture(autouse=True)
+def fresh_auth():
+    auth.reset()
+    yield
+    auth.reset()
+
+
+@pytest.fixture
+def account():
+    name = f"acct{next(_accounts)}"
+    assert db.register_user_db(name, "secret")[0]
+    return name
+
+
+def stored_hash(account: str) -> str:
+    conn = db.get_db()
+    row = conn.execute("SELECT password FROM users WHERE account_number=?", (account,)).fetchone()
+    conn.close()
+    return row[0]
+
+
+def set_stored_hash(account: str, value: str):
+    conn = db.get_db()
+    conn.execute("UPDATE users SET password=? WHERE account_number=?", (value, account))
+    conn.commit()
+    conn.close()
+
+
+def login(account: str, password: str, client: str = None):
+    return auth.begin_login(account, password, client).result(timeout=10)
+
+
+def test_registration_stores_bcrypt(account):
+    stored = stored_hash(account)
+    assert stored.startswith("$2") and not auth.needs_rehash(stored)
+    assert login(account, "secret") == (True, "Login successful!")
+    assert login(account, "wrong") == (False, "Incorrect password!")
+    assert login("nobody", "secret") == (False, "User not found!")
+
+
+def test_legacy_row_is_rehashed_on_success(account):
+    legacy = hashlib.sha256(b"secret").hexdigest()
+    set_stored_hash(account, legacy)
+    assert db.login_user_db(account, "wrong")[0] is False
+    assert stored_hash(account) == legacy
+    assert db.login_user_db(account, "secret")[0] is True
+    rehashed = stored_hash(account)
+    assert rehashed.startswith("$2") and auth.check_password("secret", rehashed)
+    assert db.login_user_db(account, "secret")[0] is True
+
+
+def test_cheaper_bcrypt_is_rehashed(account, monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", auth.BCRYPT_ROUNDS + 1)
+    assert auth.needs_rehash(stored_hash(account))
+    assert db.login_user_db(account, "secret")[0] is True
+    assert not auth.needs_rehash(stored_hash(account))
+
+
+def test_token_buckets_refill():
+    buckets = auth.TokenBuckets(burst=2, refill_s=10)
+    assert buckets.take("k", now=0) == 0
+    assert buckets.take("k", now=0) == 0
+    assert buckets.take("k", now=0) == pytest.approx(10)
+    assert buckets.take("k", now=5) == pytest.approx(5)
+    assert buckets.take("k", now=10) == 0
+    assert buckets.take("other", now=10) == 0
+
+
+def test_token_buckets_forget_least_recent():
+    buckets = auth.TokenBuckets(burst=1, refill_s=10, max_keys=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key, now=0)
+    assert buckets.take("a", now=0) == 0
+    assert buckets.take("c", now=0) > 0
+
+
+def test_account_is_limited_without_touching_the_db(account, monkeypatch):
+    for _ in range(auth.ACCOUNT_BURST):
+        assert login(account, "wrong")[0] is False
+    monkeypatch.setattr(db, "login_user_db", lambda *a: pytest.fail("limited attempt reached the database"))
+    future = auth.begin_login(account, "secret")
+    assert future.done()
+    ok, msg = future.result()
+    assert not ok and msg.startswith("Too many login attempts")
+
+
+def test_client_is_limited_across_accounts(monkeypatch):
+    monkeypatch.setattr(auth, "client_limiter", auth.TokenBuckets(burst=2, refill_s=60))
+    assert login("x1", "pw", "10.0.0.1") == (False, "User not found!")
+    assert login("x2", "pw", "10.0.0.1") == (False, "User not found!")
+    assert login("x3", "pw", "10.0.0.1")[1].startswith("Too many login attempts")
+    assert login("x3", "pw", "10.0.0.2") == (False, "User not found!")
+    assert login("x3", "pw", None) == (False, "User not found!")
+
+
+def test_success_refills_the_account_bucket(account):
+    for _ in range(auth.ACCOUNT_BURST - 1):
+        login(account, "wrong")
+    assert login(account, "secret")[0] is True
+    auth._verified.clear()
+    for _ in range(auth.ACCOUNT_BURST - 1):
+        login(account, "wrong")
+    assert login(account, "secret")[0] is True
+
+
+def test_recent_login_is_served_from_memory(account, monkeypatch):
+    assert login(account, "secret")[0] is True
+    monkeypatch.setattr(db, "login_user_db", lambda *a: pytest.fail("cached login reached the database"))
+    future = auth.begin_login(account, "secret")
+    assert future.done() and future.result() == (True, "Login successful!")
+    monkeypatch.undo()
+    assert login(account, "other")[0] is False
+
+
+def test_registration_hashes_off_the_calling_thread(monkeypatch):
+    threads = []
+    hash_password = db.hash_password
+
+    def recording_hash(password):
+        threads.append(threading.current_thread())
+        return hash_password(password)
+
+    monkeypatch.setattr(db, "hash_password", recording_hash)
+    name = f"acct{next(_accounts)}"
+    future = auth.begin_register(name, "secret")
+    assert future.result(timeout=10) == (True, "Registration successful!")
+    assert threads and threading.current_thread() not in threads
+    assert auth.begin_register(name, "other").result(timeout=10) == (False, "Account already exists!")
+    assert login(name, "secret")[0] is True
+
+
+def test_registration_is_limited_per_client(monkeypatch):
+    monkeypatch.setattr(auth, "client_limiter", auth.TokenBuckets(burst=1, refill_s=60))
+    monkeypatch.setattr(db, "register_user_db", lambda *a: (True, "Registration successful!"))
+    assert auth.begin_register("r1", "pw", "10.0.0.1").result(timeout=10)[0] is True
+    monkeypatch.setattr(db, "register_user_db", lambda *a: pytest.fail("limited registration reached the database"))
+    future = auth.begin_register("r2", "pw", "10.0.0.1")
+    assert future.done()
+    ok, msg = future.result()
+    assert not ok and msg.startswith("Too many registration attempts")
@@ -0,0 +1,109 @@
+"""
+Batch ingestion: identical files in one batch are parsed by one worker, workers
+(of parse_many_pdfs and of background jobs) follow the parent's page cache
+configuration, and the CLI takes the statement
+password from -p, a prompt or the environment.
+"""
+import glob
+import os
+import shutil
+
+import pytest
+
+from bank_analyzer import cli, jobs, page_cache, parse_cache, parsing, synthetic
+
+
+def test_identical_files_share_a_worker(corpus, tmp_path, monkeypatch):
+    names = list(corpus)[:2]
+    first = corpus[names[0]]["path"]
+    copy = str(tmp_path / "copy.pdf")
+    shutil.copyfile(first, copy)
+    paths = [first, corpus[names[1]]["path"], copy]
+    submitted = []
+
+    class CountingPool(parsing.ProcessPoolExecutor):
+        def submit(self, fn, path, *args):
+            submitted.append(path)
+            return super().submit(fn, path, *args)
+
+    monkeypatch.setattr(parsing, "ProcessPoolExecutor", CountingPool)
+    parse_cache.clear()
+    rows, aggregated = parsing.parse_many_pdfs(paths, None, workers=2)
+    assert sorted(submitted) == sorted(paths[:2])
+    by_file = {}
+    for row in rows:
+        by_file.setdefault(row["Source File"], []).append((row["Date"], row["Amount"]))
+    assert by_file["copy.pdf"] == by_file[f"{names[0]}.pdf"]
+    assert [fs["rows"] for fs in aggregated["file_status"]][2] == len(by_file["copy.pdf"])
+
+
+@pytest.fixture
+def page_cache_config():
+    previous = page_cache.get_cache()
+    parse_cache.clear()
+    yield
+    page_cache.configure(previous.cache_dir)
+    parse_cache.clear()
+
+
+def cache_files(cache_dir):
+    return glob.glob(os.path.join(cache_dir, "*", "*"))
+
+
+def fresh_statements(tmp_path) -> list:
+    """Statements no earlier test has parsed, so none of their pages are cached anywhere yet."""
+    paths = []
+    for n, bank in enumerate(("HDFC", "ADCB")):
+        paths.append(str(tmp_path / f"{bank}.pdf"))
+        synthetic.write_statement(paths[-1], bank, seed=4242 + n)
+    return paths
+
+
+def test_workers_follow_a_disabled_page_cache(tmp_path, page_cache_config):
+    default_dir = page_cache.default_cache_dir()
+    before = cache_files(default_dir)
+    page_cache.configure(enabled=False)
+    assert parsing.parse_many_pdfs(fresh_statements(tmp_path), None, workers=2)[0]
+    assert cache_files(default_dir) == before
+
+
+def test_workers_use_the_configured_page_cache(tmp_path, page_cache_config):
+    page_cache.configure(str(tmp_path / "pages"))
+    assert parsing.parse_many_pdfs(fresh_statements(tmp_path), None, workers=2)[0]
+    assert len({os.path.basename(os.path.dirname(f)) for f in cache_files(str(tmp_path / "pages"))}) == 2
+
+
+def test_job_workers_follow_a_disabled_page_cache(tmp_path, page_cache_config):
+    default_dir = page_cache.default_cache_dir()
+    before = cache_files(default_dir)
+    page_cache.configure(enabled=False)
+    job = jobs.AnalysisJob(fresh_statements(tmp_path), None, workers=2).start()
+    assert job.wait(120)
+    assert job.aggregate()[0]
+    assert cache_files(default_dir) == before
+
+
+class Parsed(Exception):
+    pass
+
+
+@pytest.mark.parametrize("argv, env, prompt, expected", [
+    (["-p", "cli"], "env", "prompt", "cli"),
+    (["--ask-password"], "env", "prompt", "prompt"),
+    ([], "env", "prompt", "env"),
+    ([], None, "prompt", None),
+])
+def test_cli_password_sources(tmp_path, monkeypatch, argv, env, prompt, expected):
+    def parse(paths, password, **kwargs):
+        raise Parsed(password)
+
+    if env is None:
+        monkeypatch.delenv(cli.PASSWORD_ENV, raising=False)
+    else:
+        monkeypatch.setenv(cli.PASSWORD_ENV, env)
+    monkeypatch.setattr(cli.getpass, "getpass", lambda *a: prompt)
+    monkeypatch.setattr(cli, "parse_many_pdfs", parse)
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+    with pytest.raises(Parsed) as parsed:
+        cli.main([str(tmp_path), "-o", str(tmp_path / "out.csv"), "--no-progress", *argv])
+    assert parsed.value.args[0] == expected
@@ -0,0 +1,158 @@
+"""
+Golden-corpus regression tests: every supported statement format is parsed and
+compared row by row with the transactions the synthetic statement printed, and
+with the printed totals recorded in golden/corpus.json.
+"""
+import pytest
+
+from bank_analyzer import parsing
+from bank_analyzer.synthetic import TABLE_COLUMNS
+
+from conftest import CORPUS
+
+CASES = [case["name"] for case in CORPUS]
+AMOUNT_TOLERANCE = 0.005
+
+
+def assert_rows_match(rows, transactions, untyped_first_row=False):
+    """
+    untyped_first_row: the format prints neither an opening balance nor a Dr/Cr marker
+    (Axis), so the first row's type cannot be known and is not compared.
+    """
+    assert len(rows) == len(transactions)
+    for idx, (row, tx) in enumerate(zip(rows, transactions)):
+        where = f"row {idx}: {row['Remarks']!r}"
+        assert row["Date"].date() == tx["Date"], where
+        if idx or not untyped_first_row:
+            assert row["Type"] == tx["Type"], where
+        assert row["Amount"] == pytest.approx(tx["Amount"], abs=AMOUNT_TOLERANCE), where
+        assert row["Balance"] == pytest.approx(tx["Balance"], abs=AMOUNT_TOLERANCE), where
+        assert tx["Remarks"] in row["Remarks"], where
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_corpus_is_stable(corpus, name):
+    """The generator still renders what the golden file recorded."""
+    entry = corpus[name]
+    expected = entry["case"]["expected"]
+    summary, txs = entry["truth"]["summary"], entry["truth"]["transactions"]
+    assert len(txs) == expected["rows"]
+    assert (summary["dr_count"], summary["cr_count"]) == (expected["dr_count"], expected["cr_count"])
+    assert summary["printed_debits"] == pytest.approx(expected["debits"])
+    assert summary["printed_credits"] == pytest.approx(expected["credits"])
+    assert summary["printed_closing"] == pytest.approx(expected["closing_balance"])
+    assert (txs[0]["Date"].isoformat(), txs[-1]["Date"].isoformat()) == (expected["first_date"], expected["last_date"])
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_parse_pdf_file_rows(corpus, name):
+    entry = corpus[name]
+    rows, printed = parsing.parse_pdf_file(entry["path"], None)
+    assert printed.get("status") is None
+    assert_rows_match(rows, entry["truth"]["transactions"], entry["case"]["expected"].get("untyped_first_row", False))
+    assert {row["Currency"] for row in rows} == {entry["case"]["expected"]["currency"]}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_parse_pdf_file_printed_totals(corpus, name):
+    entry = corpus[name]
+    _, printed = parsing.parse_pdf_file(entry["path"], None)
+    for key, value in entry["case"]["expected"]["printed"].items():
+        assert printed[key] == (pytest.approx(value) if value is not None else None), key
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_balance_chain_reconciles(corpus, name):
+    _, printed = parsing.parse_pdf_file(corpus[name]["path"], None)
+    assert printed["reconciliation"]["breaks"] == []
+
+
+@pytest.mark.parametrize("name", [case["name"] for case in CORPUS if case["bank"] == "HDFC"])
+def test_extract_statement_summary(corpus, name):
+    entry = corpus[name]
+    summary = entry["truth"]["summary"]
+    pages = parsing.extract_pages_text(entry["path"], None)
+    expected = (summary["opening_balance"], summary["printed_debits"], summary["printed_credits"],
+                summary["printed_closing"])
+    assert parsing.extract_statement_summary(pages) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("name", [case["name"] for case in CORPUS if case["bank"] == "HDFC"])
+def test_hdfc_text_parser(corpus, name, monkeypatch):
+    """The delta-inference path still parses HDFC when its table layout is not recognised."""
+    monkeypatch.setattr(parsing, "TABLE_LAYOUTS", {})
+    entry = corpus[name]
+    rows, _ = parsing.parse_pdf_file(entry["path"], None)
+    assert_rows_match(rows, entry["truth"]["transactions"])
+
+
+@pytest.mark.parametrize("name", [case["name"] for case in CORPUS if case["bank"] != "HDFC"])
+def test_legacy_parser(corpus, name):
+    entry = corpus[name]
+    pages = parsing.extract_pages_text(entry["path"], None)
+    rows = parsing._legacy_parse_pdf_file(entry["path"], None, pages)
+    assert_rows_match(rows, entry["truth"]["transactions"], entry["case"]["expected"].get("untyped_first_row", False))
+
+
+@pytest.mark.parametrize("name", [case["name"] for case in CORPUS if case["bank"] in TABLE_COLUMNS])
+def test_table_rows(corpus, name):
+    entry = corpus[name]
+    texts, tables = parsing.extract_pages(entry["path"], None)
+    layout_name = parsing.table_layout(texts)
+    assert layout_name == entry["case"]["bank"]
+    rows = parsing.table_rows(tables, layout_name, entry["path"])
+    assert_rows_match(rows, entry["truth"]["transactions"])
+    assert {row["inference_reason"] for row in rows} == {"table_columns"}
+
+
+class StubPage:
+    """extract_words() of a page: (x0, text) per line, one word per cell."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def extract_words(self):
+        words = []
+        for n, line in enumerate(self.lines):
+            for x0, text in line:
+                words.append({"text": text, "x0": x0, "x1": x0 + 5 * len(text), "top": 100 + 12 * n})
+        return words
+
+
+def test_opening_balance_row_does_not_end_the_table():
+    columns = parsing.TABLE_LAYOUTS["ADCB"]["columns"]
+    header = [(30, "Posting"), (60, "Date"), (80, "Value"), (105, "Date"), (130, "Description"), (320, "Ref"),
+              (400, "Debit"), (460, "Credit"), (530, "Balance")]
+    page = StubPage([
+        header,
+        [(130, "Opening"), (170, "Balance"), (520, "50,000.00")],
+        [(30, "01/01/2024"), (80, "01/01/2024"), (130, "SALARY"), (320, "R1"), (460, "1,000.00"), (520, "51,000.00")],
+        [(30, "Page"), (60, "1"), (70, "of"), (80, "1")],
+        [(30, "02/01/2024"), (130, "AFTER"), (400, "5.00"), (520, "50,995.00")],
+    ])
+    _, sliced = parsing._table_page(page, columns)
+    rows = parsing.table_rows([sliced], "ADCB", "stub.pdf")
+    assert [(r["Type"], r["Amount"], r["Balance"]) for r in rows] == [("CR", 1000.0, 51000.0)]
+
+
+def chain(*rows):
+    return [{"Amount": amount, "Type": typ, "Balance": balance, "Remarks": "TRANSFER"} for amount, typ, balance in rows]
+
+
+def test_opening_repair_keeps_the_current_opening_on_ties():
+    # the opening is right, the types are not; the credit-implied opening explains the rows just as well
+    rows = chain((100.0, "CR", 900.0), (50.0, "CR", 850.0))
+    rows, recon = parsing.reconcile_rows(rows, 1000.0, {})
+    assert recon["opening_balance"] == 1000.0
+    assert [r["Type"] for r in rows] == ["DR", "DR"]
+    assert recon["breaks_unresolved"] == 0
+    assert [b["kind"] for b in recon["breaks"]] == ["type_mismatch", "type_mismatch"]
+
+
+def test_opening_repair_without_candidates_from_the_parser():
+    # legacy parsers pass no candidates; the first row's own openings are tried
+    rows = chain((100.0, "DR", 900.0), (50.0, "DR", 850.0))
+    rows, recon = parsing.reconcile_rows(rows, 5000.0, {})
+    assert recon["opening_balance"] == 1000.0
+    assert recon["breaks"][0]["kind"] == "opening_mismatch" and recon["breaks"][0]["repaired"]
+    assert recon["status"] == "repaired"
@@ -0,0 +1,86 @@
+"""
+File Manager listing: search, sort and pagination of saved statements, and
+renames relabeling the Source File categories of analyzed rows.
+"""
+import pandas as pd
+import pytest
+
+from bank_analyzer import library
+
+
+def make_items(count: int) -> list:
+    return [
+        {"id": n, "filename": f"{'hdfc' if n % 2 else 'adcb'}_{n:03d}.pdf", "filepath": f"/lib/{n}.pdf",
+         "uploaded_at": f"2026-01-{1 + n % 28:02d}T10:{n % 60:02d}:00"}
+        for n in range(count)
+    ]
+
+
+def test_view_pages_through_every_item():
+    items = make_items(45)
+    seen = []
+    for page in (1, 2, 3):
+        rows, current, pages, matched = library.view(items, {}, page=page, page_size=20)
+        assert (current, pages, len(matched)) == (page, 3, 45)
+        seen += [r["id"] for r in rows]
+    assert sorted(seen) == list(range(45))
+    assert len(library.view(items, {}, page=3, page_size=20)[0]) == 5
+
+
+def test_view_clamps_the_page():
+    items = make_items(5)
+    assert library.view(items, {}, page=9, page_size=2)[1:3] == (3, 3)
+    assert library.view(items, {}, page=0, page_size=2)[1] == 1
+    rows, page, pages, matched = library.view(items, {}, query="nothing matches", page=4)
+    assert (rows, page, pages, matched) == ([], 1, 1, [])
+
+
+def test_search_uses_display_names_and_every_word():
+    items = make_items(6)
+    names = {2: "Salary March HDFC"}
+    hits = library.search(items, names, "hdfc")
+    assert [i["id"] for i in hits] == [1, 2, 3, 5]
+    assert [i["id"] for i in library.search(items, names, "march SALARY")] == [2]
+    assert len(library.search(items, names, "  ")) == 6
+
+
+@pytest.mark.parametrize("sort, expected", [
+    ("Newest first", [3, 2, 1, 0]),
+    ("Oldest first", [0, 1, 2, 3]),
+    ("Name A–Z", [2, 0, 3, 1]),
+    ("Name Z–A", [1, 3, 0, 2]),
+])
+def test_sorts(sort, expected):
+    items = make_items(4)
+    names = {0: "b", 1: "D", 2: "a", 3: "c"}
+    assert [i["id"] for i in library.view(items, names, sort=sort)[0]] == expected
+
+
+def frame(sources):
+    return pd.DataFrame({"Source File": pd.Categorical(sources), "Amount": range(len(sources))})
+
+
+def test_relabel_renames_categories():
+    df = frame(["a.pdf", "b.pdf", "a.pdf", None])
+    codes = df["Source File"].cat.codes.tolist()
+    library.relabel_sources(df, {"a.pdf": "March"})
+    assert df["Source File"].tolist()[:3] == ["March", "b.pdf", "March"]
+    assert pd.isna(df["Source File"].iloc[3])
+    assert df["Source File"].cat.codes.tolist() == codes
+
+
+def test_relabel_merges_into_an_existing_name():
+    df = frame(["a.pdf", "b.pdf", "a.pdf", None])
+    library.relabel_sources(df, {"a.pdf": "b.pdf"})
+    assert df["Source File"].tolist()[:3] == ["b.pdf"] * 3
+    assert pd.isna(df["Source File"].iloc[3])
+    assert list(df["Source File"].cat.categories) == ["b.pdf"]
+
+
+def test_relabel_swaps_and_plain_columns():
+    df = frame(["a.pdf", "b.pdf"])
+    library.relabel_sources(df, {"a.pdf": "b.pdf", "b.pdf": "a.pdf"})
+    assert df["Source File"].tolist() == ["b.pdf", "a.pdf"]
+    plain = pd.DataFrame({"Source File": ["a.pdf", "c.pdf"]})
+    library.relabel_sources(plain, {"c.pdf": "C"})
+    assert plain["Source File"].tolist() == ["a.pdf", "C"]
@@ -0,0 +1,34 @@
+"""
+Remarks that name no merchant: they share the UNKNOWN merchant id and are kept
+out of per-merchant aggregations.
+"""
+import pandas as pd
+
+from bank_analyzer import dashboard, merchants, recurring
+
+
+def debits(remarks, amounts, dates=None):
+    dates = dates or ["2026-01-01"] * len(remarks)
+    df = pd.DataFrame({"Date": dates, "Remarks": remarks, "Amount": amounts, "Type": "DR", "Category": "Other"})
+    df["Merchant ID"] = merchants.merchant_ids(df["Remarks"])
+    return df
+
+
+def test_unknown_remarks_share_one_id():
+    df = debits(["UPI/DR/412345678901/YESB", "NEFT 998877/REF 12", "UPI/DR/1/NETFLIX/YESB"], [1.0, 2.0, 3.0])
+    assert merchants.merchant_names(df["Merchant ID"]).tolist() == [merchants.UNKNOWN, merchants.UNKNOWN, "NETFLIX"]
+    assert merchants.known(df["Merchant ID"]).tolist() == [False, False, True]
+
+
+def test_merchant_summary_leaves_unknown_out():
+    df = debits(["UPI/DR/412345678901/YESB", "NEFT 998877/REF 12", "POS 4591 DMART STORE 12/03"], [900.0, 800.0, 10.0])
+    summary = dashboard.merchant_summary(df)
+    assert summary["Merchant"].tolist() == ["DMART STORE"]
+
+
+def test_unknown_remarks_are_not_recurring():
+    months = [f"2026-{m:02d}-05" for m in range(1, 7)]
+    remarks = [f"NEFT 99887{m}/REF {m}" if m % 2 else f"UPI/DR/41234567890{m}/YESB" for m in range(6)]
+    assert recurring.detect_recurring(debits(remarks, [500.0] * 6, months)).empty
+    rent = debits(["NEFT/LANDLORD RENT"] * 6, [500.0] * 6, months)
+    assert recurring.detect_recurring(rent)["Merchant"].tolist() == ["LANDLORD RENT"]
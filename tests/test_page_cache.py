@@ -0,0 +1,97 @@
+"""
+Page text cache entries of encrypted statements: keyed password secrets, sealed
+bodies, and opening with the password that worked.
+"""
+import glob
+import hashlib
+import os
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from bank_analyzer import page_cache, parsing, synthetic
+
+PASSWORD = "acct-1234"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    page_cache.configure(str(tmp_path / "page_cache"))
+    parsing._open_strategies.clear()
+    yield page_cache.get_cache()
+    parsing._open_strategies.clear()
+
+
+def encrypted_statement(tmp_path, user_password: str, bank: str = "HDFC") -> str:
+    plain = str(tmp_path / f"{bank}_plain.pdf")
+    synthetic.write_statement(plain, bank, pages=2)
+    writer = PdfWriter()
+    writer.append_pages_from_reader(PdfReader(plain))
+    writer.encrypt(user_password, "owner-only")
+    path = str(tmp_path / f"{bank}_{user_password or 'owner'}.pdf")
+    with open(path, "wb") as out:
+        writer.write(out)
+    return path
+
+
+def test_plain_entries_round_trip(cache):
+    cache.put("ab" * 32, ["one", "", "three"])
+    assert cache.get("ab" * 32) == ["one", "", "three"]
+    assert cache.get("ab" * 32, pages=[3, 1]) == ["three", "one"]
+    assert cache.encryption("ab" * 32) == (False, b"\0" * 32)
+
+
+def test_encrypted_entries_are_sealed(cache):
+    digest = "cd" * 32
+    cache.put(digest, ["Opening Balance 100.00"], encrypted=True, password=PASSWORD)
+    raw = open(cache._path(digest), "rb").read()
+    assert b"Opening Balance" not in raw
+    assert hashlib.sha256(PASSWORD.encode()).digest() not in raw
+    assert cache.get(digest, PASSWORD) == ["Opening Balance 100.00"]
+    assert cache.get(digest, "wrong") is None
+    assert cache.get(digest) is None
+    encrypted, secret = cache.encryption(digest)
+    assert encrypted and secret == page_cache.password_secret(PASSWORD, digest)
+
+
+def test_secrets_are_keyed_per_document():
+    assert page_cache.password_secret(PASSWORD, "ab" * 32) != page_cache.password_secret(PASSWORD, "cd" * 32)
+    assert page_cache.password_secret(None, "ab" * 32) == b"\0" * 32
+
+
+def test_tampered_body_is_a_miss(cache):
+    digest = "ef" * 32
+    cache.put(digest, ["text"], encrypted=True, password=PASSWORD)
+    path = cache._path(digest)
+    data = bytearray(open(path, "rb").read())
+    data[-1] ^= 1
+    open(path, "wb").write(bytes(data))
+    assert cache.get(digest, PASSWORD) is None
+
+
+@pytest.mark.parametrize("user_password", [PASSWORD, ""])
+def test_encrypted_statement_parses_from_the_cache(cache, tmp_path, monkeypatch, user_password):
+    path = encrypted_statement(tmp_path, user_password)
+    rows, printed = parsing.parse_pdf_file(path, PASSWORD)
+    assert rows and printed.get("status") is None
+    parsing._open_strategies.clear()
+    monkeypatch.setattr(parsing, "_extract_all_pages", lambda *a: pytest.fail("cached statement was extracted again"))
+    cached_rows, printed = parsing.parse_pdf_file(path, PASSWORD)
+    assert [(r["Date"], r["Amount"]) for r in cached_rows] == [(r["Date"], r["Amount"]) for r in rows]
+    for entry in glob.glob(os.path.join(cache.cache_dir, "*", "*")):
+        assert b"STATEMENT" not in open(entry, "rb").read()
+
+
+def test_wrong_password_is_not_served_from_the_cache(cache, tmp_path):
+    path = encrypted_statement(tmp_path, PASSWORD)
+    assert parsing.parse_pdf_file(path, PASSWORD)[0]
+    rows, printed = parsing.parse_pdf_file(path, "someone else")
+    assert rows == [] and printed["status"] == "wrong_password"
+
+
+def test_table_pages_reopen_with_the_password_that_worked(cache, tmp_path, monkeypatch):
+    """An owner-password-only PDF opens without a password; the account password must not be used."""
+    path = encrypted_statement(tmp_path, "")
+    texts, tables = parsing.extract_pages(path, PASSWORD)
+    monkeypatch.setattr(parsing, "_password_candidates", lambda *a: [PASSWORD, None])
+    assert parsing.extract_table_pages(path, PASSWORD, parsing.table_layout(texts)) == tables
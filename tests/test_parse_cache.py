@@ -0,0 +1,58 @@
+"""
+Parse results shared across sessions: which encrypted statements are shared,
+and held results counting against the cache's budget.
+"""
+import pytest
+
+from bank_analyzer import page_cache, parse_cache, parsing
+
+from test_page_cache import PASSWORD, encrypted_statement
+
+
+@pytest.fixture
+def no_page_cache():
+    parse_cache.clear()
+    parsing._open_strategies.clear()
+    previous = page_cache.get_cache()
+    page_cache.configure(enabled=False)
+    yield
+    page_cache.configure(previous.cache_dir)
+    parse_cache.clear()
+    parsing._open_strategies.clear()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_owner_only_statement_is_shared(no_page_cache, tmp_path, workers):
+    path = encrypted_statement(tmp_path, "")
+    rows, _ = parsing.parse_many_pdfs([path, path], PASSWORD, workers=workers)
+    assert rows
+    assert parse_cache.lookup(path, "another account") is not None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_password_statement_is_not_shared(no_page_cache, tmp_path, workers):
+    path = encrypted_statement(tmp_path, PASSWORD)
+    rows, _ = parsing.parse_many_pdfs([path, path], PASSWORD, workers=workers)
+    assert rows
+    assert parse_cache.lookup(path, "another account") is None
+    assert parse_cache.lookup(path) is None
+    assert parse_cache.lookup(path, PASSWORD) is not None
+
+
+def test_held_entries_are_evicted_over_budget(no_page_cache, tmp_path, monkeypatch):
+    paths = [str(tmp_path / f"{n}.pdf") for n in range(3)]
+    for n, path in enumerate(paths):
+        open(path, "wb").write(b"%PDF " + bytes([n]))
+        parse_cache.store(path, None, ([{"Amount": float(n)}] * 10, {"status": None}))
+    for path in paths[:2]:
+        parse_cache.acquire(page_cache.file_hash(path), "session")
+    size = parse_cache.usage()["bytes"] // 3
+    # unheld entries go first, even the most recently used one
+    monkeypatch.setattr(parse_cache, "MAX_BYTES", 2 * size)
+    parse_cache.release_all("nobody")
+    assert [parse_cache.lookup(p) is not None for p in paths] == [True, True, False]
+    # then held ones, least recently used first
+    monkeypatch.setattr(parse_cache, "MAX_BYTES", size)
+    parse_cache.release_all("nobody")
+    assert [parse_cache.lookup(p) is not None for p in paths] == [False, True, False]
+    assert parse_cache.usage()["bytes"] <= size
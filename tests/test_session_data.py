@@ -0,0 +1,95 @@
+"""
+Session datasets under the memory budget: spills and reloads run outside the
+module lock, and spill directories of processes that are gone are removed.
+"""
+import os
+import subprocess
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from bank_analyzer import session_data
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(session_data, "MEMORY_BUDGET", 1)
+    yield
+    for session in {k[0] for k in list(session_data._entries)}:
+        session_data.drop(session)
+
+
+def frame(n: int = 1000):
+    return pd.DataFrame({"Amount": range(n), "Remarks": [f"row {i}" for i in range(n)]})
+
+
+def test_spilled_frame_reads_back(budget):
+    session_data.put("s1", "last_df", frame(), owner="u")
+    session_data.put("s2", "last_df", frame(10), owner="u")
+    assert session_data._entries[("s1", "last_df")]["frame"] is None
+    pd.testing.assert_frame_equal(session_data.get("s1", "last_df"), frame())
+    session_data.drop("s1")
+    assert session_data.get("s1", "last_df") is None
+
+
+def test_spill_writes_outside_the_lock(budget, monkeypatch):
+    writing, release = threading.Event(), threading.Event()
+    write = session_data._write
+
+    def slow_write(df, path):
+        writing.set()
+        assert release.wait(10)
+        write(df, path)
+
+    monkeypatch.setattr(session_data, "_write", slow_write)
+    session_data.put("s1", "last_df", frame(), owner="u")
+    spiller = threading.Thread(target=session_data.put, args=("s2", "last_df", frame(10), "u"))
+    spiller.start()
+    assert writing.wait(10)
+    # the module lock is free while s1 is being written; s1 itself is still served from memory
+    assert session_data._lock.acquire(timeout=5)
+    session_data._lock.release()
+    assert session_data.get("s1", "last_df") is not None
+    release.set()
+    spiller.join(10)
+    assert session_data._entries[("s1", "last_df")]["frame"] is None
+
+
+def test_drop_during_spill_removes_the_file(budget, monkeypatch):
+    writing, release = threading.Event(), threading.Event()
+    write = session_data._write
+
+    def slow_write(df, path):
+        writing.set()
+        assert release.wait(10)
+        write(df, path)
+
+    monkeypatch.setattr(session_data, "_write", slow_write)
+    session_data.put("s1", "last_df", frame(), owner="u")
+    path = session_data._entries[("s1", "last_df")]["path"]
+    spiller = threading.Thread(target=session_data.put, args=("s2", "last_df", frame(10), "u"))
+    spiller.start()
+    assert writing.wait(10)
+    session_data.drop("s1")
+    release.set()
+    spiller.join(10)
+    assert not os.path.exists(path)
+    assert session_data.usage()["resident"] == session_data._entries[("s2", "last_df")]["nbytes"]
+
+
+def test_stale_spill_directories_are_removed(budget, monkeypatch):
+    root = session_data._sessions_root()
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    stale = [os.path.join(root, finished.stdout.strip()), os.path.join(root, "u"), os.path.join(root, str(os.getpid()))]
+    live = os.path.join(root, str(os.getppid()))
+    for directory in stale + [live]:
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, "left.arrow"), "wb").close()
+    monkeypatch.setattr(session_data, "_root_cleaned", False)
+    session_data.put("s1", "last_df", frame(), owner="u")
+    session_data.put("s2", "last_df", frame(10), owner="u")
+    assert [d for d in stale if os.path.exists(os.path.join(d, "left.arrow"))] == []
+    assert os.path.exists(os.path.join(live, "left.arrow"))
+    pd.testing.assert_frame_equal(session_data.get("s1", "last_df"), frame())
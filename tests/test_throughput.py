@@ -0,0 +1,69 @@
+"""
+Per-format throughput budgets for parse_pdf_file, in pages per second.
+
+golden/throughput_budgets.json records a reference rate per format for a cold
+parse (page text cache disabled: dominated by pdfplumber extraction) and a warm
+one (page texts cached: our parsing, reconciliation and summary code). A test
+fails when the best of a few runs falls more than the tolerance below the
+reference. Set BANK_ANALYZER_THROUGHPUT_TOLERANCE (e.g. 0.6) on slow or busy
+machines, and re-measure the references when the hardware they describe changes.
+"""
+import os
+import time
+
+import pytest
+
+from bank_analyzer import page_cache, parsing, synthetic
+
+from conftest import load_json
+
+BUDGETS = load_json("throughput_budgets.json")
+TOLERANCE = float(os.environ.get("BANK_ANALYZER_THROUGHPUT_TOLERANCE") or BUDGETS["tolerance"])
+
+pytestmark = pytest.mark.throughput
+
+
+@pytest.fixture(scope="module")
+def statements(tmp_path_factory):
+    root = tmp_path_factory.mktemp("throughput")
+    paths = {}
+    for bank in BUDGETS["formats"]:
+        paths[bank] = str(root / f"{bank}.pdf")
+        synthetic.write_statement(paths[bank], bank, pages=BUDGETS["pages"], seed=BUDGETS["seed"])
+    return paths
+
+
+def pages_per_second(path: str, runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows, printed = parsing.parse_pdf_file(path, None)
+        best = min(best, time.perf_counter() - start)
+        assert rows and printed.get("status") is None
+    return BUDGETS["pages"] / best
+
+
+def assert_within_budget(bank: str, mode: str, measured: float):
+    reference = BUDGETS["formats"][bank][mode]
+    floor = reference * (1 - TOLERANCE)
+    assert measured >= floor, (
+        f"{bank} {mode} parse: {measured:.1f} pages/s, budget {floor:.1f} "
+        f"(reference {reference} - {TOLERANCE:.0%})"
+    )
+
+
+@pytest.mark.parametrize("bank", list(BUDGETS["formats"]))
+def test_cold_parse_throughput(statements, bank, tmp_path):
+    page_cache.configure(enabled=False)
+    try:
+        measured = pages_per_second(statements[bank], BUDGETS["cold_runs"])
+    finally:
+        page_cache.configure(str(tmp_path / "page_cache"))
+    assert_within_budget(bank, "cold", measured)
+
+
+@pytest.mark.parametrize("bank", list(BUDGETS["formats"]))
+def test_warm_parse_throughput(statements, bank, tmp_path):
+    page_cache.configure(str(tmp_path / "page_cache"))
+    parsing.parse_pdf_file(statements[bank], None)
+    assert_within_budget(bank, "warm", pages_per_second(statements[bank], BUDGETS["warm_runs"]))